@@ -1,24 +1,59 @@
-from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
-from sqlalchemy.orm import Session
-from typing import List, Dict, Optional
-from pydantic import BaseModel
-from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy import and_, or_, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import undefer_group
+from typing import List, Dict, Optional, TYPE_CHECKING
+from pydantic import BaseModel, Field
+from datetime import datetime, timedelta
+from functools import lru_cache
+import asyncio
 import threading
 
-from ..core.database import get_db
-from ..models.site import Site, Analysis, Keyword, AnalysisProgress
-from ..services.seo_analyzer import SEOAnalyzer
-from ..services.pagespeed_service import PageSpeedService
-
-router = APIRouter()
-
-# Initialize services
-seo_analyzer = SEOAnalyzer()
-pagespeed_service = PageSpeedService()
+from ..core.config import settings
+from ..core.database import AsyncSessionLocal, get_async_db
+from ..core.pagination import encode_cursor, decode_cursor, NEXT_CURSOR_HEADER
+from ..core.responses import ORJSONResponse, dump_trusted, dump_trusted_list, trusted_response
+from ..core.http_cache import (
+    analysis_etag, etag_matches, not_modified,
+    IMMUTABLE_CACHE_CONTROL, REVALIDATE_CACHE_CONTROL
+)
+from ..models.site import Site, Analysis, Keyword, AnalysisProgress, Recommendation, ANALYSIS_PAYLOAD_GROUP
+from ..services.analysis_job import (
+    AnalysisJob, AnalysisCancelled, ACTIVE_STATUSES, IN_FLIGHT_STATUSES,
+    register_job, unregister_job, cancel_local_job
+)
+from ..services.analysis_history import encode_analysis_payload, hydrate_payload, diff_analyses
+from ..services.dashboard_service import invalidate_dashboard_cache
+from ..services.recommendation_service import (
+    generate_recommendations, persist_recommendations, recommendation_to_dict
+)
+
+if TYPE_CHECKING:
+    from ..services.seo_analyzer import SEOAnalyzer
+    from ..services.pagespeed_service import PageSpeedService
+
+router = APIRouter(default_response_class=ORJSONResponse)
+
+
+# Services are constructed on first use, so importing the app (and every
+# serverless cold start) does not load requests, BeautifulSoup or the LLM SDK
+@lru_cache(maxsize=None)
+def get_seo_analyzer() -> "SEOAnalyzer":
+    from ..services.seo_analyzer import SEOAnalyzer
+    return SEOAnalyzer()
+
+
+@lru_cache(maxsize=None)
+def get_pagespeed_service() -> "PageSpeedService":
+    from ..services.pagespeed_service import PageSpeedService
+    return PageSpeedService()
 
 
 # Pydantic schemas
-class AnalysisResponse(BaseModel):
+class AnalysisSummaryResponse(BaseModel):
+    """Score-only view of an analysis (no deferred JSON payload)"""
     id: int
     site_id: int
     total_score: float
@@ -28,7 +63,6 @@ class AnalysisResponse(BaseModel):
     content_score: float
     user_experience_score: float
     authority_score: float
-    score_breakdown: Optional[Dict] = None
     pagespeed_mobile_score: Optional[float] = None
     pagespeed_desktop_score: Optional[float] = None
     created_at: datetime
@@ -37,6 +71,10 @@ class AnalysisResponse(BaseModel):
         from_attributes = True
 
 
+class AnalysisResponse(AnalysisSummaryResponse):
+    score_breakdown: Optional[Dict] = None
+
+
 class DetailedAnalysisResponse(BaseModel):
     analysis: AnalysisResponse
     technical_details: Optional[Dict] = None
@@ -49,6 +87,58 @@ class DetailedAnalysisResponse(BaseModel):
     llm_ux_analysis: Optional[Dict] = None
     llm_authority_analysis: Optional[Dict] = None
     llm_action_plan: Optional[Dict] = None
+    # Stages skipped because they ran over their budget (partial result)
+    timed_out_stages: List[str] = []
+
+
+class AnalysisDiffResponse(BaseModel):
+    base_id: int
+    target_id: int
+    # Changed score columns: {"total_score": {"old": ..., "new": ...}}
+    scores: Dict[str, Dict]
+    # Changed payload values: {"path": [...], "old": ..., "new": ...};
+    # old/new is null when the value did not exist on that side
+    changes: List[Dict]
+
+
+class RescoreRequest(BaseModel):
+    # Overrides of scoring.DEFAULT_PROFILE, e.g. {"weights": {"content": 0.4}}
+    profile: Dict = {}
+    limit: int = Field(100, ge=1, le=1000)
+
+
+class RescoreResponse(BaseModel):
+    site_id: int
+    profile: Dict
+    # {"analysis_id", "created_at", "stored": {...}, "rescored": {...}}, newest first
+    analyses: List[Dict]
+    # Analyses without a stored feature vector
+    skipped: int
+
+
+class RecommendationResponse(BaseModel):
+    id: int
+    site_id: int
+    analysis_id: int
+    title: str
+    description: str
+    priority: str
+    difficulty: str
+    expected_impact: float
+    category: str
+    source: Optional[str] = None
+    implementation_guide: Optional[str] = None
+    external_resources: Optional[List] = None
+    is_completed: bool
+    completed_at: Optional[datetime] = None
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class RecommendationUpdate(BaseModel):
+    is_completed: bool
 
 
 class ProgressResponse(BaseModel):
@@ -57,6 +147,7 @@ class ProgressResponse(BaseModel):
     status: str
     current_step: Optional[str] = None
     progress_percentage: int
+    steps_completed: Optional[List[str]] = None
     analysis_id: Optional[int] = None
     error_message: Optional[str] = None
     created_at: datetime
@@ -67,43 +158,67 @@ class ProgressResponse(BaseModel):
 
 
 def run_analysis_in_thread(site_id: int, site_url: str, progress_id: int):
-    """Run analysis in a separate thread with progress tracking"""
+    """
+    Run analysis in a separate thread with progress tracking
+
+    The job can be cancelled through DELETE /jobs/{id} and is bounded by
+    ANALYSIS_JOB_TIMEOUT_SECONDS; stages that run out of time are recorded
+    as timed out and the analysis is saved with the results it has.
+    """
     from ..core.database import SessionLocal
     db = SessionLocal()
 
     try:
         print(f"Starting analysis thread for site {site_id}, progress {progress_id}", flush=True)
 
-        # Get progress record
+        # Claim the job; a job cancelled while pending is not started
+        claimed = db.query(AnalysisProgress).filter(
+            AnalysisProgress.id == progress_id,
+            AnalysisProgress.status == "pending"
+        ).update({
+            "status": "running",
+            "current_step": "分析を開始しています...",
+            "progress_percentage": 0
+        }, synchronize_session=False)
+        db.commit()
+
         progress = db.query(AnalysisProgress).filter(AnalysisProgress.id == progress_id).first()
         if not progress:
             print(f"ERROR: Progress record {progress_id} not found!", flush=True)
             return
+        if not claimed:
+            print(f"Progress {progress_id} is {progress.status}, not starting", flush=True)
+            return
 
         print(f"Progress record found, starting analysis...", flush=True)
 
-        # Update status to running
-        progress.status = "running"
-        progress.current_step = "分析を開始しています..."
-        progress.progress_percentage = 0
-        db.commit()
-
-        # Set up progress callback
+        # Progress and cancel checks use this thread's session only
         def update_progress(step: str, percentage: int):
             progress.current_step = step
             progress.progress_percentage = percentage
             db.commit()
 
-        seo_analyzer.set_progress_callback(update_progress)
+        def cancel_requested() -> bool:
+            db.refresh(progress, attribute_names=["status"])
+            return progress.status == "cancelling"
+
+        job = AnalysisJob(
+            job_id=progress_id,
+            timeout=settings.ANALYSIS_JOB_TIMEOUT_SECONDS,
+            progress_callback=update_progress,
+            cancel_check=cancel_requested
+        )
+        register_job(job)
 
         # Run SEO analysis
-        analysis_result = seo_analyzer.analyze_site(site_url)
+        analysis_result = get_seo_analyzer().analyze_site(site_url, job=job)
 
         if "error" in analysis_result:
             progress.status = "failed"
             progress.error_message = analysis_result["error"]
             progress.progress_percentage = 0
             db.commit()
+            invalidate_dashboard_cache()
             return
 
         # Get PageSpeed scores
@@ -111,7 +226,13 @@ def run_analysis_in_thread(site_id: int, site_url: str, progress_id: int):
         progress.progress_percentage = 95
         db.commit()
 
-        pagespeed_data = pagespeed_service.get_mobile_and_desktop_scores(site_url)
+        pagespeed_data = job.run_optional_stage(
+            "pagespeed", {"error": "PageSpeed analysis timed out"},
+            get_pagespeed_service().get_mobile_and_desktop_scores, site_url
+        )
+
+        # Last cancellation point before results are written
+        job.check()
 
         # Create analysis record
         site = db.query(Site).filter(Site.id == site_id).first()
@@ -125,6 +246,8 @@ def run_analysis_in_thread(site_id: int, site_url: str, progress_id: int):
             user_experience_score=analysis_result["user_experience_score"],
             authority_score=analysis_result["authority_score"],
             score_breakdown=analysis_result.get("score_breakdown"),
+            feature_vector=analysis_result.get("feature_vector"),
+            html_snapshot_hash=(analysis_result.get("page_snapshot") or {}).get("hash"),
             pagespeed_mobile_score=pagespeed_data.get("mobile", {}).get("performance_score"),
             pagespeed_desktop_score=pagespeed_data.get("desktop", {}).get("performance_score"),
             largest_contentful_paint=pagespeed_data.get("mobile", {}).get("core_web_vitals", {}).get("largest_contentful_paint"),
@@ -142,7 +265,13 @@ def run_analysis_in_thread(site_id: int, site_url: str, progress_id: int):
                 "technical": analysis_result.get("technical_details"),
                 "content": analysis_result.get("content_details"),
                 "ux": analysis_result.get("ux_details"),
-                "pagespeed": pagespeed_data
+                "pagespeed": pagespeed_data,
+                "site_structure": analysis_result.get("site_structure"),
+                "duplicate_content": analysis_result.get("duplicate_content"),
+                "link_check": analysis_result.get("link_check"),
+                "resource_audit": analysis_result.get("resource_audit"),
+                "page_snapshot": analysis_result.get("page_snapshot"),
+                "timed_out_stages": job.timed_out_stages
             },
             llm_technical_analysis=analysis_result.get("llm_technical_analysis"),
             llm_content_analysis=analysis_result.get("llm_content_analysis"),
@@ -152,8 +281,19 @@ def run_analysis_in_thread(site_id: int, site_url: str, progress_id: int):
         )
 
         db.add(new_analysis)
+        db.flush()
+
+        # Materialize recommendations once, carrying completion status over
+        # from the site's previous analysis
+        persist_recommendations(db, new_analysis, previous_analysis_id=site.latest_analysis_id)
+
+        # Delta storage mode replaces the payload with a delta (after the
+        # recommendations above have read llm_action_plan)
+        encode_analysis_payload(db, new_analysis, previous_id=site.latest_analysis_id)
 
-        # Update site's latest score and last analyzed time
+        # Update site's latest analysis pointer, score and last analyzed time
+        site.latest_analysis_id = new_analysis.id
+        site.previous_score = site.latest_score
         site.latest_score = analysis_result["total_score"]
         site.last_analyzed_at = datetime.utcnow()
 
@@ -163,10 +303,26 @@ def run_analysis_in_thread(site_id: int, site_url: str, progress_id: int):
         # Update progress to completed
         progress.status = "completed"
         progress.analysis_id = new_analysis.id
-        progress.current_step = "分析が完了しました"
+        progress.current_step = (
+            "分析が完了しました（一部の処理がタイムアウトしました）"
+            if job.timed_out_stages else "分析が完了しました"
+        )
         progress.progress_percentage = 100
+        progress.steps_completed = job.completed_stages
         progress.completed_at = datetime.utcnow()
         db.commit()
+        invalidate_dashboard_cache()
+
+    except AnalysisCancelled:
+        print(f"Analysis {progress_id} cancelled", flush=True)
+        db.rollback()
+        progress = db.query(AnalysisProgress).filter(AnalysisProgress.id == progress_id).first()
+        if progress:
+            progress.status = "cancelled"
+            progress.current_step = "分析がキャンセルされました"
+            progress.completed_at = datetime.utcnow()
+            db.commit()
+            invalidate_dashboard_cache()
 
     except Exception as e:
         print(f"Analysis error: {str(e)}", flush=True)
@@ -178,43 +334,70 @@ def run_analysis_in_thread(site_id: int, site_url: str, progress_id: int):
             progress.status = "failed"
             progress.error_message = str(e)
             db.commit()
+            invalidate_dashboard_cache()
     finally:
+        unregister_job(progress_id)
         db.close()
 
 
 @router.post("/{site_id}", response_model=ProgressResponse)
 async def run_analysis(
     site_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Start SEO analysis on a site (runs in background)"""
     print(f"Analysis requested for site {site_id}", flush=True)
 
     # Get site
-    site = db.query(Site).filter(Site.id == site_id).first()
+    result = await db.execute(select(Site).where(Site.id == site_id))
+    site = result.scalars().first()
     if not site:
         print(f"Site {site_id} not found!", flush=True)
         raise HTTPException(status_code=404, detail="Site not found")
 
     print(f"Site found: {site.url}", flush=True)
-
-    # Create progress record
-    progress = AnalysisProgress(
-        site_id=site.id,
-        status="pending",
-        progress_percentage=0,
-        steps_completed=[]
-    )
-    db.add(progress)
-    db.commit()
-    db.refresh(progress)
+    site_url = site.url
+
+    # Single flight: a site has at most one pending or running job. The
+    # partial unique index on analysis_progress makes the insert the atomic
+    # claim across processes; a request that loses the race gets the job
+    # that won instead of starting a second analysis.
+    for _ in range(2):
+        await expire_stale_jobs(db, site_id)
+
+        in_flight = await get_in_flight_progress(db, site_id)
+        if in_flight:
+            print(f"Analysis already in flight for site {site_id} (progress {in_flight.id})", flush=True)
+            return in_flight
+
+        progress = AnalysisProgress(
+            site_id=site_id,
+            status="pending",
+            progress_percentage=0,
+            steps_completed=[]
+        )
+        db.add(progress)
+        try:
+            await db.flush()
+        except IntegrityError:
+            await db.rollback()
+            continue
+
+        # Point the site at its newest progress record
+        await db.execute(update(Site).where(Site.id == site_id).values(latest_progress_id=progress.id))
+        await db.commit()
+        await db.refresh(progress)
+        break
+    else:
+        # The competing job finished between our insert and the lookup twice
+        raise HTTPException(status_code=409, detail="Analysis is already starting, retry shortly")
 
     print(f"Progress record created with ID {progress.id}", flush=True)
 
-    # Start analysis in background thread
+    # Start analysis in background thread (the worker uses the sync engine)
     thread = threading.Thread(
         target=run_analysis_in_thread,
-        args=(site.id, site.url, progress.id)
+        args=(site_id, site_url, progress.id)
     )
     thread.daemon = True
     thread.start()
@@ -225,12 +408,12 @@ async def run_analysis(
 
 
 @router.get("/{site_id}/progress", response_model=ProgressResponse)
-async def get_analysis_progress(site_id: int, db: Session = Depends(get_db)):
+async def get_analysis_progress(site_id: int, db: AsyncSession = Depends(get_async_db)):
     """Get the progress of the latest analysis for a site"""
 
-    progress = db.query(AnalysisProgress).filter(
-        AnalysisProgress.site_id == site_id
-    ).order_by(AnalysisProgress.created_at.desc()).first()
+    result = await db.execute(select(Site).where(Site.id == site_id))
+    site = result.scalars().first()
+    progress = await get_latest_progress(db, site) if site else None
 
     if not progress:
         raise HTTPException(status_code=404, detail="No analysis in progress")
@@ -238,128 +421,505 @@ async def get_analysis_progress(site_id: int, db: Session = Depends(get_db)):
     return progress
 
 
+@router.delete("/jobs/{job_id}", response_model=ProgressResponse, status_code=202)
+async def cancel_analysis(job_id: int, db: AsyncSession = Depends(get_async_db)):
+    """
+    Cancel a pending or running analysis job (job ID = progress ID)
+
+    A pending job is cancelled immediately. A running job is marked
+    "cancelling" and its worker stops at the next stage boundary, within
+    a fraction of a second when it runs in this process.
+    """
+    # Conditional updates, so a worker claiming the job concurrently
+    # (pending -> running) turns the cancel into a cooperative one
+    transitions = [
+        ("pending", {
+            "status": "cancelled",
+            "current_step": "分析がキャンセルされました",
+            "completed_at": datetime.utcnow()
+        }),
+        ("running", {"status": "cancelling", "current_step": "キャンセルしています..."}),
+    ]
+    for from_status, values in transitions:
+        updated = await db.execute(
+            update(AnalysisProgress).where(
+                AnalysisProgress.id == job_id,
+                AnalysisProgress.status == from_status
+            ).values(**values)
+        )
+        if updated.rowcount:
+            break
+    await db.commit()
+
+    result = await db.execute(select(AnalysisProgress).where(AnalysisProgress.id == job_id))
+    progress = result.scalars().first()
+    if not progress:
+        raise HTTPException(status_code=404, detail="Analysis job not found")
+
+    if progress.status not in ACTIVE_STATUSES and progress.status != "cancelled":
+        raise HTTPException(status_code=409, detail=f"Analysis job is already {progress.status}")
+
+    cancel_local_job(job_id)
+    invalidate_dashboard_cache()
+
+    return progress
+
+
 @router.get("/{site_id}/latest", response_model=DetailedAnalysisResponse)
-async def get_latest_analysis(site_id: int, db: Session = Depends(get_db)):
-    """Get the latest analysis for a site"""
+async def get_latest_analysis(
+    site_id: int,
+    request: Request,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Get the latest analysis for a site
+
+    The ETag identifies the analysis, so a client holding the current result
+    gets a 304 without the JSON payload being read.
+    """
 
-    site = db.query(Site).filter(Site.id == site_id).first()
+    result = await db.execute(select(Site).where(Site.id == site_id))
+    site = result.scalars().first()
     if not site:
         raise HTTPException(status_code=404, detail="Site not found")
 
-    # Get latest analysis
-    latest_analysis = db.query(Analysis).filter(
-        Analysis.site_id == site_id
-    ).order_by(Analysis.created_at.desc()).first()
-
-    if not latest_analysis:
+    analysis_id = await get_latest_analysis_id(db, site)
+    if analysis_id is None:
         raise HTTPException(status_code=404, detail="No analysis found for this site")
 
-    # Generate recommendations based on scores
-    recommendations = generate_recommendations(latest_analysis)
-
-    return DetailedAnalysisResponse(
-        analysis=latest_analysis,
-        technical_details=latest_analysis.detailed_results.get("technical") if latest_analysis.detailed_results else None,
-        content_details=latest_analysis.detailed_results.get("content") if latest_analysis.detailed_results else None,
-        core_web_vitals={
-            "lcp": latest_analysis.largest_contentful_paint,
-            "fid": latest_analysis.first_input_delay,
-            "cls": latest_analysis.cumulative_layout_shift
-        },
-        recommendations=recommendations,
-        llm_technical_analysis=latest_analysis.llm_technical_analysis,
-        llm_content_analysis=latest_analysis.llm_content_analysis,
-        llm_ux_analysis=latest_analysis.llm_ux_analysis,
-        llm_authority_analysis=latest_analysis.llm_authority_analysis,
-        llm_action_plan=latest_analysis.llm_action_plan
+    etag = analysis_etag(analysis_id)
+    if etag_matches(request, etag):
+        return not_modified(etag, REVALIDATE_CACHE_CONTROL)
+
+    # Load the analysis including the deferred JSON payload
+    result = await db.execute(
+        select(Analysis).options(
+            undefer_group(ANALYSIS_PAYLOAD_GROUP)
+        ).where(Analysis.id == analysis_id)
+    )
+    latest_analysis = result.scalars().first()
+    await hydrate_payload(db, latest_analysis)
+
+    recommendations = await get_analysis_recommendations(db, latest_analysis)
+
+    return trusted_response(
+        build_detailed_response(latest_analysis, recommendations),
+        headers={"ETag": etag, "Cache-Control": REVALIDATE_CACHE_CONTROL}
+    )
+
+
+@router.get("/results/{analysis_id}", response_model=DetailedAnalysisResponse)
+async def get_analysis_detail(
+    analysis_id: int,
+    request: Request,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Get the full result of a single analysis
+
+    Finished analyses never change, so the response is marked immutable.
+    """
+
+    etag = analysis_etag(analysis_id)
+    if etag_matches(request, etag):
+        # Only confirm the analysis still exists; the payload is not read
+        exists = await db.scalar(select(Analysis.id).where(Analysis.id == analysis_id))
+        if exists is None:
+            raise HTTPException(status_code=404, detail="Analysis not found")
+        return not_modified(etag, IMMUTABLE_CACHE_CONTROL)
+
+    result = await db.execute(
+        select(Analysis).options(
+            undefer_group(ANALYSIS_PAYLOAD_GROUP)
+        ).where(Analysis.id == analysis_id)
+    )
+    analysis = result.scalars().first()
+
+    if not analysis:
+        raise HTTPException(status_code=404, detail="Analysis not found")
+    await hydrate_payload(db, analysis)
+
+    recommendations = await get_analysis_recommendations(db, analysis)
+
+    return trusted_response(
+        build_detailed_response(analysis, recommendations),
+        headers={"ETag": etag, "Cache-Control": IMMUTABLE_CACHE_CONTROL}
+    )
+
+
+@router.get("/results/{analysis_id}/diff", response_model=AnalysisDiffResponse)
+async def get_analysis_diff(
+    analysis_id: int,
+    base_id: int = Query(..., description="Analysis to compare against (same site)"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    What changed from analysis `base_id` to `analysis_id`
+
+    In delta storage mode the stored deltas in between are composed, so
+    neither full payload is read.
+    """
+
+    result = await db.execute(select(Analysis).where(Analysis.id.in_([analysis_id, base_id])))
+    analyses = {analysis.id: analysis for analysis in result.scalars().all()}
+    if analysis_id not in analyses or base_id not in analyses:
+        raise HTTPException(status_code=404, detail="Analysis not found")
+
+    base, target = analyses[base_id], analyses[analysis_id]
+    if base.site_id != target.site_id:
+        raise HTTPException(status_code=400, detail="Analyses belong to different sites")
+
+    return trusted_response(
+        await diff_analyses(db, base, target),
+        headers={"Cache-Control": IMMUTABLE_CACHE_CONTROL}
+    )
+
+
+@router.get("/results/{analysis_id}/snapshot", response_class=Response)
+async def get_analysis_snapshot(analysis_id: int, db: AsyncSession = Depends(get_async_db)):
+    """
+    The analyzed page's HTML as it was fetched for this analysis
+
+    Served as a plain-text download, never rendered as a page of this origin.
+    """
+    from ..services.snapshot_store import SnapshotNotFound, get_snapshot_store
+
+    digest = await db.scalar(select(Analysis.html_snapshot_hash).where(Analysis.id == analysis_id))
+    store = get_snapshot_store()
+    if digest is None or store is None:
+        raise HTTPException(status_code=404, detail="No snapshot stored for this analysis")
+
+    try:
+        html = await asyncio.to_thread(store.get, digest)
+    except SnapshotNotFound:
+        raise HTTPException(status_code=404, detail="Snapshot missing from the store")
+
+    return Response(
+        html,
+        media_type="text/plain; charset=utf-8",
+        headers={
+            "Content-Disposition": f'attachment; filename="analysis-{analysis_id}.html"',
+            "X-Content-Type-Options": "nosniff",
+            "ETag": f'"{digest}"',
+            "Cache-Control": IMMUTABLE_CACHE_CONTROL,
+        }
     )
 
 
-@router.get("/{site_id}/history", response_model=List[AnalysisResponse])
+@router.get("/{site_id}/history", response_model=List[AnalysisSummaryResponse])
 async def get_analysis_history(
     site_id: int,
-    limit: int = 10,
-    db: Session = Depends(get_db)
+    limit: int = Query(10, ge=1, le=100),
+    cursor: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Get analysis history for a site, newest first (scores only)
+
+    Pages are keyed on (created_at, id) using the (site_id, created_at) index.
+    `since` is inclusive and `until` is exclusive. When more analyses exist,
+    the cursor for the next page is returned in the X-Next-Cursor header.
+    """
+    query = select(Analysis).where(Analysis.site_id == site_id)
+
+    if since:
+        query = query.where(Analysis.created_at >= since)
+    if until:
+        query = query.where(Analysis.created_at < until)
+
+    if cursor:
+        try:
+            values = decode_cursor(cursor)
+            last_created_at = datetime.fromisoformat(values["created_at"])
+            last_id = int(values["id"])
+        except (ValueError, KeyError, TypeError):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        query = query.where(or_(
+            Analysis.created_at < last_created_at,
+            and_(Analysis.created_at == last_created_at, Analysis.id < last_id)
+        ))
+
+    # Fetch one extra row to know whether another page exists
+    result = await db.execute(
+        query.order_by(Analysis.created_at.desc(), Analysis.id.desc()).limit(limit + 1)
+    )
+    analyses = result.scalars().all()
+
+    headers = {}
+    if len(analyses) > limit:
+        analyses = analyses[:limit]
+        last = analyses[-1]
+        headers[NEXT_CURSOR_HEADER] = encode_cursor({
+            "created_at": last.created_at.isoformat(),
+            "id": last.id
+        })
+
+    return trusted_response(dump_trusted_list(AnalysisSummaryResponse, analyses), headers=headers)
+
+
+@router.get("/export", response_class=StreamingResponse)
+async def export_analyses(
+    export_format: str = Query("ndjson", alias="format", pattern="^(ndjson|csv|parquet)$"),
+    site_ids: Optional[List[int]] = Query(None, description="Sites to export (all sites when omitted)"),
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    breakdown: bool = Query(False, description="Add the score breakdown as flat columns")
 ):
-    """Get analysis history for a site"""
+    """
+    Stream analyses of a set of sites and a date range as NDJSON, CSV or Parquet
 
-    analyses = db.query(Analysis).filter(
-        Analysis.site_id == site_id
-    ).order_by(Analysis.created_at.desc()).limit(limit).all()
+    Rows are read through a server-side cursor and sent partition by
+    partition, so exports of any size run in constant memory. `since` is
+    inclusive and `until` is exclusive; rows are ordered by site and ID.
+    """
+    from ..services.analysis_export import EXPORT_FORMATS, export_chunks, export_query, make_encoder
 
-    return analyses
+    try:
+        encoder = make_encoder(export_format, breakdown)
+    except ImportError:
+        raise HTTPException(status_code=400, detail="Parquet export requires pyarrow")
+    query = export_query(site_ids, since, until, breakdown)
+
+    async def chunks():
+        # Own session: the request's session is closed before the body is sent
+        async with AsyncSessionLocal() as db:
+            async for chunk in export_chunks(db, query, encoder, breakdown, settings.EXPORT_BATCH_SIZE):
+                if chunk:
+                    yield chunk
+
+    media_type, extension = EXPORT_FORMATS[export_format]
+    return StreamingResponse(
+        chunks(),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="analyses.{extension}"'}
+    )
 
 
-def generate_recommendations(analysis: Analysis) -> List[Dict]:
-    """Generate recommendations based on analysis scores"""
-    recommendations = []
+@router.post("/{site_id}/rescore", response_model=RescoreResponse)
+async def rescore_site_history(
+    site_id: int,
+    request: RescoreRequest,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Re-score a site's stored analyses with a what-if scoring profile
 
-    # Technical recommendations
-    if analysis.technical_score < 70:
-        if not analysis.has_ssl:
-            recommendations.append({
-                "title": "Enable HTTPS/SSL",
-                "description": "Your site is not using HTTPS. This is critical for security and SEO.",
-                "priority": "high",
-                "difficulty": "moderate",
-                "expected_impact": 15,
-                "category": "technical"
-            })
+    Scores are recomputed from the stored feature vectors only (no
+    fetching); nothing is written. Without overrides the result matches
+    the stored scores.
+    """
+    from ..services.scoring import SCORE_COLUMNS, decode_feature_matrix, resolve_profile, score_features
 
-        if not analysis.has_sitemap:
-            recommendations.append({
-                "title": "Create XML Sitemap",
-                "description": "Add an XML sitemap to help search engines discover and index your pages.",
-                "priority": "high",
-                "difficulty": "easy",
-                "expected_impact": 10,
-                "category": "technical"
+    try:
+        profile = resolve_profile(request.profile)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    result = await db.execute(
+        select(
+            Analysis.id, Analysis.created_at, Analysis.feature_vector,
+            *(getattr(Analysis, column) for column in SCORE_COLUMNS.values())
+        ).where(Analysis.site_id == site_id).order_by(
+            Analysis.created_at.desc(), Analysis.id.desc()
+        ).limit(request.limit)
+    )
+    rows = result.all()
+    scored = [row for row in rows if row.feature_vector]
+
+    analyses = []
+    if scored:
+        try:
+            scores = score_features(decode_feature_matrix(row.feature_vector for row in scored), profile)
+        except (TypeError, ValueError, KeyError) as e:
+            raise HTTPException(status_code=400, detail=f"Invalid scoring profile: {e}")
+
+        for index, row in enumerate(scored):
+            analyses.append({
+                "analysis_id": row.id,
+                "created_at": row.created_at,
+                "stored": {key: getattr(row, column) for key, column in SCORE_COLUMNS.items()},
+                "rescored": {key: round(float(scores[key][index]), 1) for key in SCORE_COLUMNS},
             })
 
-    # Content recommendations
-    if analysis.content_score < 70:
-        if not analysis.meta_title or len(analysis.meta_title) < 30:
-            recommendations.append({
-                "title": "Optimize Meta Title",
-                "description": "Your meta title is missing or too short. Aim for 50-60 characters with target keywords.",
-                "priority": "high",
-                "difficulty": "easy",
-                "expected_impact": 12,
-                "category": "content"
-            })
+    return RescoreResponse(
+        site_id=site_id,
+        profile=profile,
+        analyses=analyses,
+        skipped=len(rows) - len(scored)
+    )
 
-        if analysis.h1_count != 1:
-            recommendations.append({
-                "title": "Fix H1 Tag Structure",
-                "description": f"Your page has {analysis.h1_count} H1 tags. There should be exactly one H1 per page.",
-                "priority": "medium",
-                "difficulty": "easy",
-                "expected_impact": 8,
-                "category": "content"
-            })
 
-    # UX recommendations
-    if analysis.user_experience_score < 70:
-        if not analysis.mobile_friendly:
-            recommendations.append({
-                "title": "Make Site Mobile-Friendly",
-                "description": "Add a responsive viewport meta tag and ensure mobile optimization.",
-                "priority": "high",
-                "difficulty": "moderate",
-                "expected_impact": 15,
-                "category": "user_experience"
-            })
+@router.get("/{site_id}/recommendations", response_model=List[RecommendationResponse])
+async def get_recommendations(
+    site_id: int,
+    analysis_id: Optional[int] = None,
+    priority: Optional[str] = None,
+    category: Optional[str] = None,
+    source: Optional[str] = None,
+    is_completed: Optional[bool] = None,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Get stored recommendations for a site
+
+    Defaults to the latest analysis; filter by priority, category, source
+    (rule/llm) and completion status.
+    """
+    if analysis_id is None:
+        result = await db.execute(select(Site).where(Site.id == site_id))
+        site = result.scalars().first()
+        if not site:
+            raise HTTPException(status_code=404, detail="Site not found")
+
+        analysis_id = await get_latest_analysis_id(db, site)
+        if analysis_id is None:
+            return []
+
+    query = select(Recommendation).where(
+        Recommendation.site_id == site_id,
+        Recommendation.analysis_id == analysis_id
+    )
+    if priority:
+        query = query.where(Recommendation.priority == priority)
+    if category:
+        query = query.where(Recommendation.category == category)
+    if source:
+        query = query.where(Recommendation.source == source)
+    if is_completed is not None:
+        query = query.where(Recommendation.is_completed == is_completed)
+
+    result = await db.execute(query.order_by(Recommendation.id))
+    return trusted_response(dump_trusted_list(RecommendationResponse, result.scalars().all()))
+
+
+@router.patch("/recommendations/{recommendation_id}", response_model=RecommendationResponse)
+async def update_recommendation(
+    recommendation_id: int,
+    update: RecommendationUpdate,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Mark a recommendation as completed (or reopen it)"""
+    result = await db.execute(
+        select(Recommendation).where(Recommendation.id == recommendation_id)
+    )
+    recommendation = result.scalars().first()
+    if not recommendation:
+        raise HTTPException(status_code=404, detail="Recommendation not found")
+
+    if update.is_completed != recommendation.is_completed:
+        recommendation.is_completed = update.is_completed
+        recommendation.completed_at = datetime.utcnow() if update.is_completed else None
+        await db.commit()
+        await db.refresh(recommendation)
+
+    return recommendation
+
+
+async def get_latest_progress(db: AsyncSession, site: Site) -> Optional[AnalysisProgress]:
+    """Resolve the newest progress record of a site via its pointer"""
+    if site.latest_progress_id is not None:
+        query = select(AnalysisProgress).where(AnalysisProgress.id == site.latest_progress_id)
+    else:
+        # Sites created before the pointer existed fall back to the
+        # (site_id, created_at) index
+        query = select(AnalysisProgress).where(
+            AnalysisProgress.site_id == site.id
+        ).order_by(AnalysisProgress.created_at.desc()).limit(1)
+
+    result = await db.execute(query)
+    return result.scalars().first()
+
+
+async def get_in_flight_progress(db: AsyncSession, site_id: int) -> Optional[AnalysisProgress]:
+    """The site's pending or running job, if any"""
+    result = await db.execute(
+        select(AnalysisProgress).where(
+            AnalysisProgress.site_id == site_id,
+            AnalysisProgress.status.in_(IN_FLIGHT_STATUSES)
+        ).limit(1)
+    )
+    return result.scalars().first()
+
+
+async def expire_stale_jobs(db: AsyncSession, site_id: int):
+    """
+    Fail unfinished jobs of a site that stopped updating
+
+    Workers update their progress row at every stage, so a job silent for
+    ANALYSIS_STALE_AFTER_SECONDS lost its worker (e.g. the process was
+    restarted) and must not hold the site's single-flight slot.
+    """
+    cutoff = datetime.utcnow() - timedelta(seconds=settings.ANALYSIS_STALE_AFTER_SECONDS)
+    result = await db.execute(
+        update(AnalysisProgress).where(
+            AnalysisProgress.site_id == site_id,
+            AnalysisProgress.status.in_(ACTIVE_STATUSES),
+            AnalysisProgress.updated_at < cutoff
+        ).values(
+            status="failed",
+            error_message="Analysis worker stopped responding",
+            completed_at=datetime.utcnow()
+        )
+    )
+    if result.rowcount:
+        print(f"Expired {result.rowcount} stale analysis job(s) for site {site_id}", flush=True)
+        await db.commit()
+        invalidate_dashboard_cache()
+
+
+async def get_latest_analysis_id(db: AsyncSession, site: Site) -> Optional[int]:
+    """Resolve the ID of the newest analysis of a site via its pointer"""
+    if site.latest_analysis_id is not None:
+        return site.latest_analysis_id
+
+    # Sites created before the pointer existed fall back to the
+    # (site_id, created_at) index
+    return await db.scalar(
+        select(Analysis.id).where(
+            Analysis.site_id == site.id
+        ).order_by(Analysis.created_at.desc()).limit(1)
+    )
 
-    # PageSpeed recommendations
-    if analysis.pagespeed_mobile_score and analysis.pagespeed_mobile_score < 50:
-        if analysis.largest_contentful_paint and analysis.largest_contentful_paint > 2.5:
-            recommendations.append({
-                "title": "Improve Largest Contentful Paint (LCP)",
-                "description": f"Your LCP is {analysis.largest_contentful_paint:.2f}s. Target is under 2.5s. Optimize images and server response time.",
-                "priority": "high",
-                "difficulty": "moderate",
-                "expected_impact": 10,
-                "category": "user_experience"
-            })
 
-    return recommendations
+async def get_analysis_recommendations(db: AsyncSession, analysis: Analysis) -> List[Dict]:
+    """Load the stored recommendations of an analysis"""
+    result = await db.execute(
+        select(Recommendation).where(
+            Recommendation.analysis_id == analysis.id
+        ).order_by(Recommendation.id)
+    )
+    stored = result.scalars().all()
+    if stored:
+        return [recommendation_to_dict(rec) for rec in stored]
+
+    # Analyses completed before recommendations were persisted
+    return generate_recommendations(analysis)
+
+
+def build_detailed_response(analysis: Analysis, recommendations: List[Dict]) -> Dict:
+    """
+    Build the DetailedAnalysisResponse body for an analysis loaded with its
+    payload group
+
+    The JSON columns are passed through as stored rather than re-validated.
+    """
+
+    return {
+        "analysis": dump_trusted(AnalysisResponse, analysis),
+        "technical_details": analysis.detailed_results.get("technical") if analysis.detailed_results else None,
+        "content_details": analysis.detailed_results.get("content") if analysis.detailed_results else None,
+        "core_web_vitals": {
+            "lcp": analysis.largest_contentful_paint,
+            "fid": analysis.first_input_delay,
+            "cls": analysis.cumulative_layout_shift
+        },
+        "recommendations": recommendations,
+        "llm_technical_analysis": analysis.llm_technical_analysis,
+        "llm_content_analysis": analysis.llm_content_analysis,
+        "llm_ux_analysis": analysis.llm_ux_analysis,
+        "llm_authority_analysis": analysis.llm_authority_analysis,
+        "llm_action_plan": analysis.llm_action_plan,
+        "timed_out_stages": (analysis.detailed_results or {}).get("timed_out_stages") or []
+    }
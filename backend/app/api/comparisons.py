@@ -0,0 +1,168 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import undefer_group
+from typing import Dict, List, Optional
+from pydantic import BaseModel, HttpUrl, field_validator
+from datetime import datetime
+import threading
+
+from ..core.config import settings
+from ..core.database import get_async_db
+from ..core.responses import ORJSONResponse
+from ..models.site import Site, Comparison, COMPARISON_PAYLOAD_GROUP
+from .analysis import get_seo_analyzer
+
+router = APIRouter(default_response_class=ORJSONResponse)
+
+
+# Pydantic schemas
+class ComparisonCreate(BaseModel):
+    competitor_urls: List[HttpUrl]
+    include_llm_summary: bool = False
+
+    @field_validator("competitor_urls")
+    @classmethod
+    def check_competitor_count(cls, urls: List[HttpUrl]) -> List[HttpUrl]:
+        if not 1 <= len(urls) <= settings.COMPARISON_MAX_COMPETITORS:
+            raise ValueError(f"Give between 1 and {settings.COMPARISON_MAX_COMPETITORS} competitor URLs")
+        return urls
+
+
+class ComparisonSummaryResponse(BaseModel):
+    id: int
+    site_id: int
+    status: str
+    competitor_urls: List[str]
+    include_llm_summary: bool
+    error_message: Optional[str] = None
+    created_at: datetime
+    completed_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+
+class ComparisonResponse(ComparisonSummaryResponse):
+    # targets / categories / checks / gaps, see comparison_service.build_side_by_side
+    results: Optional[Dict] = None
+    llm_summary: Optional[Dict] = None
+
+
+def run_comparison_in_thread(comparison_id: int, site_url: str):
+    """Run a comparison in a background thread with its own sync session"""
+    from ..core.database import SessionLocal
+    from ..services.comparison_service import run_comparison
+
+    db = SessionLocal()
+    try:
+        comparison = db.query(Comparison).filter(Comparison.id == comparison_id).first()
+        if not comparison:
+            print(f"ERROR: Comparison {comparison_id} not found!", flush=True)
+            return
+
+        comparison.status = "running"
+        db.commit()
+
+        analyzer = get_seo_analyzer()
+        results = run_comparison(analyzer, site_url, list(comparison.competitor_urls))
+
+        if results["targets"][0]["error"]:
+            comparison.status = "failed"
+            comparison.error_message = results["targets"][0]["error"]
+            comparison.results = results
+            comparison.completed_at = datetime.utcnow()
+            db.commit()
+            return
+
+        # One LLM call over the finished comparison, never per competitor
+        if comparison.include_llm_summary and analyzer.use_llm and analyzer.llm_analyzer:
+            comparison.llm_summary = analyzer.llm_analyzer.summarize_competitor_gaps(
+                site_url, results, timeout=settings.ANALYSIS_LLM_TIMEOUT_SECONDS
+            )
+
+        comparison.results = results
+        comparison.status = "completed"
+        comparison.completed_at = datetime.utcnow()
+        db.commit()
+
+    except Exception as e:
+        print(f"Comparison error: {str(e)}", flush=True)
+        import traceback
+        traceback.print_exc()
+
+        db.rollback()
+        comparison = db.query(Comparison).filter(Comparison.id == comparison_id).first()
+        if comparison:
+            comparison.status = "failed"
+            comparison.error_message = str(e)
+            comparison.completed_at = datetime.utcnow()
+            db.commit()
+    finally:
+        db.close()
+
+
+@router.post("/{site_id}", response_model=ComparisonSummaryResponse, status_code=202)
+async def create_comparison(
+    site_id: int,
+    request: ComparisonCreate,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Compare a site with competitor URLs (runs in background)
+
+    Every page is fetched and scored concurrently with the rule-based
+    scorers only; include_llm_summary adds one LLM summary of the gaps.
+    """
+    result = await db.execute(select(Site).where(Site.id == site_id))
+    site = result.scalars().first()
+    if not site:
+        raise HTTPException(status_code=404, detail="Site not found")
+
+    comparison = Comparison(
+        site_id=site.id,
+        competitor_urls=[str(url) for url in request.competitor_urls],
+        include_llm_summary=request.include_llm_summary,
+        status="pending"
+    )
+    db.add(comparison)
+    await db.commit()
+    await db.refresh(comparison)
+
+    thread = threading.Thread(
+        target=run_comparison_in_thread,
+        args=(comparison.id, site.url)
+    )
+    thread.daemon = True
+    thread.start()
+
+    return comparison
+
+
+@router.get("/site/{site_id}", response_model=List[ComparisonSummaryResponse])
+async def get_site_comparisons(
+    site_id: int,
+    limit: int = Query(10, ge=1, le=100),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Comparisons of a site, newest first (without results)"""
+    result = await db.execute(
+        select(Comparison).where(
+            Comparison.site_id == site_id
+        ).order_by(Comparison.created_at.desc()).limit(limit)
+    )
+    return result.scalars().all()
+
+
+@router.get("/{comparison_id}", response_model=ComparisonResponse)
+async def get_comparison(comparison_id: int, db: AsyncSession = Depends(get_async_db)):
+    """Status and side-by-side results of a comparison"""
+    result = await db.execute(
+        select(Comparison).options(
+            undefer_group(COMPARISON_PAYLOAD_GROUP)
+        ).where(Comparison.id == comparison_id)
+    )
+    comparison = result.scalars().first()
+    if not comparison:
+        raise HTTPException(status_code=404, detail="Comparison not found")
+    return comparison
@@ -0,0 +1,71 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Dict, List, Optional
+from pydantic import BaseModel
+from datetime import datetime
+
+from ..core.database import get_async_db
+from ..services.dashboard_service import get_dashboard_summary
+
+router = APIRouter()
+
+
+# Pydantic schemas
+class HistogramBucket(BaseModel):
+    min_score: int
+    max_score: int
+    count: int
+
+
+class SiteMover(BaseModel):
+    site_id: int
+    name: Optional[str] = None
+    domain: str
+    latest_score: float
+    previous_score: float
+    change: float
+
+
+class StaleSite(BaseModel):
+    site_id: int
+    name: Optional[str] = None
+    domain: str
+    last_analyzed_at: Optional[datetime] = None
+
+
+class FailingJob(BaseModel):
+    progress_id: int
+    site_id: int
+    name: Optional[str] = None
+    domain: str
+    error_message: Optional[str] = None
+    failed_at: Optional[datetime] = None
+
+
+class DashboardSummaryResponse(BaseModel):
+    generated_at: datetime
+    site_count: int
+    analyzed_count: int
+    stale_count: int
+    average_score: Optional[float] = None
+    score_histogram: List[HistogramBucket]
+    category_averages: Dict[str, Optional[float]]
+    biggest_movers: List[SiteMover]
+    stale_sites: List[StaleSite]
+    failing_jobs: List[FailingJob]
+
+
+@router.get("/summary", response_model=DashboardSummaryResponse)
+async def get_summary(
+    stale_days: int = Query(30, ge=1, le=365),
+    limit: int = Query(10, ge=1, le=100),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Portfolio summary: score histogram, category averages, biggest movers,
+    stale sites and failing jobs
+
+    Computed with a handful of aggregate queries and cached briefly; the
+    cache is dropped whenever an analysis finishes.
+    """
+    return await get_dashboard_summary(db, stale_days=stale_days, list_limit=limit)
@@ -0,0 +1,209 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy import and_, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+from pydantic import BaseModel
+from datetime import date, datetime, timedelta
+import threading
+
+from ..core.config import settings
+from ..core.database import get_async_db
+from ..core.pagination import encode_cursor, decode_cursor, NEXT_CURSOR_HEADER
+from ..models.site import Site, Keyword
+from ..services.keyword_sync import build_trend_query
+
+router = APIRouter()
+
+# Sites with a sync running in this process
+_syncing_sites = set()
+_syncing_lock = threading.Lock()
+
+
+# Pydantic schemas
+class KeywordResponse(BaseModel):
+    id: int
+    site_id: int
+    keyword: str
+    clicks: int
+    impressions: int
+    ctr: float
+    position: Optional[float] = None
+    previous_position: Optional[float] = None
+    position_change: Optional[float] = None
+    updated_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class TrendPoint(BaseModel):
+    date: date
+    clicks: int
+    impressions: int
+    ctr: float
+    position: Optional[float] = None
+    # Resolution of the stored data behind the point (day, week or month);
+    # coarser than the interval for periods past retention
+    granularity: str
+
+
+class KeywordSeries(BaseModel):
+    keyword_id: int
+    keyword: str
+    points: List[TrendPoint]
+
+
+class KeywordTrendResponse(BaseModel):
+    site_id: int
+    interval: str
+    start_date: date
+    end_date: date
+    series: List[KeywordSeries]
+
+
+# Trend intervals and their time series granularity codes
+TREND_INTERVALS = {"day": "d", "week": "w", "month": "m"}
+TREND_GRANULARITIES = {code: interval for interval, code in TREND_INTERVALS.items()}
+
+
+def run_keyword_sync_in_thread(site_id: int):
+    """Run a Search Console keyword sync in a separate thread"""
+    from ..core.database import SessionLocal
+    from ..services.gsc_service import GoogleSearchConsoleService
+    from ..services.keyword_sync import KeywordSyncService
+
+    db = SessionLocal()
+    try:
+        site = db.query(Site).filter(Site.id == site_id).first()
+        if not site:
+            return
+
+        sync_service = KeywordSyncService(GoogleSearchConsoleService(settings.GSC_CREDENTIALS_JSON))
+        result = sync_service.sync_site(db, site)
+        print(f"Keyword sync for site {site_id}: {result}", flush=True)
+
+    except Exception as e:
+        db.rollback()
+        print(f"Keyword sync error for site {site_id}: {str(e)}", flush=True)
+    finally:
+        db.close()
+        with _syncing_lock:
+            _syncing_sites.discard(site_id)
+
+
+@router.post("/{site_id}/sync", status_code=202)
+async def sync_keywords(site_id: int, db: AsyncSession = Depends(get_async_db)):
+    """Import Search Console data since the last sync (runs in background)"""
+    result = await db.execute(select(Site).where(Site.id == site_id))
+    site = result.scalars().first()
+    if not site:
+        raise HTTPException(status_code=404, detail="Site not found")
+
+    if not site.gsc_property_url:
+        raise HTTPException(status_code=400, detail="Site is not connected to Search Console")
+
+    if not settings.GSC_CREDENTIALS_JSON:
+        raise HTTPException(status_code=400, detail="Search Console credentials are not configured")
+
+    with _syncing_lock:
+        if site_id in _syncing_sites:
+            return {"message": "Keyword sync already running", "site_id": site_id}
+        _syncing_sites.add(site_id)
+
+    thread = threading.Thread(target=run_keyword_sync_in_thread, args=(site_id,))
+    thread.daemon = True
+    thread.start()
+
+    return {"message": "Keyword sync started", "site_id": site_id}
+
+
+@router.get("/{site_id}", response_model=List[KeywordResponse])
+async def get_keywords(
+    site_id: int,
+    response: Response,
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Get keywords for a site, ordered by clicks (highest first)
+
+    When more keywords exist, the cursor for the next page is returned in
+    the X-Next-Cursor header.
+    """
+    query = select(Keyword).where(Keyword.site_id == site_id)
+
+    if cursor:
+        try:
+            values = decode_cursor(cursor)
+            last_clicks = int(values["clicks"])
+            last_id = int(values["id"])
+        except (ValueError, KeyError, TypeError):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        query = query.where(or_(
+            Keyword.clicks < last_clicks,
+            and_(Keyword.clicks == last_clicks, Keyword.id < last_id)
+        ))
+
+    result = await db.execute(
+        query.order_by(Keyword.clicks.desc(), Keyword.id.desc()).limit(limit + 1)
+    )
+    keywords = result.scalars().all()
+
+    if len(keywords) > limit:
+        keywords = keywords[:limit]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor({
+            "clicks": keywords[-1].clicks,
+            "id": keywords[-1].id
+        })
+
+    return keywords
+
+
+@router.get("/{site_id}/trend", response_model=KeywordTrendResponse)
+async def get_keyword_trend(
+    site_id: int,
+    interval: str = Query("week", pattern="^(day|week|month)$"),
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    keyword_ids: Optional[List[int]] = Query(None),
+    top: int = Query(100, ge=1, le=5000),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Get downsampled position/click series for many keywords in one query
+
+    Defaults to the site's `top` keywords by clicks over the last 90 days.
+    Periods older than the daily retention are only available at week or
+    month resolution; their points cover the whole week or month and say
+    so in "granularity".
+    """
+    end_date = end_date or date.today()
+    start_date = start_date or end_date - timedelta(days=90)
+
+    query = build_trend_query(
+        db.get_bind().dialect.name, site_id, TREND_INTERVALS[interval],
+        start_date, end_date, keyword_ids=keyword_ids, top=top
+    )
+    result = await db.execute(query)
+
+    series = []
+    for row in result:
+        if not series or series[-1].keyword_id != row.keyword_id:
+            series.append(KeywordSeries(keyword_id=row.keyword_id, keyword=row.keyword, points=[]))
+        series[-1].points.append(TrendPoint(
+            date=row.period,
+            clicks=row.clicks or 0,
+            impressions=row.impressions or 0,
+            ctr=round(row.ctr or 0, 2),
+            position=round(row.position, 1) if row.position is not None else None,
+            granularity=TREND_GRANULARITIES[row.source_granularity]
+        ))
+
+    return KeywordTrendResponse(
+        site_id=site_id,
+        interval=interval,
+        start_date=start_date,
+        end_date=end_date,
+        series=series
+    )
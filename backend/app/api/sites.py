@@ -1,13 +1,17 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import delete, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 from pydantic import BaseModel, HttpUrl
 from datetime import datetime
 
-from ..core.database import get_db
-from ..models.site import Site
+from ..core.database import get_async_db
+from ..core.pagination import encode_cursor, decode_cursor, NEXT_CURSOR_HEADER
+from ..core.responses import ORJSONResponse, dump_trusted, dump_trusted_list, trusted_response
+from ..models.site import Site, Analysis, AnalysisProgress, Comparison, KeywordMetric, Recommendation
+from ..services.dashboard_service import invalidate_dashboard_cache
 
-router = APIRouter()
+router = APIRouter(default_response_class=ORJSONResponse)
 
 
 # Pydantic schemas
@@ -31,11 +35,12 @@ class SiteResponse(BaseModel):
 
 
 @router.post("/", response_model=SiteResponse)
-async def create_site(site: SiteCreate, db: Session = Depends(get_db)):
+async def create_site(site: SiteCreate, db: AsyncSession = Depends(get_async_db)):
     """Register a new site for SEO analysis"""
 
     # Check if site already exists
-    existing_site = db.query(Site).filter(Site.domain == site.domain).first()
+    result = await db.execute(select(Site).where(Site.domain == site.domain))
+    existing_site = result.scalars().first()
     if existing_site:
         raise HTTPException(status_code=400, detail="Site already registered")
 
@@ -47,36 +52,76 @@ async def create_site(site: SiteCreate, db: Session = Depends(get_db)):
     )
 
     db.add(new_site)
-    db.commit()
-    db.refresh(new_site)
+    await db.commit()
+    await db.refresh(new_site)
+    invalidate_dashboard_cache()
 
     return new_site
 
 
 @router.get("/", response_model=List[SiteResponse])
-async def get_sites(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    """Get all registered sites"""
-    sites = db.query(Site).offset(skip).limit(limit).all()
-    return sites
+async def get_sites(
+    limit: int = Query(100, ge=1, le=500),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Get registered sites, ordered by ID
+
+    Pages are keyed on the primary key. When more sites exist, the cursor for
+    the next page is returned in the X-Next-Cursor response header.
+    """
+    query = select(Site)
+
+    if cursor:
+        try:
+            last_id = int(decode_cursor(cursor)["id"])
+        except (ValueError, KeyError, TypeError):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        query = query.where(Site.id > last_id)
+
+    # Fetch one extra row to know whether another page exists
+    result = await db.execute(query.order_by(Site.id.asc()).limit(limit + 1))
+    sites = result.scalars().all()
+
+    headers = {}
+    if len(sites) > limit:
+        sites = sites[:limit]
+        headers[NEXT_CURSOR_HEADER] = encode_cursor({"id": sites[-1].id})
+
+    return trusted_response(dump_trusted_list(SiteResponse, sites), headers=headers)
 
 
 @router.get("/{site_id}", response_model=SiteResponse)
-async def get_site(site_id: int, db: Session = Depends(get_db)):
+async def get_site(site_id: int, db: AsyncSession = Depends(get_async_db)):
     """Get a specific site by ID"""
-    site = db.query(Site).filter(Site.id == site_id).first()
+    result = await db.execute(select(Site).where(Site.id == site_id))
+    site = result.scalars().first()
     if not site:
         raise HTTPException(status_code=404, detail="Site not found")
-    return site
+    return trusted_response(dump_trusted(SiteResponse, site))
 
 
 @router.delete("/{site_id}")
-async def delete_site(site_id: int, db: Session = Depends(get_db)):
+async def delete_site(site_id: int, db: AsyncSession = Depends(get_async_db)):
     """Delete a site"""
-    site = db.query(Site).filter(Site.id == site_id).first()
+    result = await db.execute(select(Site).where(Site.id == site_id))
+    site = result.scalars().first()
     if not site:
         raise HTTPException(status_code=404, detail="Site not found")
 
-    db.delete(site)
-    db.commit()
+    # Rows that reference the site (or its analyses) without an ORM
+    # relationship are removed in bulk, before the cascade deletes analyses
+    for model in (Recommendation, AnalysisProgress, Comparison, KeywordMetric):
+        await db.execute(delete(model).where(model.site_id == site_id))
+    # Tables created before payload_base_id lost its foreign key still have
+    # it, and the cascade may delete a delta's base before the delta
+    await db.execute(
+        update(Analysis).where(Analysis.site_id == site_id, Analysis.payload_base_id.is_not(None))
+        .values(payload_base_id=None)
+    )
+    await db.delete(site)
+    await db.commit()
+    invalidate_dashboard_cache()
 
     return {"message": "Site deleted successfully"}
@@ -13,17 +13,114 @@ class Settings(BaseSettings):
 
     # Database
     DATABASE_URL: str = "sqlite:///./seo_analyzer.db"
+    AUTO_CREATE_TABLES: bool = True  # Create missing tables on startup (not on import)
+
+    # SQLite tuning (applied as PRAGMAs on every new connection)
+    DB_SQLITE_JOURNAL_MODE: str = "WAL"
+    DB_SQLITE_SYNCHRONOUS: str = "NORMAL"
+    DB_SQLITE_BUSY_TIMEOUT_MS: int = 5000
+
+    # Connection pool (server databases such as PostgreSQL)
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT: int = 30
+    DB_POOL_RECYCLE: int = 1800  # seconds, -1 disables recycling
+    DB_POOL_PRE_PING: bool = True
 
     # API Keys
     GOOGLE_API_KEY: str = ""
     PAGESPEED_API_KEY: str = ""
     GEMINI_API_KEY: str = ""  # Google Gemini API for LLM analysis
 
+    # API endpoints (overridable to point at local stand-ins, e.g. the load test)
+    PAGESPEED_API_URL: str = "https://www.googleapis.com/pagespeedonline/v5/runPagespeed"
+    GEMINI_API_ENDPOINT: str = ""  # Empty uses the SDK default (gRPC); set for a REST endpoint
+
     # Google OAuth
     GOOGLE_CLIENT_ID: str = ""
     GOOGLE_CLIENT_SECRET: str = ""
     GOOGLE_REDIRECT_URI: str = "http://localhost:8000/auth/google/callback"
 
+    # Dashboard
+    DASHBOARD_CACHE_TTL_SECONDS: int = 30
+
+    # Analysis jobs: overall deadline and per-stage budgets (seconds)
+    ANALYSIS_JOB_TIMEOUT_SECONDS: int = 600
+    ANALYSIS_FETCH_TIMEOUT_SECONDS: int = 20
+    ANALYSIS_PROBE_TIMEOUT_SECONDS: int = 10
+    ANALYSIS_LLM_TIMEOUT_SECONDS: int = 120  # Each Gemini call
+    ANALYSIS_PAGESPEED_TIMEOUT_SECONDS: int = 90
+    ANALYSIS_CRAWL_TIMEOUT_SECONDS: int = 60
+    ANALYSIS_LINK_CHECK_TIMEOUT_SECONDS: int = 30
+    ANALYSIS_RESOURCE_AUDIT_TIMEOUT_SECONDS: int = 30
+    # An unfinished job not updated for this long is treated as abandoned
+    # (its worker process died); keep it above ANALYSIS_JOB_TIMEOUT_SECONDS
+    ANALYSIS_STALE_AFTER_SECONDS: int = 900
+
+    # Analysis history storage: "full" stores every payload, "delta" stores
+    # a full keyframe every ANALYSIS_KEYFRAME_INTERVAL analyses and deltas
+    # against the previous analysis in between
+    ANALYSIS_STORAGE_MODE: str = "full"
+    ANALYSIS_KEYFRAME_INTERVAL: int = 10
+
+    # Site crawl for the internal link graph (0 pages = no crawl, the
+    # internal link check then counts the analyzed page's anchors)
+    CRAWL_MAX_PAGES: int = 0
+    CRAWL_WORKERS: int = 8
+    # Estimated Jaccard similarity of main-text shingles at which crawled
+    # pages count as near-duplicates
+    DUPLICATE_SIMILARITY_THRESHOLD: float = 0.8
+
+    # Probe requests (link checks, resource sizes): concurrent requests per
+    # host and requests per second, for the whole process
+    PROBE_PER_HOST: int = 4
+    PROBE_RATE_PER_SECOND: float = 20.0
+
+    # Link checks of the analyzed page (0 links = no checks); results are
+    # cached across pages and analyses
+    LINK_CHECK_MAX_LINKS: int = 200
+    LINK_CHECK_WORKERS: int = 16
+    LINK_CHECK_CACHE_TTL_SECONDS: int = 3600
+    LINK_CHECK_CACHE_SIZE: int = 20000
+
+    # Subresource size probes of the analyzed page (0 resources = no audit,
+    # the UX score then counts script tags); sizes are cached per URL
+    RESOURCE_AUDIT_MAX_RESOURCES: int = 300
+    RESOURCE_AUDIT_WORKERS: int = 16
+    RESOURCE_AUDIT_CACHE_TTL_SECONDS: int = 86400
+    RESOURCE_AUDIT_CACHE_SIZE: int = 50000
+
+    # Analysis exports: rows per server-side cursor partition (and per
+    # Parquet row group)
+    EXPORT_BATCH_SIZE: int = 2000
+
+    # Content-addressed store of fetched page HTML (zstd-compressed, one
+    # file per distinct page); empty = no snapshots
+    SNAPSHOT_STORE_DIR: str = "./snapshots"
+    SNAPSHOT_COMPRESSION_LEVEL: int = 10
+
+    # Worker processes for parsing fetched pages and extracting their
+    # signals, so concurrent analyses use more than one core (0 = parse
+    # in the analysis threads)
+    PARSE_POOL_WORKERS: int = 0
+
+    # Competitor comparison: URLs per request and concurrent fetches
+    COMPARISON_MAX_COMPETITORS: int = 10
+    COMPARISON_MAX_WORKERS: int = 8
+
+    # Response compression (brotli preferred when installed, else gzip)
+    COMPRESSION_MINIMUM_SIZE: int = 1024
+    COMPRESSION_GZIP_LEVEL: int = 6
+    COMPRESSION_BROTLI_QUALITY: int = 5
+
+    # Google Search Console keyword sync
+    GSC_CREDENTIALS_JSON: str = ""  # Authorized user info JSON
+    GSC_INITIAL_SYNC_DAYS: int = 30  # Days fetched on the first sync of a site
+    GSC_DATA_DELAY_DAYS: int = 2  # GSC data for the most recent days is incomplete
+    GSC_SYNC_BATCH_SIZE: int = 1000  # Rows per upsert statement
+    KEYWORD_DAILY_RETENTION_DAYS: int = 90  # Older daily metrics are rolled up to weeks
+    KEYWORD_WEEKLY_RETENTION_DAYS: int = 730  # Older weekly metrics are rolled up to months
+
     # Security
     SECRET_KEY: str = "your-secret-key-change-in-production"
     ALGORITHM: str = "HS256"
@@ -1,21 +1,109 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from typing import Dict
 from .config import settings
 
-# Create database engine
-engine = create_engine(
-    settings.DATABASE_URL,
-    connect_args={"check_same_thread": False} if "sqlite" in settings.DATABASE_URL else {}
+is_sqlite = settings.DATABASE_URL.startswith("sqlite")
+
+
+# Async drivers used by the API layer for each sync dialect
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+}
+
+
+def _async_database_url(url: str) -> str:
+    """Map DATABASE_URL onto the matching async driver"""
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No async driver configured for database backend '{backend}'")
+    return parsed.set(drivername=ASYNC_DRIVERS[backend]).render_as_string(hide_password=False)
+
+
+def _engine_options(is_async: bool = False) -> Dict:
+    """Build create_engine keyword arguments from settings"""
+    if is_sqlite:
+        return {} if is_async else {"connect_args": {"check_same_thread": False}}
+
+    return {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+
+
+# Create database engines: the sync engine serves the background analysis
+# worker, the async engine serves the API routes
+engine = create_engine(settings.DATABASE_URL, **_engine_options())
+async_engine = create_async_engine(
+    _async_database_url(settings.DATABASE_URL), **_engine_options(is_async=True)
 )
 
-# Create session factory
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    """
+    WAL lets readers (progress polling) run while the analysis worker
+    writes; busy_timeout makes writers wait instead of failing at once
+    """
+    cursor = dbapi_connection.cursor()
+    cursor.execute(f"PRAGMA journal_mode={settings.DB_SQLITE_JOURNAL_MODE}")
+    cursor.execute(f"PRAGMA synchronous={settings.DB_SQLITE_SYNCHRONOUS}")
+    cursor.execute(f"PRAGMA busy_timeout={int(settings.DB_SQLITE_BUSY_TIMEOUT_MS)}")
+    cursor.close()
+
+
+if is_sqlite:
+    event.listen(engine, "connect", _set_sqlite_pragmas)
+    event.listen(async_engine.sync_engine, "connect", _set_sqlite_pragmas)
+
+
+# Create session factories
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+AsyncSessionLocal = async_sessionmaker(
+    async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+)
 
 # Create base class for models
 Base = declarative_base()
 
 
+def init_db():
+    """Create missing tables and indexes (at app startup or via scripts/init_db.py)"""
+    from ..models import site  # noqa: F401  (registers the models on Base)
+    Base.metadata.create_all(bind=engine)
+
+    # create_all skips indexes of tables that already exist
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            try:
+                index.create(bind=engine, checkfirst=True)
+            except SQLAlchemyError as e:
+                print(f"Could not create index {index.name}: {e}", flush=True)
+
+    # create_all does not change tables that already exist either
+    if is_sqlite:
+        with engine.connect() as connection:
+            for table in Base.metadata.sorted_tables:
+                if not table.dialect_options["sqlite"]["autoincrement"]:
+                    continue
+                sql = connection.execute(
+                    text("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = :name"), {"name": table.name}
+                ).scalar()
+                if sql and "AUTOINCREMENT" not in sql.upper():
+                    print(
+                        f"Table {table.name} was created without AUTOINCREMENT; IDs of deleted rows "
+                        f"may be reused until it is re-created", flush=True
+                    )
+
+
 def get_db():
     """Dependency to get database session"""
     db = SessionLocal()
@@ -23,3 +111,49 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    """Dependency to get an async database session for API routes"""
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+def _pool_counters(pool) -> Dict:
+    """Read the live counters of a connection pool"""
+    counters = {
+        "pool_class": type(pool).__name__,
+        "status": pool.status(),
+    }
+
+    # QueuePool exposes live counters; other pool classes do not
+    for name in ("size", "checkedin", "checkedout", "overflow"):
+        counter = getattr(pool, name, None)
+        if callable(counter):
+            counters[name] = counter()
+
+    return counters
+
+
+def get_pool_status() -> Dict:
+    """Report connection pool statistics for diagnostics"""
+    status = {
+        "dialect": engine.dialect.name,
+        "sync_pool": _pool_counters(engine.pool),
+        "async_driver": async_engine.dialect.driver,
+        "async_pool": _pool_counters(async_engine.pool),
+    }
+
+    if is_sqlite:
+        status["sqlite"] = {
+            "journal_mode": settings.DB_SQLITE_JOURNAL_MODE,
+            "synchronous": settings.DB_SQLITE_SYNCHRONOUS,
+            "busy_timeout_ms": settings.DB_SQLITE_BUSY_TIMEOUT_MS,
+        }
+    else:
+        status["max_overflow"] = settings.DB_MAX_OVERFLOW
+        status["pool_timeout"] = settings.DB_POOL_TIMEOUT
+        status["pool_recycle"] = settings.DB_POOL_RECYCLE
+        status["pool_pre_ping"] = settings.DB_POOL_PRE_PING
+
+    return status
@@ -0,0 +1,37 @@
+"""
+HTTP caching helpers (ETag / Cache-Control / conditional requests)
+"""
+
+from fastapi import Request, Response
+
+# A finished analysis never changes, so its detail view can be cached forever
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+# "Latest" views change when a new analysis completes; clients must revalidate
+REVALIDATE_CACHE_CONTROL = "private, no-cache"
+
+
+def analysis_etag(analysis_id: int) -> str:
+    """Strong ETag for an analysis result, derived from its ID"""
+    return f'"analysis-{analysis_id}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Check the If-None-Match header against an ETag (weak comparison, RFC 9110)"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+
+    if header.strip() == "*":
+        return True
+
+    candidates = (tag.strip() for tag in header.split(","))
+    return any(tag.removeprefix("W/") == etag for tag in candidates)
+
+
+def not_modified(etag: str, cache_control: str) -> Response:
+    """Build an empty 304 response carrying the validators"""
+    return Response(
+        status_code=304,
+        headers={"ETag": etag, "Cache-Control": cache_control}
+    )
@@ -0,0 +1,35 @@
+"""
+Keyset (cursor) pagination helpers
+Cursors are opaque URL-safe tokens that encode the sort key of the last row
+"""
+
+import base64
+import json
+from typing import Dict
+
+# Response header carrying the cursor for the next page
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(values: Dict) -> str:
+    """Encode the sort key of the last returned row into an opaque cursor"""
+    raw = json.dumps(values, separators=(",", ":"), default=str).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Dict:
+    """
+    Decode a cursor produced by encode_cursor
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+    if not isinstance(values, dict):
+        raise ValueError("Invalid cursor")
+    return values
@@ -0,0 +1,58 @@
+"""
+Fast JSON responses
+orjson-based response class and a trusted-output path that serializes ORM
+rows without running Pydantic validation a second time
+"""
+
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Type
+
+import orjson
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+
+class ORJSONResponse(JSONResponse):
+    """JSON response rendered with orjson (datetimes as ISO 8601)"""
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+
+
+@lru_cache(maxsize=None)
+def _schema_fields(schema: Type[BaseModel]) -> Tuple[Tuple[str, Any], ...]:
+    """(name, default) pairs of a schema's fields, computed once per schema"""
+    return tuple(
+        (name, None if field.is_required() else field.get_default(call_default_factory=True))
+        for name, field in schema.model_fields.items()
+    )
+
+
+def dump_trusted(schema: Type[BaseModel], obj: Any) -> Dict:
+    """
+    Copy a schema's fields from an ORM object without validation
+
+    Only for rows read straight from our own tables, whose column types
+    already match the schema. Deferred columns must be loaded beforehand.
+    """
+    return {name: getattr(obj, name, default) for name, default in _schema_fields(schema)}
+
+
+def dump_trusted_list(schema: Type[BaseModel], objs: Iterable[Any]) -> List[Dict]:
+    """dump_trusted over a list of ORM objects"""
+    fields = _schema_fields(schema)
+    return [{name: getattr(obj, name, default) for name, default in fields} for obj in objs]
+
+
+def trusted_response(
+    content: Any,
+    status_code: int = 200,
+    headers: Optional[Dict[str, str]] = None
+) -> ORJSONResponse:
+    """
+    Return already-shaped data as-is
+
+    FastAPI passes Response objects through untouched, so the route's
+    response_model is used for the OpenAPI schema only.
+    """
+    return ORJSONResponse(content, status_code=status_code, headers=headers)
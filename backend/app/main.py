@@ -1,22 +1,33 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from .core.config import settings
-from .core.database import engine, Base
-from .api import sites, analysis
+from .core.compression import CompressionMiddleware
+from .core.database import init_db, get_pool_status
+from .api import sites, analysis, keywords, dashboard, comparisons
 import os
 
 # Suppress gRPC ALTS warnings (harmless when not running on GCP)
 os.environ.setdefault('GRPC_VERBOSITY', 'ERROR')
 os.environ.setdefault('GLOG_minloglevel', '2')
 
-# Create database tables
-Base.metadata.create_all(bind=engine)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Create database tables at startup instead of on import; stop the parse pool at shutdown"""
+    if settings.AUTO_CREATE_TABLES:
+        init_db()
+    yield
+    from .services.parse_pool import shutdown_parse_pool
+    shutdown_parse_pool()
+
 
 # Initialize FastAPI app
 app = FastAPI(
     title=settings.APP_NAME,
     version=settings.APP_VERSION,
-    description="SEO Analysis Tool - Comprehensive website SEO analyzer with scoring and recommendations"
+    description="SEO Analysis Tool - Comprehensive website SEO analyzer with scoring and recommendations",
+    lifespan=lifespan
 )
 
 # Configure CORS
@@ -54,9 +65,20 @@ app.add_middleware(
     max_age=3600,  # Cache preflight requests for 1 hour
 )
 
+# Compress large JSON bodies (analysis payloads are mostly Japanese text)
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=settings.COMPRESSION_MINIMUM_SIZE,
+    gzip_level=settings.COMPRESSION_GZIP_LEVEL,
+    brotli_quality=settings.COMPRESSION_BROTLI_QUALITY,
+)
+
 # Include routers
 app.include_router(sites.router, prefix="/api/v1/sites", tags=["Sites"])
 app.include_router(analysis.router, prefix="/api/v1/analysis", tags=["Analysis"])
+app.include_router(keywords.router, prefix="/api/v1/keywords", tags=["Keywords"])
+app.include_router(dashboard.router, prefix="/api/v1/dashboard", tags=["Dashboard"])
+app.include_router(comparisons.router, prefix="/api/v1/comparisons", tags=["Comparisons"])
 
 
 @app.get("/")
@@ -87,3 +109,9 @@ async def debug_env():
         "debug_mode": settings.DEBUG,
         "app_version": settings.APP_VERSION,
     }
+
+
+@app.get("/debug/db")
+async def debug_db():
+    """Database engine and connection pool diagnostics"""
+    return get_pool_status()
@@ -1,9 +1,22 @@
-from sqlalchemy import Column, Integer, String, DateTime, Float, Boolean, Text, JSON, ForeignKey
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, Date, DateTime, Float, Boolean, Text, JSON, LargeBinary, ForeignKey, Index, UniqueConstraint, text
+from sqlalchemy.orm import relationship, deferred
 from datetime import datetime
 from ..core.database import Base
 
 
+# Large JSON columns on Analysis are deferred into this group so that list and
+# history queries only read the scalar score columns. Use
+# undefer_group(ANALYSIS_PAYLOAD_GROUP) when the full payload is needed.
+ANALYSIS_PAYLOAD_GROUP = "payload"
+
+# Delta of the payload against the previous analysis (delta storage mode),
+# read only when rebuilding or diffing history
+ANALYSIS_DELTA_GROUP = "payload_delta"
+
+# Results of a Comparison, loaded for its detail view only
+COMPARISON_PAYLOAD_GROUP = "comparison_payload"
+
+
 class Site(Base):
     """Site model - represents a website being analyzed"""
     __tablename__ = "sites"
@@ -17,9 +30,16 @@ class Site(Base):
     # Google Search Console integration
     gsc_property_url = Column(String, nullable=True)
     gsc_connected = Column(Boolean, default=False)
+    gsc_last_synced_date = Column(Date, nullable=True)  # last GSC day imported into keywords
 
-    # Latest SEO score
+    # Latest SEO score (and the one before it, for movers on the dashboard)
     latest_score = Column(Float, nullable=True)
+    previous_score = Column(Float, nullable=True)
+
+    # Denormalized pointers to the newest rows, kept up to date on write so
+    # that /latest and /progress are primary-key lookups
+    latest_analysis_id = Column(Integer, nullable=True)
+    latest_progress_id = Column(Integer, nullable=True)
 
     # Timestamps
     created_at = Column(DateTime, default=datetime.utcnow)
@@ -49,8 +69,8 @@ class Analysis(Base):
     user_experience_score = Column(Float, nullable=False)
     authority_score = Column(Float, nullable=False)
 
-    # Score breakdown (JSON)
-    score_breakdown = Column(JSON, nullable=True)
+    # Score breakdown (JSON) - deferred, see ANALYSIS_PAYLOAD_GROUP
+    score_breakdown = deferred(Column(JSON, nullable=True), group=ANALYSIS_PAYLOAD_GROUP)
 
     # PageSpeed metrics
     pagespeed_desktop_score = Column(Float, nullable=True)
@@ -72,14 +92,30 @@ class Analysis(Base):
     word_count = Column(Integer, default=0)
 
     # Detailed results (JSON)
-    detailed_results = Column(JSON, nullable=True)
+    detailed_results = deferred(Column(JSON, nullable=True), group=ANALYSIS_PAYLOAD_GROUP)
 
     # LLM-powered deep analysis results (JSON)
-    llm_technical_analysis = Column(JSON, nullable=True)
-    llm_content_analysis = Column(JSON, nullable=True)
-    llm_ux_analysis = Column(JSON, nullable=True)
-    llm_authority_analysis = Column(JSON, nullable=True)
-    llm_action_plan = Column(JSON, nullable=True)
+    llm_technical_analysis = deferred(Column(JSON, nullable=True), group=ANALYSIS_PAYLOAD_GROUP)
+    llm_content_analysis = deferred(Column(JSON, nullable=True), group=ANALYSIS_PAYLOAD_GROUP)
+    llm_ux_analysis = deferred(Column(JSON, nullable=True), group=ANALYSIS_PAYLOAD_GROUP)
+    llm_authority_analysis = deferred(Column(JSON, nullable=True), group=ANALYSIS_PAYLOAD_GROUP)
+    llm_action_plan = deferred(Column(JSON, nullable=True), group=ANALYSIS_PAYLOAD_GROUP)
+
+    # Raw page signals as float32 values in services/scoring.FEATURES order,
+    # read only when re-scoring history
+    feature_vector = deferred(Column(LargeBinary, nullable=True))
+
+    # SHA-256 of the analyzed page's HTML in the snapshot store
+    # (services/snapshot_store.py); NULL when snapshots are off
+    html_snapshot_hash = Column(String(64), nullable=True, index=True)
+
+    # Delta-encoded history (ANALYSIS_STORAGE_MODE=delta, see
+    # services/analysis_history.py). Rows between keyframes leave the payload
+    # columns above NULL and are rebuilt from payload_keyframe_id. No foreign
+    # keys: a site's analyses are deleted together, in any order.
+    payload_base_id = Column(Integer, nullable=True, index=True)
+    payload_keyframe_id = Column(Integer, nullable=True, index=True)
+    payload_delta = deferred(Column(JSON, nullable=True), group=ANALYSIS_DELTA_GROUP)
 
     # Timestamp
     created_at = Column(DateTime, default=datetime.utcnow)
@@ -87,6 +123,13 @@ class Analysis(Base):
     # Relationship
     site = relationship("Site", back_populates="analyses")
 
+    __table_args__ = (
+        Index("ix_analyses_site_id_created_at", "site_id", "created_at"),
+        # Results are cached as immutable by ID, so SQLite must never hand the
+        # ID of a deleted analysis to a new one (it reuses the highest rowid)
+        {"sqlite_autoincrement": True},
+    )
+
 
 class Keyword(Base):
     """Keyword model - tracks keyword performance"""
@@ -114,6 +157,37 @@ class Keyword(Base):
     # Relationship
     site = relationship("Site", back_populates="keywords")
 
+    __table_args__ = (
+        # Conflict target for the bulk upsert in keyword_sync
+        UniqueConstraint("site_id", "keyword", name="uq_keywords_site_id_keyword"),
+        Index("ix_keywords_site_id_clicks", "site_id", "clicks"),
+    )
+
+
+class KeywordMetric(Base):
+    """
+    Keyword metric model - append-only keyword time series
+
+    Keywords are dictionary-encoded through Keyword.id. Daily rows ("d") are
+    rolled up into weekly ("w") and monthly ("m") rows as they age, where
+    `date` is the first day of the period.
+    """
+    __tablename__ = "keyword_metrics"
+
+    keyword_id = Column(Integer, ForeignKey('keywords.id'), primary_key=True)
+    granularity = Column(String(1), primary_key=True, default="d")
+    date = Column(Date, primary_key=True)
+    site_id = Column(Integer, ForeignKey('sites.id'), nullable=False)
+
+    clicks = Column(Integer, default=0)
+    impressions = Column(Integer, default=0)
+    ctr = Column(Float, default=0.0)
+    position = Column(Float, nullable=True)
+
+    __table_args__ = (
+        Index("ix_keyword_metrics_site_id_granularity_date", "site_id", "granularity", "date"),
+    )
+
 
 class AnalysisProgress(Base):
     """Analysis Progress model - tracks real-time analysis progress"""
@@ -123,7 +197,7 @@ class AnalysisProgress(Base):
     site_id = Column(Integer, ForeignKey('sites.id'), index=True, nullable=False)
 
     # Progress tracking
-    status = Column(String, default="pending")  # pending, running, completed, failed
+    status = Column(String, default="pending")  # pending, running, cancelling, completed, failed, cancelled
     current_step = Column(String, nullable=True)
     progress_percentage = Column(Integer, default=0)
 
@@ -142,6 +216,47 @@ class AnalysisProgress(Base):
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     completed_at = Column(DateTime, nullable=True)
 
+    __table_args__ = (
+        Index("ix_analysis_progress_site_id_created_at", "site_id", "created_at"),
+        # At most one in-flight job per site; the insert that starts a job
+        # is the atomic claim (see IN_FLIGHT_STATUSES in analysis_job.py)
+        Index(
+            "uq_analysis_progress_site_id_in_flight", "site_id",
+            unique=True,
+            postgresql_where=text("status IN ('pending', 'running')"),
+            sqlite_where=text("status IN ('pending', 'running')")
+        ),
+    )
+
+
+class Comparison(Base):
+    """Comparison model - side-by-side rule-based scores of a site and its competitors"""
+    __tablename__ = "comparisons"
+
+    id = Column(Integer, primary_key=True, index=True)
+    site_id = Column(Integer, ForeignKey('sites.id'), index=True, nullable=False)
+
+    # Request
+    competitor_urls = Column(JSON, nullable=False)
+    include_llm_summary = Column(Boolean, default=False)
+
+    # Status: pending, running, completed, failed
+    status = Column(String, default="pending")
+    error_message = Column(Text, nullable=True)
+
+    # Side-by-side breakdown (see services/comparison_service.py), deferred
+    # so that comparison lists only read the scalar columns
+    results = deferred(Column(JSON, nullable=True), group=COMPARISON_PAYLOAD_GROUP)
+    llm_summary = deferred(Column(JSON, nullable=True), group=COMPARISON_PAYLOAD_GROUP)
+
+    # Timestamps
+    created_at = Column(DateTime, default=datetime.utcnow)
+    completed_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        Index("ix_comparisons_site_id_created_at", "site_id", "created_at"),
+    )
+
 
 class Recommendation(Base):
     """Recommendation model - AI-generated improvement suggestions"""
@@ -166,12 +281,20 @@ class Recommendation(Base):
     # Category
     category = Column(String, nullable=False)  # technical, content, ux, authority
 
+    # Origin: "rule" (score-based rules) or "llm" (extracted from llm_action_plan)
+    source = Column(String, default="rule")
+
     # Implementation guide
     implementation_guide = Column(Text, nullable=True)
     external_resources = Column(JSON, nullable=True)
 
-    # Status
+    # Status (carried over to the next analysis of the site)
     is_completed = Column(Boolean, default=False)
+    completed_at = Column(DateTime, nullable=True)
 
     # Timestamp
     created_at = Column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        Index("ix_recommendations_analysis_priority_category", "analysis_id", "priority", "category"),
+    )
@@ -0,0 +1,309 @@
+"""
+Analysis Export
+Streaming export of analyses as NDJSON, CSV or Parquet
+
+Rows are read through a server-side cursor in EXPORT_BATCH_SIZE
+partitions, ordered by site and ID, and each partition is encoded and
+handed on before the next one is read, so memory does not grow with the
+size of the export. Parquet gets one row group per partition.
+
+With the score breakdown, the points and status of every rule become flat
+columns. A delta-encoded row gets its breakdown by applying its delta to
+the breakdown of the row before it (its base, thanks to the ordering);
+only a chain that starts before the exported range needs the payload of
+its first row rebuilt from the keyframe.
+"""
+
+import csv
+import io
+from datetime import datetime
+from typing import AsyncIterator, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import orjson
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from ..models.site import Analysis, Site
+from .analysis_history import apply_delta, load_payload, load_payload_sync
+
+# Format -> (media type, file extension)
+EXPORT_FORMATS = {
+    "ndjson": ("application/x-ndjson", "ndjson"),
+    "csv": ("text/csv; charset=utf-8", "csv"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+}
+
+# (column, type) of every exported row; types map onto Parquet types
+BASE_COLUMNS: Tuple[Tuple[str, str], ...] = (
+    ("analysis_id", "int"),
+    ("site_id", "int"),
+    ("domain", "string"),
+    ("created_at", "timestamp"),
+    ("total_score", "float"),
+    ("raw_total_score", "float"),
+    ("is_capped", "bool"),
+    ("technical_score", "float"),
+    ("content_score", "float"),
+    ("user_experience_score", "float"),
+    ("authority_score", "float"),
+    ("pagespeed_mobile_score", "float"),
+    ("pagespeed_desktop_score", "float"),
+    ("largest_contentful_paint", "float"),
+    ("first_input_delay", "float"),
+    ("cumulative_layout_shift", "float"),
+    ("has_ssl", "bool"),
+    ("mobile_friendly", "bool"),
+    ("h1_count", "int"),
+    ("word_count", "int"),
+    ("meta_title", "string"),
+)
+
+# Rules of the score breakdown, flattened to {category}_{rule}_points and
+# {category}_{rule}_status; rules of older analyses not listed here are
+# left out, rules missing from a breakdown are null
+BREAKDOWN_RULES = {
+    "technical": ("ssl", "response_time", "robots_txt", "sitemap", "viewport", "canonical"),
+    "content": ("title_tag", "meta_description", "h1_tag", "heading_structure", "word_count"),
+    "user_experience": ("image_alt_tags", "internal_links", "mobile_viewport", "external_scripts"),
+    "authority": ("base_score", "schema_markup", "open_graph", "twitter_card"),
+}
+
+
+def export_columns(include_breakdown: bool) -> List[Tuple[str, str]]:
+    columns = list(BASE_COLUMNS)
+    if include_breakdown:
+        for category, rules in BREAKDOWN_RULES.items():
+            columns.append((f"{category}_contribution", "float"))
+            for rule in rules:
+                columns.append((f"{category}_{rule}_points", "float"))
+                columns.append((f"{category}_{rule}_status", "string"))
+    return columns
+
+
+def export_query(
+    site_ids: Optional[List[int]] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    include_breakdown: bool = False
+):
+    """
+    Analyses of `site_ids` (all sites when None) created in [since, until),
+    ordered by site and ID
+    """
+    columns = [Analysis.id.label("analysis_id"), Analysis.site_id, Site.domain] + [
+        getattr(Analysis, name) for name, _ in BASE_COLUMNS[3:]
+    ]
+    if include_breakdown:
+        columns += [
+            Analysis.id, Analysis.score_breakdown, Analysis.payload_delta,
+            Analysis.payload_base_id, Analysis.payload_keyframe_id
+        ]
+
+    query = select(*columns).join(Site, Site.id == Analysis.site_id)
+    if site_ids:
+        query = query.where(Analysis.site_id.in_(site_ids))
+    if since:
+        query = query.where(Analysis.created_at >= since)
+    if until:
+        query = query.where(Analysis.created_at < until)
+    return query.order_by(Analysis.site_id, Analysis.id)
+
+
+def flatten_breakdown(score_breakdown: Optional[Dict]) -> Dict:
+    """Breakdown columns of one analysis"""
+    flat = {}
+    for category, rules in BREAKDOWN_RULES.items():
+        section = (score_breakdown or {}).get(category) or {}
+        details = section.get("details") or {}
+        flat[f"{category}_contribution"] = section.get("contribution")
+        for rule in rules:
+            detail = details.get(rule) or {}
+            points = detail.get("points_earned")
+            flat[f"{category}_{rule}_points"] = None if points is None else float(points)
+            flat[f"{category}_{rule}_status"] = detail.get("status")
+    return flat
+
+
+class BreakdownChain:
+    """Score breakdowns of consecutive export rows, rebuilt from their deltas"""
+
+    def __init__(self):
+        self.analysis_id: Optional[int] = None
+        self.breakdown: Optional[Dict] = None
+
+    def missing(self, rows: List) -> List[int]:
+        """IDs of delta rows whose base row does not come right before them"""
+        previous = self.analysis_id
+        missing = []
+        for row in rows:
+            if row.payload_keyframe_id is not None and (row.payload_base_id != previous or row.payload_delta is None):
+                missing.append(row.id)
+            previous = row.id
+        return missing
+
+    def breakdowns(self, rows: List, loaded: Dict[int, Optional[Dict]]) -> Iterator[Optional[Dict]]:
+        """Breakdown of every row; `loaded` holds those of the missing() rows"""
+        for row in rows:
+            if row.id in loaded:
+                breakdown = loaded[row.id]
+            elif row.payload_keyframe_id is None:
+                breakdown = row.score_breakdown
+            else:
+                changes = [change for change in row.payload_delta if change["p"][:1] == ["score_breakdown"]]
+                breakdown = self.breakdown
+                if changes:
+                    breakdown = apply_delta({"score_breakdown": breakdown}, changes)["score_breakdown"]
+            self.analysis_id = row.id
+            self.breakdown = breakdown
+            yield breakdown
+
+
+class NdjsonEncoder:
+    def __init__(self, columns: List[Tuple[str, str]]):
+        self.columns = columns
+
+    def begin(self) -> bytes:
+        return b""
+
+    def encode(self, records: List[Dict]) -> bytes:
+        return b"".join(orjson.dumps(record) + b"\n" for record in records)
+
+    def finish(self) -> bytes:
+        return b""
+
+
+class CsvEncoder:
+    def __init__(self, columns: List[Tuple[str, str]]):
+        self.columns = columns
+        self._buffer = io.StringIO()
+        self._writer = csv.writer(self._buffer)
+
+    def begin(self) -> bytes:
+        self._writer.writerow([name for name, _ in self.columns])
+        return self._drain()
+
+    def encode(self, records: List[Dict]) -> bytes:
+        names = [name for name, _ in self.columns]
+        for record in records:
+            self._writer.writerow([
+                value.isoformat() if isinstance(value, datetime) else value
+                for value in (record[name] for name in names)
+            ])
+        return self._drain()
+
+    def finish(self) -> bytes:
+        return b""
+
+    def _drain(self) -> bytes:
+        data = self._buffer.getvalue().encode("utf-8")
+        self._buffer.seek(0)
+        self._buffer.truncate()
+        return data
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file whose contents are taken out after every row group"""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+class ParquetEncoder:
+    """One zstd-compressed row group per partition; the footer comes last"""
+
+    def __init__(self, columns: List[Tuple[str, str]]):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        types = {"int": pa.int64(), "float": pa.float64(), "bool": pa.bool_(),
+                 "string": pa.string(), "timestamp": pa.timestamp("us")}
+        self._pa = pa
+        self.columns = columns
+        self.schema = pa.schema([(name, types[kind]) for name, kind in columns])
+        self._sink = _ChunkSink()
+        self._writer = pq.ParquetWriter(self._sink, self.schema, compression="zstd")
+
+    def begin(self) -> bytes:
+        return self._sink.drain()
+
+    def encode(self, records: List[Dict]) -> bytes:
+        self._writer.write_table(self._pa.Table.from_pylist(records, schema=self.schema))
+        return self._sink.drain()
+
+    def finish(self) -> bytes:
+        self._writer.close()
+        return self._sink.drain()
+
+
+ENCODERS = {"ndjson": NdjsonEncoder, "csv": CsvEncoder, "parquet": ParquetEncoder}
+
+
+def make_encoder(export_format: str, include_breakdown: bool):
+    """
+    Encoder for a format; raises ValueError for an unknown format and
+    ImportError when Parquet is requested without pyarrow installed
+    """
+    if export_format not in ENCODERS:
+        raise ValueError(f"Unknown export format: {export_format}")
+    return ENCODERS[export_format](export_columns(include_breakdown))
+
+
+def _records(rows: List, breakdowns: Optional[Iterable[Optional[Dict]]]) -> List[Dict]:
+    names = [name for name, _ in BASE_COLUMNS]
+    records = [{name: getattr(row, name) for name in names} for row in rows]
+    if breakdowns is not None:
+        for record, breakdown in zip(records, breakdowns):
+            record.update(flatten_breakdown(breakdown))
+    return records
+
+
+def export_chunks_sync(db: Session, query, encoder, include_breakdown: bool, batch_size: int) -> Iterator[bytes]:
+    """Encoded export of `query`, one chunk per partition (for scripts)"""
+    chain = BreakdownChain() if include_breakdown else None
+    yield encoder.begin()
+    for rows in db.execute(query.execution_options(yield_per=batch_size)).partitions():
+        breakdowns = None
+        if chain is not None:
+            loaded = {
+                analysis_id: load_payload_sync(db, analysis_id)[1].get("score_breakdown")
+                for analysis_id in chain.missing(rows)
+            }
+            breakdowns = chain.breakdowns(rows, loaded)
+        yield encoder.encode(_records(rows, breakdowns))
+    yield encoder.finish()
+
+
+async def export_chunks(db: AsyncSession, query, encoder, include_breakdown: bool, batch_size: int) -> AsyncIterator[bytes]:
+    """Encoded export of `query`, one chunk per partition (for the API)"""
+    chain = BreakdownChain() if include_breakdown else None
+    yield encoder.begin()
+    result = await db.stream(query.execution_options(yield_per=batch_size))
+    async for rows in result.partitions():
+        breakdowns = None
+        if chain is not None:
+            missing = set(chain.missing(rows))
+            loaded = {}
+            for row in rows:
+                if row.id in missing:
+                    loaded[row.id] = (await load_payload(db, row)).get("score_breakdown")
+            breakdowns = chain.breakdowns(rows, loaded)
+        yield encoder.encode(_records(rows, breakdowns))
+    yield encoder.finish()
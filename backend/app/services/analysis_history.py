@@ -0,0 +1,337 @@
+"""
+Analysis History Storage
+Delta encoding of the JSON payload of consecutive analyses of a site
+
+With ANALYSIS_STORAGE_MODE=delta every analysis stores payload_delta, the
+changes against the site's previous analysis (payload_base_id). Every
+ANALYSIS_KEYFRAME_INTERVAL-th analysis is a keyframe that also keeps the
+full payload columns; the analyses in between leave them NULL and point at
+their keyframe (payload_keyframe_id). A payload is rebuilt by applying the
+deltas after its keyframe in order.
+
+A delta is a list of leaf changes {"p": path, "o": old, "n": new}; "o" or
+"n" is omitted when the value did not exist before or after. Keeping the
+old value makes deltas reversible and lets the diff between two analyses
+be composed from the deltas in between without rebuilding either payload.
+"""
+
+import copy
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, undefer_group
+from sqlalchemy.orm.attributes import set_committed_value
+
+from ..core.config import settings
+from ..models.site import Analysis, ANALYSIS_PAYLOAD_GROUP
+
+# Deferred JSON columns covered by the delta encoding
+PAYLOAD_FIELDS = (
+    "score_breakdown",
+    "detailed_results",
+    "llm_technical_analysis",
+    "llm_content_analysis",
+    "llm_ux_analysis",
+    "llm_authority_analysis",
+    "llm_action_plan",
+)
+
+# Scalar columns compared by the diff endpoint
+SCORE_FIELDS = (
+    "total_score",
+    "technical_score",
+    "content_score",
+    "user_experience_score",
+    "authority_score",
+    "pagespeed_mobile_score",
+    "pagespeed_desktop_score",
+)
+
+class _Missing:
+    """Marks a value that does not exist (survives deepcopy)"""
+
+    def __deepcopy__(self, memo):
+        return self
+
+
+_MISSING = _Missing()
+
+Path = Tuple[Any, ...]
+
+
+# Delta codec
+
+def diff_values(old: Any, new: Any, path: Path = ()) -> List[Dict]:
+    """Leaf changes turning `old` into `new` (dicts and equal-length lists are walked)"""
+    if type(old) is type(new) and old == new:
+        return []
+
+    if isinstance(old, dict) and isinstance(new, dict):
+        changes = []
+        for key in list(old) + [key for key in new if key not in old]:
+            changes += diff_values(old.get(key, _MISSING), new.get(key, _MISSING), path + (key,))
+        return changes
+
+    if isinstance(old, list) and isinstance(new, list) and len(old) == len(new):
+        changes = []
+        for index, (old_item, new_item) in enumerate(zip(old, new)):
+            changes += diff_values(old_item, new_item, path + (index,))
+        return changes
+
+    return [_change(path, old, new)]
+
+
+def apply_delta(payload: Dict, delta: List[Dict], reverse: bool = False) -> Dict:
+    """Apply a delta to a copy of `payload` (reverse=True undoes it)"""
+    payload = copy.deepcopy(payload)
+    for change in (reversed(delta) if reverse else delta):
+        value = change.get("o" if reverse else "n", _MISSING)
+        payload = _set_path(payload, tuple(change["p"]), copy.deepcopy(value))
+    return payload
+
+
+def invert_delta(delta: List[Dict]) -> List[Dict]:
+    """The delta that undoes `delta`"""
+    inverted = []
+    for change in reversed(delta):
+        inverted.append(_change(
+            tuple(change["p"]), change.get("n", _MISSING), change.get("o", _MISSING)
+        ))
+    return inverted
+
+
+def compose_deltas(deltas: List[List[Dict]]) -> List[Dict]:
+    """
+    Merge consecutive deltas into one delta from the first base to the last
+    state, keeping the original old value of every path
+    """
+    # path -> [old, new]; no path in here is a prefix of another
+    changes: Dict[Path, List] = {}
+
+    for delta in deltas:
+        for change in delta:
+            path = tuple(change["p"])
+            old, new = change.get("o", _MISSING), change.get("n", _MISSING)
+
+            # Inside an already changed value: update that value in place
+            covering = next((path[:i] for i in range(1, len(path)) if path[:i] in changes), None)
+            if covering is not None:
+                entry = changes[covering]
+                entry[1] = _set_path(entry[1], path[len(covering):], copy.deepcopy(new))
+                continue
+
+            if path in changes:
+                changes[path][1] = copy.deepcopy(new)
+                continue
+
+            # Replaces finer changes below it: restore their originals in `old`
+            nested = [p for p in changes if p[:len(path)] == path]
+            if nested:
+                old = copy.deepcopy(old)
+                for p in nested:
+                    old = _set_path(old, p[len(path):], changes.pop(p)[0])
+            changes[path] = [old, copy.deepcopy(new)]
+
+    return [
+        _change(path, old, new)
+        for path, (old, new) in changes.items()
+        if not (old is _MISSING and new is _MISSING) and not (type(old) is type(new) and old == new)
+    ]
+
+
+def _change(path: Path, old: Any, new: Any) -> Dict:
+    change = {"p": list(path)}
+    if old is not _MISSING:
+        change["o"] = old
+    if new is not _MISSING:
+        change["n"] = new
+    return change
+
+
+def _set_path(root: Any, path: Path, value: Any) -> Any:
+    """Set (or delete, for _MISSING) the value at `path`; returns the new root"""
+    if not path:
+        return value
+
+    parent = root
+    for key in path[:-1]:
+        parent = parent[key]
+
+    if value is _MISSING:
+        # Already absent when a later change removed it again
+        if not isinstance(parent, dict) or path[-1] in parent:
+            del parent[path[-1]]
+    else:
+        parent[path[-1]] = value
+    return root
+
+
+def normalize_payload(payload: Dict) -> Dict:
+    """JSON round trip, so the payload compares equal to what a JSON column returns"""
+    return json.loads(json.dumps(payload, ensure_ascii=False, default=str))
+
+
+def get_payload(analysis: Analysis) -> Dict:
+    """The payload columns of a row whose payload group is loaded"""
+    return {field: getattr(analysis, field) for field in PAYLOAD_FIELDS}
+
+
+# Rebuilding payloads
+
+def _keyframe_query(keyframe_id: int):
+    return select(Analysis).options(undefer_group(ANALYSIS_PAYLOAD_GROUP)).where(Analysis.id == keyframe_id)
+
+
+def _chain_query(keyframe_id: int, target_id: int):
+    return select(Analysis.id, Analysis.payload_base_id, Analysis.payload_delta).where(
+        Analysis.payload_keyframe_id == keyframe_id,
+        Analysis.id <= target_id
+    )
+
+
+def _walk_chain(rows, stop_id: int, target_id: int) -> Optional[List[List[Dict]]]:
+    """
+    Deltas leading from `stop_id` to `target_id`, oldest first
+
+    None when the rows do not link up (e.g. a row written in full mode).
+    """
+    by_id = {row.id: row for row in rows}
+    deltas = []
+    current = target_id
+    while current != stop_id:
+        row = by_id.get(current)
+        if row is None or row.payload_delta is None or row.payload_base_id is None:
+            return None
+        deltas.append(row.payload_delta)
+        current = row.payload_base_id
+    deltas.reverse()
+    return deltas
+
+
+def _rebuild(keyframe: Analysis, rows, target_id: int) -> Dict:
+    deltas = _walk_chain(rows, keyframe.id, target_id)
+    if deltas is None:
+        raise ValueError(f"Broken delta chain for analysis {target_id}")
+
+    payload = get_payload(keyframe)
+    for delta in deltas:
+        payload = apply_delta(payload, delta)
+    return payload
+
+
+async def load_payload(db: AsyncSession, analysis: Analysis) -> Dict:
+    """Full payload of an analysis loaded with its payload group"""
+    if analysis.payload_keyframe_id is None:
+        return get_payload(analysis)
+
+    keyframe = (await db.execute(_keyframe_query(analysis.payload_keyframe_id))).scalars().first()
+    rows = (await db.execute(_chain_query(analysis.payload_keyframe_id, analysis.id))).all()
+    return _rebuild(keyframe, rows, analysis.id)
+
+
+async def hydrate_payload(db: AsyncSession, analysis: Analysis):
+    """Fill the payload columns of a delta-encoded row from its keyframe"""
+    if analysis.payload_keyframe_id is None:
+        return
+
+    payload = await load_payload(db, analysis)
+    for field in PAYLOAD_FIELDS:
+        # Committed value: the rebuilt payload is never written back
+        set_committed_value(analysis, field, payload.get(field))
+
+
+def load_payload_sync(db: Session, analysis_id: int) -> Tuple[Analysis, Dict]:
+    """Row and full payload of an analysis, for the worker's sync session"""
+    analysis = db.execute(_keyframe_query(analysis_id)).scalars().first()
+    if analysis.payload_keyframe_id is None:
+        return analysis, get_payload(analysis)
+
+    keyframe = db.execute(_keyframe_query(analysis.payload_keyframe_id)).scalars().first()
+    rows = db.execute(_chain_query(analysis.payload_keyframe_id, analysis.id)).all()
+    return analysis, _rebuild(keyframe, rows, analysis.id)
+
+
+# Writing
+
+def encode_analysis_payload(db: Session, analysis: Analysis, previous_id: Optional[int]):
+    """
+    Store a new analysis according to ANALYSIS_STORAGE_MODE
+
+    Called by the worker before committing the row: in delta mode the row
+    gets its delta against the site's previous analysis and, unless it is
+    a keyframe, its full payload columns are cleared.
+    """
+    if settings.ANALYSIS_STORAGE_MODE != "delta" or previous_id is None:
+        return
+
+    previous, previous_payload = load_payload_sync(db, previous_id)
+    payload = normalize_payload(get_payload(analysis))
+
+    analysis.payload_base_id = previous_id
+    analysis.payload_delta = diff_values(previous_payload, payload)
+
+    # Deltas since the previous row's keyframe (0 when it is a keyframe)
+    keyframe_id = previous.payload_keyframe_id or previous_id
+    depth = 0 if previous.payload_keyframe_id is None else len(
+        db.execute(_chain_query(keyframe_id, previous_id)).all()
+    )
+    if depth + 1 >= settings.ANALYSIS_KEYFRAME_INTERVAL:
+        analysis.payload_keyframe_id = None
+        return
+
+    analysis.payload_keyframe_id = keyframe_id
+    for field in PAYLOAD_FIELDS:
+        setattr(analysis, field, None)
+
+
+# Diff
+
+async def diff_analyses(db: AsyncSession, base: Analysis, target: Analysis) -> Dict:
+    """
+    Changes from `base` to `target` (two analyses of the same site)
+
+    In delta mode this composes the deltas stored in between; otherwise
+    both payloads are loaded and compared.
+    """
+    earlier, later = (base, target) if base.id <= target.id else (target, base)
+
+    rows = (await db.execute(
+        select(Analysis.id, Analysis.payload_base_id, Analysis.payload_delta).where(
+            Analysis.site_id == later.site_id,
+            Analysis.id > earlier.id,
+            Analysis.id <= later.id
+        )
+    )).all()
+    deltas = _walk_chain(rows, earlier.id, later.id)
+
+    if deltas is not None:
+        changes = compose_deltas(deltas)
+        if later is base:
+            changes = invert_delta(changes)
+    else:
+        base_payload, target_payload = await _load_full_payloads(db, base.id, target.id)
+        changes = diff_values(base_payload, target_payload)
+
+    return {
+        "base_id": base.id,
+        "target_id": target.id,
+        "scores": {
+            field: {"old": getattr(base, field), "new": getattr(target, field)}
+            for field in SCORE_FIELDS
+            if getattr(base, field) != getattr(target, field)
+        },
+        "changes": [
+            {"path": change["p"], "old": change.get("o"), "new": change.get("n")}
+            for change in changes
+        ],
+    }
+
+
+async def _load_full_payloads(db: AsyncSession, *analysis_ids: int) -> List[Dict]:
+    payloads = []
+    for analysis_id in analysis_ids:
+        analysis = (await db.execute(_keyframe_query(analysis_id))).scalars().first()
+        payloads.append(normalize_payload(await load_payload(db, analysis)))
+    return payloads
@@ -0,0 +1,200 @@
+"""
+Analysis Job Context
+Per-job deadline, cancellation and progress reporting for analysis workers
+
+Each blocking stage (page fetch, robots/sitemap probes, every LLM call,
+PageSpeed) runs through AnalysisJob.run_stage, which waits at most the
+stage's budget and returns early when the job is cancelled. Budgets are
+capped by the time left before the job deadline, so once the deadline has
+passed the remaining optional stages are skipped as timed out and the job
+finishes with partial results. A stage that overruns is abandoned; the
+underlying call is bounded by its own timeout and its result discarded.
+"""
+
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from ..core.config import settings
+
+# How often a waiting stage checks for cancellation
+CANCEL_POLL_SECONDS = 0.2
+
+# Progress statuses that mean the job is still in flight
+ACTIVE_STATUSES = ("pending", "running", "cancelling")
+
+# Statuses that hold a site's single-flight slot. A cancelling job releases
+# it, so a new analysis can start while the old worker winds down.
+IN_FLIGHT_STATUSES = ("pending", "running")
+
+
+class AnalysisCancelled(Exception):
+    """The job was cancelled"""
+
+
+class StageTimeout(Exception):
+    """A stage did not finish within its budget"""
+
+    def __init__(self, stage: str, budget: float):
+        super().__init__(f"Stage '{stage}' exceeded {budget:.0f}s")
+        self.stage = stage
+        self.budget = budget
+
+
+def stage_budgets() -> Dict[str, float]:
+    """Seconds allowed per stage (LLM stages share one budget each)"""
+    return {
+        "fetch": settings.ANALYSIS_FETCH_TIMEOUT_SECONDS,
+        "probes": settings.ANALYSIS_PROBE_TIMEOUT_SECONDS,
+        "llm": settings.ANALYSIS_LLM_TIMEOUT_SECONDS,
+        "pagespeed": settings.ANALYSIS_PAGESPEED_TIMEOUT_SECONDS,
+        "crawl": settings.ANALYSIS_CRAWL_TIMEOUT_SECONDS,
+        "links": settings.ANALYSIS_LINK_CHECK_TIMEOUT_SECONDS,
+        "resources": settings.ANALYSIS_RESOURCE_AUDIT_TIMEOUT_SECONDS,
+    }
+
+
+class AnalysisJob:
+    """State of one running analysis, owned by its worker thread"""
+
+    def __init__(
+        self,
+        job_id: Optional[int] = None,
+        timeout: Optional[float] = None,
+        progress_callback: Optional[Callable[[str, int], None]] = None,
+        cancel_check: Optional[Callable[[], bool]] = None
+    ):
+        self.job_id = job_id
+        self.deadline = time.monotonic() + timeout if timeout else None
+        self.progress_callback = progress_callback
+        # Polled at stage boundaries, e.g. to see a cancel written by another process
+        self.cancel_check = cancel_check
+        self.budgets = stage_budgets()
+        self.completed_stages: List[str] = []
+        self.timed_out_stages: List[str] = []
+        self._cancel_event = threading.Event()
+
+    # Cancellation
+
+    def cancel(self):
+        """Request cancellation (safe to call from any thread)"""
+        self._cancel_event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel_event.is_set()
+
+    def remaining(self) -> Optional[float]:
+        """Seconds left before the job deadline (None without a deadline)"""
+        if self.deadline is None:
+            return None
+        return max(0.0, self.deadline - time.monotonic())
+
+    def check(self):
+        """Raise AnalysisCancelled if the job was cancelled"""
+        if not self.cancelled and self.cancel_check and self.cancel_check():
+            self.cancel()
+        if self.cancelled:
+            raise AnalysisCancelled()
+
+    def stage_timeout(self, stage: str) -> float:
+        """Budget of a stage, capped by the time left on the job"""
+        budget = self.budgets["llm" if stage.startswith("llm_") else stage]
+        remaining = self.remaining()
+        return budget if remaining is None else min(budget, remaining)
+
+    # Stages
+
+    def run_stage(self, stage: str, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        Run a blocking call within the stage budget
+
+        Raises StageTimeout when the budget runs out and AnalysisCancelled
+        when the job is cancelled meanwhile. `fn` runs in a helper thread
+        and must not touch the worker's DB session.
+        """
+        self.check()
+        budget = self.stage_timeout(stage)
+        if budget <= 0:
+            self.timed_out_stages.append(stage)
+            raise StageTimeout(stage, budget)
+
+        outcome = {}
+        done = threading.Event()
+
+        def call():
+            try:
+                outcome["value"] = fn(*args, **kwargs)
+            except BaseException as e:
+                outcome["error"] = e
+            finally:
+                done.set()
+
+        threading.Thread(target=call, name=f"analysis-stage-{stage}", daemon=True).start()
+
+        give_up_at = time.monotonic() + budget
+        while not done.wait(min(CANCEL_POLL_SECONDS, max(0.0, give_up_at - time.monotonic()))):
+            if self.cancelled:
+                raise AnalysisCancelled()
+            if time.monotonic() >= give_up_at:
+                self.timed_out_stages.append(stage)
+                raise StageTimeout(stage, budget)
+
+        if "error" in outcome:
+            raise outcome["error"]
+
+        self.completed_stages.append(stage)
+        return outcome.get("value")
+
+    def run_optional_stage(self, stage: str, default: Any, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """run_stage that returns `default` (a partial result) on timeout"""
+        try:
+            return self.run_stage(stage, fn, *args, **kwargs)
+        except StageTimeout as e:
+            print(f"Analysis job {self.job_id}: {e}", flush=True)
+            return default
+
+    def run_check_stage(self, stage: str, default: Any, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        run_optional_stage for extra checks (crawl, links, resources): an
+        unexpected error is logged and returns `default` as well, so a
+        check can never fail an otherwise working analysis
+        """
+        try:
+            return self.run_optional_stage(stage, default, fn, *args, **kwargs)
+        except AnalysisCancelled:
+            raise
+        except Exception as e:
+            print(f"Analysis job {self.job_id}: stage {stage} failed: {type(e).__name__}: {e}", flush=True)
+            return default
+
+    # Progress
+
+    def report_progress(self, step: str, percentage: int):
+        if self.progress_callback:
+            self.progress_callback(step, percentage)
+
+
+# Jobs running in this process, by progress ID
+_active_jobs: Dict[int, AnalysisJob] = {}
+_active_jobs_lock = threading.Lock()
+
+
+def register_job(job: AnalysisJob):
+    with _active_jobs_lock:
+        _active_jobs[job.job_id] = job
+
+
+def unregister_job(job_id: int):
+    with _active_jobs_lock:
+        _active_jobs.pop(job_id, None)
+
+
+def cancel_local_job(job_id: int) -> bool:
+    """Signal a job running in this process; False if it runs elsewhere"""
+    with _active_jobs_lock:
+        job = _active_jobs.get(job_id)
+    if job is None:
+        return False
+    job.cancel()
+    return True
@@ -0,0 +1,146 @@
+"""
+Competitor Comparison Service
+Scores a site and its competitors side by side in one pass
+
+All pages are fetched concurrently through one requests.Session, so the
+probes of a host reuse its keep-alive connections. Only the rule-based
+scorers run per URL; the optional LLM summary is a single call over the
+finished comparison.
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+from ..core.config import settings
+from .http_client import build_session
+from .seo_analyzer import SEOAnalyzer
+
+# Category keys of score_breakdown, with the matching score fields
+CATEGORIES = {
+    "technical": "technical_score",
+    "content": "content_score",
+    "user_experience": "user_experience_score",
+    "authority": "authority_score",
+}
+
+
+def run_comparison(analyzer: SEOAnalyzer, site_url: str, competitor_urls: List[str]) -> Dict:
+    """Fetch and score the site and every competitor concurrently"""
+    urls = [site_url] + competitor_urls
+    workers = max(1, min(len(urls), settings.COMPARISON_MAX_WORKERS))
+
+    def score(url: str) -> Dict:
+        started = time.perf_counter()
+        result = analyzer.score_site(
+            url,
+            fetch_timeout=settings.ANALYSIS_FETCH_TIMEOUT_SECONDS,
+            probe_timeout=settings.ANALYSIS_PROBE_TIMEOUT_SECONDS,
+            session=session
+        )
+        result["elapsed_seconds"] = round(time.perf_counter() - started, 2)
+        return result
+
+    started = time.perf_counter()
+    with build_session(workers) as session, ThreadPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(score, urls))
+
+    comparison = build_side_by_side(urls, results)
+    comparison["elapsed_seconds"] = round(time.perf_counter() - started, 2)
+    return comparison
+
+
+def build_side_by_side(urls: List[str], results: List[Dict]) -> Dict:
+    """
+    One breakdown for all targets (the site first)
+
+    Lists under "scores" and "points" are aligned with "targets"; None
+    marks a target whose page could not be fetched.
+    """
+    targets = []
+    for index, (url, result) in enumerate(zip(urls, results)):
+        failed = "error" in result
+        targets.append({
+            "url": url,
+            "role": "site" if index == 0 else "competitor",
+            "error": result.get("error"),
+            "elapsed_seconds": result.get("elapsed_seconds"),
+            "total_score": None if failed else result["total_score"],
+            **{field: None if failed else result[field] for field in CATEGORIES.values()},
+        })
+
+    categories = {}
+    for category, field in CATEGORIES.items():
+        scores = [target[field] for target in targets]
+        categories[category] = {
+            "scores": scores,
+            **_standing(scores),
+        }
+    categories["total"] = {
+        "scores": [target["total_score"] for target in targets],
+        **_standing([target["total_score"] for target in targets]),
+    }
+
+    checks = _align_checks(results)
+    return {
+        "targets": targets,
+        "categories": categories,
+        "checks": checks,
+        "gaps": _find_gaps(checks),
+    }
+
+
+def _standing(scores: List[Optional[float]]) -> Dict:
+    """Rank of the site (scores[0]) and its distance to the best and the average competitor"""
+    site = scores[0]
+    competitors = [score for score in scores[1:] if score is not None]
+    if site is None or not competitors:
+        return {"site_rank": None, "gap_to_best": None, "gap_to_average": None}
+
+    return {
+        "site_rank": 1 + sum(1 for score in competitors if score > site),
+        "gap_to_best": round(site - max(competitors), 1),
+        "gap_to_average": round(site - sum(competitors) / len(competitors), 1),
+    }
+
+
+def _align_checks(results: List[Dict]) -> List[Dict]:
+    """Points of every rule, per target, in score_breakdown order"""
+    checks = {}
+    for index, result in enumerate(results):
+        for category, section in (result.get("score_breakdown") or {}).items():
+            for name, detail in section["details"].items():
+                check = checks.setdefault((category, name), {
+                    "category": category,
+                    "check": name,
+                    "description": detail.get("description"),
+                    "max_points": detail.get("max_points"),
+                    "points": [None] * len(results),
+                })
+                check["points"][index] = detail.get("points_earned")
+    return list(checks.values())
+
+
+def _find_gaps(checks: List[Dict]) -> List[Dict]:
+    """Rules where a competitor earns more points than the site, largest gap first"""
+    gaps = []
+    for check in checks:
+        site_points = check["points"][0]
+        competitor_points = [points for points in check["points"][1:] if points is not None]
+        if site_points is None or not competitor_points:
+            continue
+
+        best_points = max(competitor_points)
+        if best_points > site_points:
+            gaps.append({
+                "category": check["category"],
+                "check": check["check"],
+                "description": check["description"],
+                "max_points": check["max_points"],
+                "site_points": site_points,
+                "best_points": best_points,
+                "competitors_ahead": sum(1 for points in competitor_points if points > site_points),
+            })
+
+    gaps.sort(key=lambda gap: gap["best_points"] - gap["site_points"], reverse=True)
+    return gaps
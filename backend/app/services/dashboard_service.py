@@ -0,0 +1,157 @@
+"""
+Dashboard Service
+Portfolio-wide summary computed with SQL aggregates over the denormalized
+Site columns and each site's latest analysis
+"""
+
+from datetime import datetime, timedelta
+from typing import Dict
+from sqlalchemy import case, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..core.cache import TTLCache
+from ..core.config import settings
+from ..models.site import Site, Analysis, AnalysisProgress
+
+# Width of one score histogram bucket (10 buckets over 0-100)
+HISTOGRAM_BUCKET_WIDTH = 10
+
+# Summaries are cached briefly and dropped when an analysis finishes
+dashboard_cache = TTLCache(maxsize=32, ttl=settings.DASHBOARD_CACHE_TTL_SECONDS)
+
+
+def invalidate_dashboard_cache():
+    """Drop cached summaries (called when analyses complete or sites change)"""
+    dashboard_cache.clear()
+
+
+async def get_dashboard_summary(
+    db: AsyncSession,
+    stale_days: int = 30,
+    list_limit: int = 10
+) -> Dict:
+    """Build the portfolio summary, served from the cache when fresh"""
+    cache_key = (stale_days, list_limit)
+    cached = dashboard_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    stale_before = datetime.utcnow() - timedelta(days=stale_days)
+    is_stale = (Site.last_analyzed_at.is_(None)) | (Site.last_analyzed_at < stale_before)
+
+    # Site totals
+    totals = (await db.execute(
+        select(
+            func.count(Site.id).label("site_count"),
+            func.count(Site.latest_score).label("analyzed_count"),
+            func.avg(Site.latest_score).label("average_score"),
+            func.sum(case((is_stale, 1), else_=0)).label("stale_count")
+        )
+    )).one()
+
+    # Score distribution of the latest scores
+    bucket = case(
+        *[
+            (Site.latest_score < (i + 1) * HISTOGRAM_BUCKET_WIDTH, i)
+            for i in range(100 // HISTOGRAM_BUCKET_WIDTH - 1)
+        ],
+        else_=100 // HISTOGRAM_BUCKET_WIDTH - 1
+    ).label("bucket")
+    bucket_counts = dict((await db.execute(
+        select(bucket, func.count()).where(
+            Site.latest_score.is_not(None)
+        ).group_by(bucket)
+    )).all())
+    histogram = [
+        {
+            "min_score": i * HISTOGRAM_BUCKET_WIDTH,
+            "max_score": (i + 1) * HISTOGRAM_BUCKET_WIDTH,
+            "count": bucket_counts.get(i, 0)
+        }
+        for i in range(100 // HISTOGRAM_BUCKET_WIDTH)
+    ]
+
+    # Category averages over each site's latest analysis
+    averages = (await db.execute(
+        select(
+            func.avg(Analysis.total_score).label("total"),
+            func.avg(Analysis.technical_score).label("technical"),
+            func.avg(Analysis.content_score).label("content"),
+            func.avg(Analysis.user_experience_score).label("user_experience"),
+            func.avg(Analysis.authority_score).label("authority"),
+            func.avg(Analysis.pagespeed_mobile_score).label("pagespeed_mobile"),
+            func.avg(Analysis.pagespeed_desktop_score).label("pagespeed_desktop")
+        ).join(Site, Site.latest_analysis_id == Analysis.id)
+    )).one()
+
+    # Biggest movers since the previous analysis
+    change = (Site.latest_score - Site.previous_score).label("change")
+    movers = (await db.execute(
+        select(Site.id, Site.name, Site.domain, Site.latest_score, Site.previous_score, change).where(
+            Site.previous_score.is_not(None),
+            Site.latest_score.is_not(None)
+        ).order_by(func.abs(change).desc()).limit(list_limit)
+    )).all()
+
+    # Stale sites, never-analyzed first
+    stale_sites = (await db.execute(
+        select(Site.id, Site.name, Site.domain, Site.last_analyzed_at).where(
+            is_stale
+        ).order_by(Site.last_analyzed_at.is_not(None), Site.last_analyzed_at).limit(list_limit)
+    )).all()
+
+    # Sites whose most recent job failed
+    failing_jobs = (await db.execute(
+        select(
+            AnalysisProgress.id, AnalysisProgress.site_id, Site.name, Site.domain,
+            AnalysisProgress.error_message, AnalysisProgress.updated_at
+        ).join(
+            Site, Site.latest_progress_id == AnalysisProgress.id
+        ).where(
+            AnalysisProgress.status == "failed"
+        ).order_by(AnalysisProgress.updated_at.desc()).limit(list_limit)
+    )).all()
+
+    summary = {
+        "generated_at": datetime.utcnow(),
+        "site_count": totals.site_count,
+        "analyzed_count": totals.analyzed_count,
+        "stale_count": totals.stale_count or 0,
+        "average_score": _round(totals.average_score),
+        "score_histogram": histogram,
+        "category_averages": {key: _round(value) for key, value in averages._mapping.items()},
+        "biggest_movers": [
+            {
+                "site_id": row.id,
+                "name": row.name,
+                "domain": row.domain,
+                "latest_score": row.latest_score,
+                "previous_score": row.previous_score,
+                "change": _round(row.change)
+            }
+            for row in movers
+        ],
+        "stale_sites": [
+            {"site_id": row.id, "name": row.name, "domain": row.domain, "last_analyzed_at": row.last_analyzed_at}
+            for row in stale_sites
+        ],
+        "failing_jobs": [
+            {
+                "progress_id": row.id,
+                "site_id": row.site_id,
+                "name": row.name,
+                "domain": row.domain,
+                "error_message": row.error_message,
+                "failed_at": row.updated_at
+            }
+            for row in failing_jobs
+        ]
+    }
+
+    dashboard_cache.set(cache_key, summary)
+    return summary
+
+
+def _round(value, digits: int = 1):
+    """Round an aggregate that may be NULL"""
+    return round(float(value), digits) if value is not None else None
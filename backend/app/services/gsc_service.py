@@ -3,12 +3,13 @@ Google Search Console API Integration
 Fetches keyword performance data and search analytics
 """
 
-from google.oauth2.credentials import Credentials
-from googleapiclient.discovery import build
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional
+from typing import Dict, Iterator, List, Optional
 import json
 
+# Maximum rows the Search Analytics API returns per request
+MAX_ROWS_PER_REQUEST = 25000
+
 
 class GoogleSearchConsoleService:
     """Service for interacting with Google Search Console API"""
@@ -21,16 +22,77 @@ class GoogleSearchConsoleService:
             credentials_json: JSON string of OAuth credentials
         """
         self.credentials = None
+        self._service = None
         if credentials_json:
+            # Google client libraries are imported on first use to keep
+            # them off the application's import path
+            from google.oauth2.credentials import Credentials
+
             creds_dict = json.loads(credentials_json)
             self.credentials = Credentials.from_authorized_user_info(creds_dict)
 
+    def _get_service(self):
+        """Build the discovery client once and reuse it for every request"""
+        if self._service is None:
+            from googleapiclient.discovery import build
+
+            self._service = build(
+                'searchconsole', 'v1',
+                credentials=self.credentials,
+                cache_discovery=False
+            )
+        return self._service
+
+    def iter_search_analytics(
+        self,
+        site_url: str,
+        start_date: str,
+        end_date: str,
+        dimensions: List[str] = None,
+        page_size: int = MAX_ROWS_PER_REQUEST
+    ) -> Iterator[Dict]:
+        """
+        Stream raw search analytics rows, following startRow pagination
+        until the API returns a short page
+
+        Raises:
+            ValueError: If no credentials are configured
+        """
+        if not self.credentials:
+            raise ValueError("No credentials provided")
+
+        page_size = min(page_size, MAX_ROWS_PER_REQUEST)
+        service = self._get_service()
+        start_row = 0
+
+        while True:
+            request = {
+                'startDate': start_date,
+                'endDate': end_date,
+                'dimensions': dimensions or ["query"],
+                'rowLimit': page_size,
+                'startRow': start_row
+            }
+
+            response = service.searchanalytics().query(
+                siteUrl=site_url,
+                body=request
+            ).execute()
+
+            rows = response.get("rows", [])
+            yield from rows
+
+            if len(rows) < page_size:
+                break
+            start_row += len(rows)
+
     def get_search_analytics(
         self,
         site_url: str,
         start_date: Optional[str] = None,
         end_date: Optional[str] = None,
-        dimensions: List[str] = None
+        dimensions: List[str] = None,
+        row_limit: Optional[int] = 1000
     ) -> Dict:
         """
         Fetch search analytics data from GSC
@@ -40,6 +102,7 @@ class GoogleSearchConsoleService:
             start_date: Start date (YYYY-MM-DD)
             end_date: End date (YYYY-MM-DD)
             dimensions: List of dimensions (query, page, country, device, etc.)
+            row_limit: Maximum number of rows (None fetches every page)
 
         Returns:
             Dict containing search analytics data
@@ -60,21 +123,14 @@ class GoogleSearchConsoleService:
             dimensions = ["query"]
 
         try:
-            service = build('searchconsole', 'v1', credentials=self.credentials)
-
-            request = {
-                'startDate': start_date,
-                'endDate': end_date,
-                'dimensions': dimensions,
-                'rowLimit': 1000
-            }
-
-            response = service.searchanalytics().query(
-                siteUrl=site_url,
-                body=request
-            ).execute()
+            rows = []
+            page_size = min(row_limit or MAX_ROWS_PER_REQUEST, MAX_ROWS_PER_REQUEST)
+            for row in self.iter_search_analytics(site_url, start_date, end_date, dimensions, page_size):
+                rows.append(row)
+                if row_limit and len(rows) >= row_limit:
+                    break
 
-            return self._parse_analytics_data(response)
+            return self._parse_analytics_data({"rows": rows})
 
         except Exception as e:
             return {
@@ -137,7 +193,7 @@ class GoogleSearchConsoleService:
             return {"error": "No credentials provided"}
 
         try:
-            service = build('searchconsole', 'v1', credentials=self.credentials)
+            service = self._get_service()
             site = service.sites().get(siteUrl=site_url).execute()
 
             return {
@@ -0,0 +1,132 @@
+"""
+HTTP Client
+Shared requests.Session factory for concurrent fetches, and the
+process-wide limits for probe requests (link checks, resource probes)
+
+Probes share one semaphore per host (PROBE_PER_HOST) and one token bucket
+(PROBE_RATE_PER_SECOND) across all analyses running in the process, so
+concurrent analyses do not multiply the load on a host or CDN.
+"""
+
+import threading
+import time
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from ..core.config import settings
+
+# GET bodies up to this size are read, so the connection goes back to the
+# pool; larger ones are dropped unread
+MAX_DRAINED_BYTES = 64 * 1024
+
+
+class RequestDeadline(Exception):
+    """No time left to send a probe request"""
+
+
+class RateLimiter:
+    """Token bucket shared by every thread in the process"""
+
+    def __init__(self, rate: float, burst: Optional[float] = None):
+        self.rate = rate
+        self.burst = burst or max(1.0, rate)
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, deadline: float):
+        """Take one token, waiting for it until `deadline` (monotonic time)"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            if now + wait > deadline:
+                raise RequestDeadline()
+            time.sleep(wait)
+
+
+class HostLimits:
+    """One semaphore per host, created on first use"""
+
+    def __init__(self, per_host: int):
+        self.per_host = per_host
+        self._semaphores: Dict[str, threading.BoundedSemaphore] = {}
+        self._lock = threading.Lock()
+
+    def get(self, host: str) -> threading.BoundedSemaphore:
+        with self._lock:
+            semaphore = self._semaphores.get(host)
+            if semaphore is None:
+                semaphore = self._semaphores[host] = threading.BoundedSemaphore(self.per_host)
+            return semaphore
+
+
+rate_limiter = RateLimiter(settings.PROBE_RATE_PER_SECOND)
+host_limits = HostLimits(settings.PROBE_PER_HOST)
+
+
+def build_session(pool_size: int) -> requests.Session:
+    """Session whose connection pool fits `pool_size` concurrent fetches"""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def probe_request(
+    session: requests.Session,
+    method: str,
+    url: str,
+    timeout: float,
+    deadline: float,
+    headers: Optional[Dict[str, str]] = None,
+    timings: Optional[Dict[str, float]] = None
+) -> requests.Response:
+    """
+    One request within the host and rate limits, without following redirects
+
+    Raises RequestDeadline when the limits cannot be passed before
+    `deadline` (monotonic time). Large bodies are never read. With
+    `timings`, the seconds spent waiting for the limits ("queue") and on
+    the request itself ("request") are added to it.
+    """
+    queued = time.perf_counter()
+    semaphore = host_limits.get(urlparse(url).netloc.lower())
+    if not semaphore.acquire(timeout=max(0.0, deadline - time.monotonic())):
+        raise RequestDeadline()
+    try:
+        rate_limiter.acquire(deadline)
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise RequestDeadline()
+        sent = time.perf_counter()
+        if timings is not None:
+            timings["queue"] = timings.get("queue", 0.0) + sent - queued
+        try:
+            response = session.request(
+                method, url,
+                timeout=min(timeout, remaining),
+                allow_redirects=False,
+                stream=True,
+                headers={'User-Agent': 'Mozilla/5.0 (SEO Analyzer Bot)', **(headers or {})}
+            )
+            # Content-Length may be malformed (e.g. "5, 5"); only a plain number is trusted
+            length = response.headers.get("Content-Length", "").strip()
+            if method == "GET" and length.isdigit() and int(length) <= MAX_DRAINED_BYTES:
+                response.content
+            response.close()
+            return response
+        finally:
+            if timings is not None:
+                timings["request"] = timings.get("request", 0.0) + time.perf_counter() - sent
+    finally:
+        semaphore.release()
@@ -0,0 +1,347 @@
+"""
+Keyword Sync Service
+Incrementally imports Google Search Console query data into the keyword
+time series (KeywordMetric) and refreshes the current Keyword metrics
+"""
+
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, Iterator, List, Optional
+from sqlalchemy import Date, case, cast, delete, func, literal, select, update
+from sqlalchemy.orm import Session
+from sqlalchemy.dialects import postgresql, sqlite
+
+from ..core.config import settings
+from ..models.site import Site, Keyword, KeywordMetric
+from .gsc_service import GoogleSearchConsoleService
+
+# KeywordMetric granularities from finest to coarsest
+GRANULARITY_RANK = {"d": 1, "w": 2, "m": 3}
+
+# Dialect-specific INSERT constructs that support ON CONFLICT
+UPSERT_INSERTS = {
+    "postgresql": postgresql.insert,
+    "sqlite": sqlite.insert,
+}
+
+
+class KeywordSyncService:
+    """Streams GSC search analytics into the keyword time series"""
+
+    def __init__(self, gsc_service: GoogleSearchConsoleService, batch_size: Optional[int] = None):
+        self.gsc_service = gsc_service
+        self.batch_size = batch_size or settings.GSC_SYNC_BATCH_SIZE
+
+    def sync_site(self, db: Session, site: Site, end_date: Optional[date] = None) -> Dict:
+        """
+        Import the days since the site's last sync
+
+        Daily rows are appended to keyword_metrics, then every keyword seen in
+        the window gets its current metrics recomputed from those rows in one
+        UPDATE. previous_position and position_change are derived from the
+        stored position in the same statement. Aged rows are rolled up last.
+        """
+        if not site.gsc_property_url:
+            raise ValueError("Site has no Search Console property")
+
+        start_date, end_date = self.get_sync_window(site, end_date)
+        if start_date > end_date:
+            return {"status": "up_to_date", "rows": 0}
+
+        rows = self.gsc_service.iter_search_analytics(
+            site.gsc_property_url,
+            start_date.isoformat(),
+            end_date.isoformat(),
+            dimensions=["date", "query"]
+        )
+
+        total = 0
+        for batch in _chunked(rows, self.batch_size):
+            total += self.append_daily_metrics(db, site.id, batch)
+
+        self.refresh_keyword_metrics(db, site.id, start_date, end_date)
+        site.gsc_last_synced_date = end_date
+        rollup_keyword_metrics(db, site.id)
+        db.commit()
+
+        return {
+            "status": "synced",
+            "rows": total,
+            "start_date": start_date.isoformat(),
+            "end_date": end_date.isoformat()
+        }
+
+    def get_sync_window(self, site: Site, end_date: Optional[date] = None):
+        """Compute the (start, end) day range that still needs importing"""
+        if end_date is None:
+            end_date = date.today() - timedelta(days=settings.GSC_DATA_DELAY_DAYS)
+
+        if site.gsc_last_synced_date:
+            start_date = site.gsc_last_synced_date + timedelta(days=1)
+        else:
+            start_date = end_date - timedelta(days=settings.GSC_INITIAL_SYNC_DAYS - 1)
+
+        return start_date, end_date
+
+    def encode_keywords(self, db: Session, site_id: int, keywords: Iterable[str]) -> Dict[str, int]:
+        """Map keyword strings to their dictionary IDs, creating missing entries"""
+        keywords = list(set(keywords))
+        if not keywords:
+            return {}
+
+        stmt = _upsert_insert(db)(Keyword).values([
+            {"site_id": site_id, "keyword": keyword, "position": None}
+            for keyword in keywords
+        ]).on_conflict_do_nothing(index_elements=[Keyword.site_id, Keyword.keyword])
+        db.execute(stmt)
+
+        rows = db.execute(
+            select(Keyword.id, Keyword.keyword).where(
+                Keyword.site_id == site_id,
+                Keyword.keyword.in_(keywords)
+            )
+        ).all()
+        return {row.keyword: row.id for row in rows}
+
+    def append_daily_metrics(self, db: Session, site_id: int, rows: List[Dict]) -> int:
+        """Write one batch of (date, query) rows as daily metrics"""
+        parsed = [
+            (row["keys"][0], row["keys"][1], row)
+            for row in rows
+            if len(row.get("keys") or []) >= 2
+        ]
+        if not parsed:
+            return 0
+
+        keyword_ids = self.encode_keywords(db, site_id, (query for _, query, _ in parsed))
+
+        # One entry per (keyword, day): ON CONFLICT cannot touch a row twice
+        values = {}
+        for day, query, row in parsed:
+            keyword_id = keyword_ids[query]
+            values[(keyword_id, day)] = {
+                "keyword_id": keyword_id,
+                "granularity": "d",
+                "date": date.fromisoformat(day),
+                "site_id": site_id,
+                "clicks": int(row.get("clicks", 0)),
+                "impressions": int(row.get("impressions", 0)),
+                "ctr": round(row.get("ctr", 0) * 100, 2),
+                "position": round(row.get("position", 0), 1),
+            }
+
+        # Re-importing a day replaces its values
+        stmt = _upsert_insert(db)(KeywordMetric).values(list(values.values()))
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[KeywordMetric.keyword_id, KeywordMetric.granularity, KeywordMetric.date],
+            set_={
+                "clicks": stmt.excluded.clicks,
+                "impressions": stmt.excluded.impressions,
+                "ctr": stmt.excluded.ctr,
+                "position": stmt.excluded.position,
+            }
+        )
+        db.execute(stmt)
+        return len(values)
+
+    def refresh_keyword_metrics(self, db: Session, site_id: int, start_date: date, end_date: date):
+        """Recompute Keyword's current metrics from the daily rows of a window"""
+        impressions = func.sum(KeywordMetric.impressions)
+        window = select(
+            KeywordMetric.keyword_id.label("keyword_id"),
+            func.sum(KeywordMetric.clicks).label("clicks"),
+            impressions.label("impressions"),
+            _weighted_position(impressions).label("position")
+        ).where(
+            KeywordMetric.site_id == site_id,
+            KeywordMetric.granularity == "d",
+            KeywordMetric.date >= start_date,
+            KeywordMetric.date <= end_date
+        ).group_by(KeywordMetric.keyword_id).subquery()
+
+        # SET expressions see the existing row, so the old position becomes
+        # previous_position (a positive change means the keyword moved up)
+        db.execute(
+            update(Keyword).where(Keyword.id == window.c.keyword_id).values(
+                clicks=window.c.clicks,
+                impressions=window.c.impressions,
+                ctr=func.coalesce(window.c.clicks * 100.0 / func.nullif(window.c.impressions, 0), 0.0),
+                previous_position=Keyword.position,
+                position=window.c.position,
+                position_change=func.coalesce(Keyword.position - window.c.position, 0.0),
+                updated_at=datetime.utcnow()
+            )
+        )
+
+
+def period_start(dialect: str, column, granularity: str):
+    """SQL expression for the first day of the week/month containing `column`"""
+    if granularity == "d":
+        return column
+
+    if dialect == "sqlite":
+        modifiers = ("weekday 0", "-6 days") if granularity == "w" else ("start of month",)
+        return func.date(column, *modifiers, type_=Date)
+
+    if dialect == "postgresql":
+        unit = "week" if granularity == "w" else "month"
+        return cast(func.date_trunc(unit, column), Date)
+
+    raise ValueError(f"Keyword rollups are not supported on '{dialect}'")
+
+
+def rollup_keyword_metrics(db: Session, site_id: int, today: Optional[date] = None):
+    """
+    Roll aged daily rows up into weeks and aged weekly rows into months
+
+    Cutoffs are aligned to period boundaries so only whole periods are
+    folded. A week is assigned to the month it starts in. The caller commits.
+    """
+    today = today or date.today()
+
+    daily_cutoff = today - timedelta(days=settings.KEYWORD_DAILY_RETENTION_DAYS)
+    daily_cutoff -= timedelta(days=daily_cutoff.weekday())
+    _rollup(db, site_id, "d", "w", daily_cutoff)
+
+    weekly_cutoff = (today - timedelta(days=settings.KEYWORD_WEEKLY_RETENTION_DAYS)).replace(day=1)
+    _rollup(db, site_id, "w", "m", weekly_cutoff)
+
+
+def build_trend_query(
+    dialect: str,
+    site_id: int,
+    granularity: str,
+    start_date: date,
+    end_date: date,
+    keyword_ids: Optional[List[int]] = None,
+    top: int = 100
+):
+    """
+    Build one query returning downsampled series for many keywords
+
+    Rows are (keyword_id, keyword, period, clicks, impressions, ctr,
+    position, source_granularity) ordered by keyword and period. Without
+    explicit IDs the site's `top` keywords by clicks are used.
+
+    Rows rolled up past retention are coarser than a day. When they are
+    coarser than `granularity`, they keep their own period (rollup rows are
+    dated at its first day) instead of posing as one day or week.
+    "source_granularity" is the coarsest granularity in the period.
+    """
+    coarser = [code for code, rank in GRANULARITY_RANK.items() if rank > GRANULARITY_RANK[granularity]]
+    period = period_start(dialect, KeywordMetric.date, granularity)
+    if coarser:
+        period = case((KeywordMetric.granularity.in_(coarser), KeywordMetric.date), else_=period)
+    period = period.label("period")
+    source_granularity = case(
+        {rank: code for code, rank in GRANULARITY_RANK.items()},
+        value=func.max(case(GRANULARITY_RANK, value=KeywordMetric.granularity))
+    )
+    impressions = func.sum(KeywordMetric.impressions)
+    clicks = func.sum(KeywordMetric.clicks)
+
+    query = select(
+        KeywordMetric.keyword_id,
+        Keyword.keyword,
+        period,
+        clicks.label("clicks"),
+        impressions.label("impressions"),
+        func.coalesce(clicks * 100.0 / func.nullif(impressions, 0), 0.0).label("ctr"),
+        _weighted_position(impressions).label("position"),
+        source_granularity.label("source_granularity")
+    ).join(
+        Keyword, Keyword.id == KeywordMetric.keyword_id
+    ).where(
+        KeywordMetric.site_id == site_id,
+        KeywordMetric.date >= start_date,
+        KeywordMetric.date <= end_date
+    )
+
+    if keyword_ids:
+        query = query.where(KeywordMetric.keyword_id.in_(keyword_ids))
+    else:
+        top_keywords = select(Keyword.id).where(
+            Keyword.site_id == site_id
+        ).order_by(Keyword.clicks.desc()).limit(top)
+        query = query.where(KeywordMetric.keyword_id.in_(top_keywords))
+
+    return query.group_by(
+        KeywordMetric.keyword_id, Keyword.keyword, period
+    ).order_by(KeywordMetric.keyword_id, period)
+
+
+def _rollup(db: Session, site_id: int, source: str, target: str, cutoff: date):
+    """Fold `source` rows older than `cutoff` into `target` rows"""
+    dialect = db.get_bind().dialect.name
+    period = period_start(dialect, KeywordMetric.date, target)
+    impressions = func.sum(KeywordMetric.impressions)
+    clicks = func.sum(KeywordMetric.clicks)
+
+    aggregated = select(
+        KeywordMetric.keyword_id,
+        literal(target),
+        period,
+        KeywordMetric.site_id,
+        clicks,
+        impressions,
+        func.coalesce(clicks * 100.0 / func.nullif(impressions, 0), 0.0),
+        _weighted_position(impressions)
+    ).where(
+        KeywordMetric.site_id == site_id,
+        KeywordMetric.granularity == source,
+        KeywordMetric.date < cutoff
+    ).group_by(KeywordMetric.keyword_id, KeywordMetric.site_id, period)
+
+    stmt = _upsert_insert(db)(KeywordMetric).from_select(
+        ["keyword_id", "granularity", "date", "site_id", "clicks", "impressions", "ctr", "position"],
+        aggregated
+    )
+    # Merge into a period that already has a rolled-up row (late re-imports)
+    total_impressions = KeywordMetric.impressions + stmt.excluded.impressions
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[KeywordMetric.keyword_id, KeywordMetric.granularity, KeywordMetric.date],
+        set_={
+            "clicks": KeywordMetric.clicks + stmt.excluded.clicks,
+            "impressions": total_impressions,
+            "ctr": func.coalesce(
+                (KeywordMetric.clicks + stmt.excluded.clicks) * 100.0 / func.nullif(total_impressions, 0), 0.0
+            ),
+            "position": (
+                KeywordMetric.position * KeywordMetric.impressions
+                + stmt.excluded.position * stmt.excluded.impressions
+            ) / func.nullif(total_impressions, 0),
+        }
+    )
+    db.execute(stmt)
+
+    db.execute(
+        delete(KeywordMetric).where(
+            KeywordMetric.site_id == site_id,
+            KeywordMetric.granularity == source,
+            KeywordMetric.date < cutoff
+        )
+    )
+
+
+def _weighted_position(impressions):
+    """Impression-weighted average position, as GSC reports it"""
+    return func.sum(KeywordMetric.position * KeywordMetric.impressions) / func.nullif(impressions, 0)
+
+
+def _upsert_insert(db: Session):
+    """Return the dialect's INSERT construct that supports ON CONFLICT"""
+    dialect = db.get_bind().dialect.name
+    if dialect not in UPSERT_INSERTS:
+        raise ValueError(f"Keyword upsert is not supported on '{dialect}'")
+    return UPSERT_INSERTS[dialect]
+
+
+def _chunked(rows: Iterable[Dict], size: int) -> Iterator[List[Dict]]:
+    """Group a row stream into lists of at most `size` rows"""
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
@@ -0,0 +1,173 @@
+"""
+Link Checker
+Concurrent status, redirect chain and latency checks of a page's links
+
+Each link is requested with HEAD (GET when HEAD fails or is refused) and
+redirects are followed hop by hop, so the whole chain is recorded.
+Requests go through the process-wide probe limits of http_client (per
+host and overall rate, across concurrent analyses). Results are kept in
+an LRU/TTL cache, so links repeated on every page (navigation, footer)
+are requested once per TTL.
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+from urllib.parse import urldefrag, urljoin, urlparse
+
+import requests
+
+from ..core.cache import TTLCache
+from ..core.config import settings
+from .http_client import RequestDeadline, build_session, probe_request
+
+MAX_REDIRECTS = 10
+REDIRECT_STATUSES = (301, 302, 303, 307, 308)
+
+# Transient failures are cached for a shorter time than real answers
+ERROR_CACHE_TTL_SECONDS = 300
+
+link_cache = TTLCache(maxsize=settings.LINK_CHECK_CACHE_SIZE, ttl=settings.LINK_CHECK_CACHE_TTL_SECONDS)
+
+
+def extract_link_targets(soup, base_url: str, limit: int) -> List[str]:
+    """Unique http(s) targets of a page's <a href>, in page order"""
+    targets = {}
+    for anchor in soup.find_all('a', href=True):
+        href = anchor['href'].strip()
+        if not href or href.startswith('#'):
+            continue
+        url = urldefrag(urljoin(base_url, href))[0]
+        if urlparse(url).scheme in ('http', 'https'):
+            targets.setdefault(url, None)
+            if len(targets) >= limit:
+                break
+    return list(targets)
+
+
+def check_links(
+    urls: List[str],
+    time_budget: float,
+    request_timeout: float,
+    should_stop: Optional[Callable[[], bool]] = None
+) -> Dict[str, Dict]:
+    """
+    Check every URL (cached results first); returns URL -> result
+
+    Links not requested before the time budget runs out (or cancellation)
+    come back with "unchecked": True and are not cached.
+    """
+    results = {}
+    pending = []
+    for url in urls:
+        cached = link_cache.get(url)
+        if cached is not None:
+            results[url] = dict(cached, cached=True)
+        else:
+            pending.append(url)
+    if not pending:
+        return results
+
+    deadline = time.monotonic() + time_budget
+    workers = max(1, min(len(pending), settings.LINK_CHECK_WORKERS))
+
+    def check(url: str) -> Dict:
+        if should_stop and should_stop():
+            return _unchecked(url, "cancelled")
+        try:
+            result = check_link(session, url, request_timeout, deadline)
+        except RequestDeadline:
+            return _unchecked(url, "time budget exceeded")
+        link_cache.set(url, result, ttl=ERROR_CACHE_TTL_SECONDS if result["status"] is None else None)
+        return dict(result, cached=False)
+
+    with build_session(workers) as session, ThreadPoolExecutor(max_workers=workers) as pool:
+        for url, result in zip(pending, pool.map(check, pending)):
+            results[url] = result
+    return results
+
+
+def check_link(session: requests.Session, url: str, timeout: float, deadline: float) -> Dict:
+    """
+    Status of `url` after following its redirects, with every hop
+
+    "latency_ms" is the time spent on the requests themselves; the time
+    spent waiting for the host and rate limits is "queue_ms".
+    """
+    timings = {"queue": 0.0, "request": 0.0}
+    redirects = []
+    current = url
+    status = None
+    error = None
+
+    try:
+        for _ in range(MAX_REDIRECTS + 1):
+            response = probe_request(session, "HEAD", current, timeout, deadline, timings=timings)
+            # Many servers refuse or mishandle HEAD; confirm failures with GET
+            if response.status_code >= 400:
+                response = probe_request(session, "GET", current, timeout, deadline, timings=timings)
+
+            status = response.status_code
+            location = response.headers.get("Location")
+            if status not in REDIRECT_STATUSES or not location:
+                break
+
+            redirects.append({"url": current, "status": status})
+            current = urldefrag(urljoin(current, location))[0]
+            if current == url or any(hop["url"] == current for hop in redirects):
+                error = "redirect loop"
+                break
+        else:
+            error = "too many redirects"
+    except requests.exceptions.RequestException as e:
+        status = None
+        error = type(e).__name__
+
+    return {
+        "url": url,
+        "status": status,
+        "final_url": current,
+        "redirects": redirects,
+        "latency_ms": round(timings["request"] * 1000, 1),
+        "queue_ms": round(timings["queue"] * 1000, 1),
+        "error": error,
+        "broken": error is not None or status is None or status >= 400,
+    }
+
+
+def _unchecked(url: str, reason: str) -> Dict:
+    return {"url": url, "status": None, "unchecked": True, "error": reason, "broken": False}
+
+
+def link_check_summary(results: Dict[str, Dict], max_listed: int = 50) -> Dict:
+    """Counts plus the broken and redirected links (longest chains first)"""
+    checked = [result for result in results.values() if not result.get("unchecked")]
+    broken = [result for result in checked if result["broken"]]
+    redirected = sorted(
+        (result for result in checked if result["redirects"] and not result["broken"]),
+        key=lambda result: len(result["redirects"]),
+        reverse=True
+    )
+    fresh = [result for result in checked if not result.get("cached")]
+    latencies = [result["latency_ms"] for result in fresh]
+    queue_times = [result["queue_ms"] for result in fresh if "queue_ms" in result]
+
+    return {
+        "total": len(results),
+        "checked": len(checked),
+        "from_cache": sum(1 for result in checked if result.get("cached")),
+        "unchecked": len(results) - len(checked),
+        "broken": len(broken),
+        "redirected": len(redirected),
+        "max_redirect_hops": max((len(result["redirects"]) for result in checked), default=0),
+        "average_latency_ms": round(sum(latencies) / len(latencies), 1) if latencies else None,
+        "average_queue_ms": round(sum(queue_times) / len(queue_times), 1) if queue_times else None,
+        "broken_links": [
+            {key: result[key] for key in ("url", "status", "error", "redirects")}
+            for result in broken[:max_listed]
+        ],
+        "redirected_links": [
+            {key: result[key] for key in ("url", "status", "final_url", "redirects")}
+            for result in redirected[:max_listed]
+        ],
+    }
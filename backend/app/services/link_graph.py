@@ -0,0 +1,166 @@
+"""
+Internal Link Graph
+Compact CSR adjacency over integer page IDs with vectorized PageRank,
+click depth, orphan and hub detection
+
+Pages are numbered 0..n-1 (0 is the crawl root). The graph keeps two
+arrays: `indptr` (n + 1 offsets) and `indices` (target page of each link,
+grouped by source page). 100k pages with 3M links take about 20 MB and
+every metric is a handful of NumPy passes over the edge array.
+"""
+
+from typing import Dict, Sequence
+
+import numpy as np
+
+
+class LinkGraph:
+    """Directed internal link graph in CSR form (duplicate links and self-links dropped)"""
+
+    def __init__(self, num_pages: int, sources: np.ndarray, targets: np.ndarray):
+        self.num_pages = num_pages
+
+        sources = np.asarray(sources, dtype=np.int64)
+        targets = np.asarray(targets, dtype=np.int64)
+        keep = sources != targets
+
+        # One key per link; sorting orders links by source, then target, and
+        # puts duplicates next to each other (cheaper than np.unique)
+        keys = np.sort(sources[keep] * num_pages + targets[keep])
+        if len(keys):
+            first = np.empty(len(keys), dtype=bool)
+            first[0] = True
+            np.not_equal(keys[1:], keys[:-1], out=first[1:])
+            keys = keys[first]
+        edge_sources = (keys // num_pages).astype(np.int32)
+        self.indices = (keys % num_pages).astype(np.int32)
+
+        self.out_degree = np.bincount(edge_sources, minlength=num_pages).astype(np.int32)
+        self.in_degree = np.bincount(self.indices, minlength=num_pages).astype(np.int32)
+        self.indptr = np.zeros(num_pages + 1, dtype=np.int64)
+        np.cumsum(self.out_degree, out=self.indptr[1:])
+
+        # Source page of every link, in CSR order (for scatter-adds)
+        self._edge_sources = edge_sources
+
+    @property
+    def num_links(self) -> int:
+        return len(self.indices)
+
+    def pagerank(self, damping: float = 0.85, tol: float = 1e-6, max_iter: int = 100) -> np.ndarray:
+        """PageRank by power iteration; dangling pages spread their rank evenly"""
+        n = self.num_pages
+        if n == 0:
+            return np.zeros(0)
+
+        rank = np.full(n, 1.0 / n)
+        dangling = self.out_degree == 0
+        inverse_degree = np.zeros(n)
+        np.divide(1.0, self.out_degree, out=inverse_degree, where=~dangling)
+
+        for _ in range(max_iter):
+            share = rank * inverse_degree
+            incoming = np.bincount(self.indices, weights=share[self._edge_sources], minlength=n)
+            new_rank = (1.0 - damping) / n + damping * (incoming + rank[dangling].sum() / n)
+            converged = np.abs(new_rank - rank).sum() < tol
+            rank = new_rank
+            if converged:
+                break
+
+        return rank
+
+    def click_depth(self, root: int = 0) -> np.ndarray:
+        """Clicks from `root` to every page by breadth-first search (-1 = unreachable)"""
+        depth = np.full(self.num_pages, -1, dtype=np.int32)
+        if self.num_pages == 0:
+            return depth
+
+        depth[root] = 0
+        frontier = np.array([root], dtype=np.int64)
+        level = 0
+        while len(frontier):
+            level += 1
+            neighbors = self._neighbors(frontier)
+            neighbors = np.unique(neighbors[depth[neighbors] == -1])
+            depth[neighbors] = level
+            frontier = neighbors.astype(np.int64)
+
+        return depth
+
+    def orphans(self, root: int = 0) -> np.ndarray:
+        """Pages no other page links to (the root is not counted)"""
+        orphan = self.in_degree == 0
+        if self.num_pages:
+            orphan[root] = False
+        return np.flatnonzero(orphan)
+
+    def hubs(self, top: int = 10) -> np.ndarray:
+        """Pages with the most outgoing internal links, most first"""
+        return top_pages(self.out_degree, top)
+
+    def _neighbors(self, pages: np.ndarray) -> np.ndarray:
+        """Concatenated link targets of `pages` (CSR row gather without a Python loop)"""
+        starts = self.indptr[pages]
+        lengths = self.indptr[pages + 1] - starts
+        total = int(lengths.sum())
+        if total == 0:
+            return np.zeros(0, dtype=np.int32)
+        # Position of each gathered link: its row start plus its offset in the row
+        offsets = np.arange(total) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+        return self.indices[np.repeat(starts, lengths) + offsets]
+
+
+def top_pages(values: np.ndarray, top: int) -> np.ndarray:
+    """Indexes of the `top` largest values, largest first"""
+    count = min(top, len(values))
+    if count == 0:
+        return np.zeros(0, dtype=np.int64)
+    candidates = np.argpartition(-values, count - 1)[:count]
+    return candidates[np.argsort(-values[candidates], kind="stable")]
+
+
+def link_graph_metrics(graph: LinkGraph, urls: Sequence[str], top: int = 10, max_pages: int = 1000) -> Dict:
+    """
+    Site structure summary for the score breakdown
+
+    Per-page metrics are listed for at most `max_pages` pages, highest
+    PageRank first.
+    """
+    n = graph.num_pages
+    rank = graph.pagerank()
+    depth = graph.click_depth()
+    orphans = graph.orphans()
+    hubs = graph.hubs(top)
+
+    reachable = depth >= 0
+    depth_counts = np.bincount(depth[reachable]) if reachable.any() else np.zeros(0, dtype=np.int64)
+    # PageRank normalized so that an average page scores 1.0
+    relative_rank = rank * n if n else rank
+
+    def page(index: int) -> Dict:
+        return {
+            "url": urls[index],
+            "depth": int(depth[index]) if depth[index] >= 0 else None,
+            "inlinks": int(graph.in_degree[index]),
+            "outlinks": int(graph.out_degree[index]),
+            "pagerank": round(float(relative_rank[index]), 3),
+        }
+
+    root_percentile = float((rank < rank[0]).mean() * 100) if n else None
+
+    return {
+        "pages": n,
+        "links": graph.num_links,
+        "max_depth": int(depth.max()) if n else 0,
+        "depth_distribution": {str(level): int(count) for level, count in enumerate(depth_counts)},
+        "unreachable_pages": int((~reachable).sum()),
+        "within_3_clicks_ratio": round(float((reachable & (depth <= 3)).mean()), 3) if n else 0.0,
+        "orphan_count": int(len(orphans)),
+        "orphan_ratio": round(len(orphans) / n, 3) if n else 0.0,
+        "orphan_pages": [urls[i] for i in orphans[:top * 5]],
+        "hub_pages": [page(int(i)) for i in hubs],
+        "top_pagerank_pages": [page(int(i)) for i in top_pages(rank, top)],
+        "root": dict(page(0), pagerank_percentile=round(root_percentile, 1)) if n else None,
+        "page_metrics": [page(int(i)) for i in top_pages(rank, max_pages)],
+    }
+
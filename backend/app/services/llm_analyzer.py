@@ -3,7 +3,6 @@ LLM-Powered SEO Analysis Service
 Uses Google Gemini AI to provide professional-grade, detailed SEO insights
 """
 
-import google.generativeai as genai
 from typing import Dict, List, Optional
 import json
 from ..core.config import settings
@@ -15,7 +14,17 @@ class LLMAnalyzer:
     def __init__(self):
         self.client = None
         if settings.GEMINI_API_KEY:
-            genai.configure(api_key=settings.GEMINI_API_KEY)
+            # Imported here: the SDK is heavy and only needed with an API key
+            import google.generativeai as genai
+
+            if settings.GEMINI_API_ENDPOINT:
+                genai.configure(
+                    api_key=settings.GEMINI_API_KEY,
+                    transport="rest",
+                    client_options={"api_endpoint": settings.GEMINI_API_ENDPOINT}
+                )
+            else:
+                genai.configure(api_key=settings.GEMINI_API_KEY)
             # Use the latest Gemini 2.5 Pro model
             self.client = genai.GenerativeModel('models/gemini-2.5-pro')
         self.generation_config = {
@@ -25,7 +34,7 @@ class LLMAnalyzer:
             'max_output_tokens': 8192,
         }
 
-    def _call_gemini(self, prompt: str) -> Dict:
+    def _call_gemini(self, prompt: str, timeout: Optional[float] = None) -> Dict:
         """Call Gemini API and parse JSON response"""
         if not self.client:
             return {}
@@ -33,7 +42,8 @@ class LLMAnalyzer:
         try:
             response = self.client.generate_content(
                 prompt,
-                generation_config=self.generation_config
+                generation_config=self.generation_config,
+                request_options={"timeout": timeout} if timeout else None
             )
 
             # Extract JSON from response
@@ -54,7 +64,8 @@ class LLMAnalyzer:
         self,
         technical_data: Dict,
         html_snippet: str,
-        url: str
+        url: str,
+        timeout: Optional[float] = None
     ) -> Dict:
         """
         Deep technical SEO analysis
@@ -126,7 +137,7 @@ HTML抜粋:
 
 必ず有効なJSON形式で回答してください。"""
 
-        result = self._call_gemini(prompt)
+        result = self._call_gemini(prompt, timeout)
         return result if result else self._fallback_technical_analysis(technical_data)
 
     def analyze_content_seo(
@@ -135,7 +146,8 @@ HTML抜粋:
         page_text: str,
         url: str,
         title: str,
-        meta_description: Optional[str]
+        meta_description: Optional[str],
+        timeout: Optional[float] = None
     ) -> Dict:
         """Deep content SEO analysis"""
 
@@ -210,14 +222,15 @@ URL: {url}
 
 必ず有効なJSON形式で回答してください。"""
 
-        result = self._call_gemini(prompt)
+        result = self._call_gemini(prompt, timeout)
         return result if result else self._fallback_content_analysis(content_data)
 
     def analyze_ux_seo(
         self,
         ux_data: Dict,
         html_snippet: str,
-        url: str
+        url: str,
+        timeout: Optional[float] = None
     ) -> Dict:
         """Deep UX and Core Web Vitals analysis"""
 
@@ -290,14 +303,15 @@ HTML抜粋:
 
 必ず有効なJSON形式で回答してください。"""
 
-        result = self._call_gemini(prompt)
+        result = self._call_gemini(prompt, timeout)
         return result if result else self._fallback_ux_analysis(ux_data)
 
     def analyze_authority_seo(
         self,
         html_snippet: str,
         url: str,
-        domain: str
+        domain: str,
+        timeout: Optional[float] = None
     ) -> Dict:
         """Deep authority and trust signals analysis"""
 
@@ -386,14 +400,15 @@ HTML抜粋:
 
 必ず有効なJSON形式で回答してください。"""
 
-        result = self._call_gemini(prompt)
+        result = self._call_gemini(prompt, timeout)
         return result if result else self._fallback_authority_analysis()
 
     def generate_action_plan(
         self,
         all_analyses: Dict,
         site_url: str,
-        current_score: float
+        current_score: float,
+        timeout: Optional[float] = None
     ) -> Dict:
         """Generate comprehensive, prioritized action plan"""
 
@@ -447,9 +462,69 @@ HTML抜粋:
 
 必ず有効なJSON形式で回答してください。"""
 
-        result = self._call_gemini(prompt)
+        result = self._call_gemini(prompt, timeout)
         return result if result else self._fallback_action_plan(current_score)
 
+    def summarize_competitor_gaps(
+        self,
+        site_url: str,
+        comparison: Dict,
+        timeout: Optional[float] = None
+    ) -> Dict:
+        """Summarize where a site falls behind its competitors (one call per comparison)"""
+
+        if not self.client:
+            return self._fallback_competitor_gaps()
+
+        # Scores and the largest rule-level gaps only; the pages themselves
+        # are not sent
+        targets = "\n".join(
+            f"- {target['url']} ({'自サイト' if target['role'] == 'site' else '競合'}): "
+            + (f"総合 {target['total_score']}, 技術 {target['technical_score']}, "
+               f"コンテンツ {target['content_score']}, UX {target['user_experience_score']}, "
+               f"権威性 {target['authority_score']}"
+               if target.get("error") is None else "取得失敗")
+            for target in comparison["targets"]
+        )
+        gaps = "\n".join(
+            f"- [{gap['category']}] {gap['description']}: 自サイト {gap['site_points']}点 / "
+            f"競合最高 {gap['best_points']}点 (満点 {gap['max_points']}点, 上回る競合 {gap['competitors_ahead']}サイト)"
+            for gap in comparison["gaps"][:15]
+        ) or "- なし"
+
+        prompt = f"""あなたはプロフェッショナルなSEOコンサルタントです。
+以下は自サイトと競合サイトのルールベースのSEOスコア比較です。
+
+自サイトURL: {site_url}
+
+【スコア】
+{targets}
+
+【自サイトが競合に劣る項目】
+{gaps}
+
+自サイトが競合に追いつき、追い越すための分析を以下の形式でJSON回答してください:
+
+{{
+  "overall_assessment": "競合と比べた現状の総合評価（3-4文）",
+  "key_gaps": [
+    {{
+      "title": "差の大きい項目",
+      "category": "technical/content/ux/authority",
+      "priority": "high/medium/low",
+      "competitor_example": "参考になる競合サイトの状態",
+      "recommendation": "具体的な改善策"
+    }}
+  ],
+  "strengths": ["自サイトが競合より優れている点"],
+  "quick_wins": ["すぐに差を縮められる改善案"]
+}}
+
+必ず有効なJSON形式で回答してください。"""
+
+        result = self._call_gemini(prompt, timeout)
+        return result if result else self._fallback_competitor_gaps()
+
     # Fallback methods when LLM is not available
     def _fallback_technical_analysis(self, technical_data: Dict) -> Dict:
         return {
@@ -511,3 +586,11 @@ HTML抜粋:
             "long_term_strategy": "",
             "monitoring_recommendations": []
         }
+
+    def _fallback_competitor_gaps(self) -> Dict:
+        return {
+            "overall_assessment": "LLM分析が利用できません。ルールベースの比較結果のみ表示しています。",
+            "key_gaps": [],
+            "strengths": [],
+            "quick_wins": []
+        }
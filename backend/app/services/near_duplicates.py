@@ -0,0 +1,221 @@
+"""
+Near-Duplicate Content Detection
+MinHash fingerprints of a page's main text and an LSH index that groups
+near-duplicate pages without comparing every pair
+
+Text is split into tokens (Latin words, and single characters for
+Japanese and other scripts written without spaces), tokens into 5-token
+shingles, and each page is reduced to 128 minimum hash values. The share
+of equal values estimates the Jaccard similarity of two pages' shingle
+sets. The LSH index buckets signatures by bands of 8 values, so only pages
+sharing a bucket are compared.
+"""
+
+import base64
+import re
+import zlib
+from typing import Dict, Hashable, Iterable, List, Optional
+
+import lxml.html
+import numpy as np
+
+NUM_PERMUTATIONS = 128
+BANDS = 16  # 16 bands of 8 rows: pages at 0.8 similarity collide in ~95% of cases
+SHINGLE_SIZE = 5
+
+# Elements that hold no page-specific text
+BOILERPLATE_TAGS = ("script", "style", "noscript", "template", "svg", "nav", "header", "footer", "aside", "form")
+
+TOKEN = re.compile(r"[0-9a-z\u00c0-\u024f]+|[^\W\d_]")
+
+_MERSENNE_PRIME = np.uint64((1 << 31) - 1)
+_SHINGLE_BASE = np.uint32(1000003)
+
+# Fixed permutations, so fingerprints stay comparable across processes and analyses
+_rng = np.random.default_rng(20240611)
+_PERM_A = _rng.integers(1, (1 << 31) - 1, size=NUM_PERMUTATIONS, dtype=np.uint64)
+_PERM_B = _rng.integers(0, (1 << 31) - 1, size=NUM_PERMUTATIONS, dtype=np.uint64)
+del _rng
+
+
+def main_text(html: str) -> str:
+    """Visible text of <main> / <article> (or <body>) without navigation and scripts"""
+    try:
+        document = lxml.html.fromstring(html)
+    except (ValueError, lxml.etree.ParserError):
+        return ""
+
+    for element in list(document.iter(*BOILERPLATE_TAGS)):
+        element.drop_tree()
+    main = document.find(".//main")
+    if main is None:
+        main = document.find(".//article")
+    if main is None:
+        main = document.find(".//body")
+    return (main if main is not None else document).text_content()
+
+
+def shingle_hashes(text: str, size: int = SHINGLE_SIZE) -> np.ndarray:
+    """32-bit hashes of every run of `size` consecutive tokens"""
+    tokens = TOKEN.findall(text.lower())
+    if not tokens:
+        return np.zeros(0, dtype=np.uint32)
+
+    token_hashes = np.fromiter((zlib.crc32(token.encode()) for token in tokens), dtype=np.uint32, count=len(tokens))
+    if len(tokens) < size:
+        size = len(tokens)
+
+    # Polynomial hash over each window, in uint32 arithmetic (wraps around)
+    count = len(tokens) - size + 1
+    hashes = np.zeros(count, dtype=np.uint32)
+    for offset in range(size):
+        hashes *= _SHINGLE_BASE
+        hashes += token_hashes[offset:offset + count]
+    return np.unique(hashes)
+
+
+def minhash(hashes: np.ndarray) -> Optional[np.ndarray]:
+    """MinHash signature (NUM_PERMUTATIONS uint32 values); None for empty text"""
+    if len(hashes) == 0:
+        return None
+
+    values = hashes.astype(np.uint64) % _MERSENNE_PRIME
+    signature = np.empty(NUM_PERMUTATIONS, dtype=np.uint32)
+    # a * x stays below 2**62, so uint64 never overflows; chunked to bound memory
+    for start in range(0, NUM_PERMUTATIONS, 32):
+        a = _PERM_A[start:start + 32, None]
+        b = _PERM_B[start:start + 32, None]
+        signature[start:start + 32] = ((a * values + b) % _MERSENNE_PRIME).min(axis=1)
+    return signature
+
+
+def page_fingerprint(html: str) -> Optional[np.ndarray]:
+    """MinHash signature of a page's main text"""
+    return minhash(shingle_hashes(main_text(html)))
+
+
+def similarity(a: np.ndarray, b: np.ndarray) -> float:
+    """Estimated Jaccard similarity of two signatures"""
+    return float(np.count_nonzero(a == b)) / len(a)
+
+
+def encode_fingerprint(signature: Optional[np.ndarray]) -> Optional[str]:
+    """Signature as base64 text for JSON columns"""
+    if signature is None:
+        return None
+    return base64.b64encode(signature.astype("<u4").tobytes()).decode("ascii")
+
+
+def decode_fingerprint(value: Optional[str]) -> Optional[np.ndarray]:
+    if not value:
+        return None
+    return np.frombuffer(base64.b64decode(value), dtype="<u4").astype(np.uint32)
+
+
+class MinHashLSH:
+    """Banded LSH index over MinHash signatures"""
+
+    def __init__(self, bands: int = BANDS):
+        self.bands = bands
+        self.rows = NUM_PERMUTATIONS // bands
+        self.signatures: Dict[Hashable, np.ndarray] = {}
+        self._buckets: List[Dict[bytes, List[Hashable]]] = [{} for _ in range(bands)]
+
+    def add(self, key: Hashable, signature: np.ndarray):
+        self.signatures[key] = signature
+        for band, bucket in enumerate(self._band_keys(signature)):
+            self._buckets[band].setdefault(bucket, []).append(key)
+
+    def query(self, signature: np.ndarray, threshold: float) -> List[Hashable]:
+        """Indexed keys whose signature is at least `threshold` similar"""
+        candidates = set()
+        for band, bucket in enumerate(self._band_keys(signature)):
+            candidates.update(self._buckets[band].get(bucket, ()))
+        return [key for key in candidates if similarity(signature, self.signatures[key]) >= threshold]
+
+    def clusters(self, threshold: float) -> List[List[Hashable]]:
+        """
+        Groups of near-duplicate keys (2 or more members), largest first
+
+        Only keys sharing a bucket are compared; a key joins a group when it
+        is `threshold` similar to a member that represents the group in
+        that bucket, so identical template pages cost one comparison each.
+        """
+        parent = {key: key for key in self.signatures}
+
+        def find(key):
+            while parent[key] != key:
+                parent[key] = parent[parent[key]]
+                key = parent[key]
+            return key
+
+        for buckets in self._buckets:
+            for members in buckets.values():
+                if len(members) < 2:
+                    continue
+                representatives = []
+                for key in members:
+                    for representative in representatives:
+                        if find(key) == find(representative):
+                            break
+                        if similarity(self.signatures[key], self.signatures[representative]) >= threshold:
+                            parent[find(key)] = find(representative)
+                            break
+                    else:
+                        representatives.append(key)
+
+        groups: Dict[Hashable, List[Hashable]] = {}
+        for key in self.signatures:
+            groups.setdefault(find(key), []).append(key)
+        return sorted((group for group in groups.values() if len(group) > 1), key=len, reverse=True)
+
+    def _band_keys(self, signature: np.ndarray) -> Iterable[bytes]:
+        data = signature.tobytes()
+        width = self.rows * signature.itemsize
+        return (data[band * width:(band + 1) * width] for band in range(self.bands))
+
+
+def duplicate_summary(
+    urls: List[str],
+    signatures: Dict[int, np.ndarray],
+    threshold: float,
+    max_clusters: int = 50,
+    max_urls: int = 20
+) -> Dict:
+    """
+    Near-duplicate clusters of crawled pages (page IDs index `urls`)
+
+    Cluster IDs number the clusters from 1, largest first; "page_clusters"
+    maps every clustered URL to its cluster.
+    """
+    index = MinHashLSH()
+    for page_id, signature in signatures.items():
+        index.add(page_id, signature)
+    clusters = index.clusters(threshold)
+
+    page_clusters = {}
+    summaries = []
+    for cluster_id, members in enumerate(clusters, start=1):
+        members.sort()
+        for page_id in members:
+            page_clusters[urls[page_id]] = cluster_id
+        if cluster_id <= max_clusters:
+            first = signatures[members[0]]
+            summaries.append({
+                "cluster_id": cluster_id,
+                "size": len(members),
+                "min_similarity": round(min(similarity(first, signatures[page_id]) for page_id in members[1:]), 3),
+                "urls": [urls[page_id] for page_id in members[:max_urls]],
+            })
+
+    fingerprinted = len(signatures)
+    duplicate_pages = len(page_clusters)
+    return {
+        "threshold": threshold,
+        "pages_fingerprinted": fingerprinted,
+        "cluster_count": len(clusters),
+        "duplicate_pages": duplicate_pages,
+        "duplicate_ratio": round(duplicate_pages / fingerprinted, 3) if fingerprinted else 0.0,
+        "clusters": summaries,
+        "page_clusters": page_clusters,
+    }
@@ -12,7 +12,7 @@ class PageSpeedService:
     """Service for interacting with Google PageSpeed Insights API"""
 
     def __init__(self):
-        self.api_url = "https://www.googleapis.com/pagespeedonline/v5/runPagespeed"
+        self.api_url = settings.PAGESPEED_API_URL
         self.api_key = settings.PAGESPEED_API_KEY
 
     def analyze_url(self, url: str, strategy: str = "mobile") -> Dict:
@@ -0,0 +1,159 @@
+"""
+Parse Pool
+Parsing and DOM extraction of fetched pages in worker processes
+
+BeautifulSoup parsing and the DOM walks behind scoring are pure Python
+and hold the GIL, so concurrent analyses in threads share a single core
+for them. With PARSE_POOL_WORKERS > 0 they run in a process pool instead:
+the page's raw bytes go in, and a small picklable record comes back (the
+page signals scoring reads, its content fingerprint, link targets,
+subresources and the LLM inputs). Fetching, probing, crawling and the LLM
+calls stay in the analysis threads. With 0 workers the same functions run
+in the calling thread.
+
+Workers are spawned (not forked: the API process runs threads) on first
+use and warm up the parsing modules. A pool broken by a dead worker is
+replaced on the next submission.
+"""
+
+import multiprocessing
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Dict, Optional
+
+from ..core.config import settings
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def parse_page(
+    content: bytes,
+    encoding: Optional[str],
+    url: str,
+    link_limit: int = 0,
+    resource_limit: int = 0,
+    llm_inputs: bool = False
+) -> Dict:
+    """
+    Parse a fetched page once and extract everything the analysis reads
+    from its HTML
+
+    `content` is decoded with `encoding` like requests' Response.text;
+    `url` is the final URL, against which links and resources resolve.
+    Link targets and resources are extracted only when their limit is set,
+    the HTML snippet and page text only with `llm_inputs`.
+    """
+    from bs4 import BeautifulSoup
+    from .near_duplicates import encode_fingerprint, page_fingerprint
+    from .scoring import page_signals
+
+    html = _decode(content, encoding)
+    soup = BeautifulSoup(html, 'lxml')
+    page = {
+        "signals": page_signals(soup),
+        "content_fingerprint": encode_fingerprint(page_fingerprint(html)),
+    }
+    if link_limit > 0:
+        from .link_checker import extract_link_targets
+        page["link_targets"] = extract_link_targets(soup, url, link_limit)
+    if resource_limit > 0:
+        from .resource_audit import collect_resources
+        page["resources"] = collect_resources(soup, url, resource_limit)
+    if llm_inputs:
+        page["html_snippet"] = str(soup)[:5000]  # Limit HTML size
+        page["page_text"] = soup.get_text()
+    return page
+
+
+def parse_response(response, link_limit: int = 0, resource_limit: int = 0, llm_inputs: bool = False) -> Future:
+    """Parse a requests.Response (or SnapshotResponse) with parse_page; see submit"""
+    if response.encoding is None:
+        # Detected once; response.text then decodes with it as well
+        response.encoding = response.apparent_encoding
+    return submit(
+        parse_page, response.content, response.encoding, response.url,
+        link_limit, resource_limit, llm_inputs
+    )
+
+
+def submit(fn: Callable, *args) -> Future:
+    """
+    Run `fn(*args)` in the parse pool, or right away in this thread when
+    the pool is off; `fn` must be a module-level function and its
+    arguments and result picklable
+    """
+    pool = get_parse_pool()
+    if pool is not None:
+        try:
+            future = pool.submit(fn, *args)
+            future.add_done_callback(lambda done: _discard_if_broken(pool, done))
+            return future
+        except BrokenProcessPool:
+            _discard(pool)
+            pool = get_parse_pool()
+            if pool is not None:
+                return pool.submit(fn, *args)
+
+    future = Future()
+    try:
+        future.set_result(fn(*args))
+    except Exception as e:
+        future.set_exception(e)
+    return future
+
+
+def get_parse_pool() -> Optional[ProcessPoolExecutor]:
+    """The shared pool, started on first use; None when PARSE_POOL_WORKERS is 0"""
+    global _pool
+    if settings.PARSE_POOL_WORKERS <= 0:
+        return None
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=settings.PARSE_POOL_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_warm_up
+            )
+        return _pool
+
+
+def shutdown_parse_pool():
+    """Stop the workers (application shutdown)"""
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+def _discard_if_broken(pool: ProcessPoolExecutor, future: Future):
+    if not future.cancelled() and isinstance(future.exception(), BrokenProcessPool):
+        _discard(pool)
+
+
+def _discard(pool: ProcessPoolExecutor):
+    """Forget a broken pool, so the next submission starts a new one"""
+    global _pool
+    with _pool_lock:
+        if _pool is not pool:
+            return
+        _pool = None
+    print("Parse pool worker died; restarting the pool", flush=True)
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _decode(content: bytes, encoding: Optional[str]) -> str:
+    """Bytes to text the way requests' Response.text does it"""
+    try:
+        return str(content, encoding or "utf-8", errors="replace")
+    except (LookupError, TypeError):
+        return str(content, errors="replace")
+
+
+def _warm_up():
+    """Import the parsing modules once per worker, not on its first page"""
+    import bs4  # noqa: F401
+    import lxml.etree  # noqa: F401
+    from . import link_checker, near_duplicates, resource_audit, scoring  # noqa: F401
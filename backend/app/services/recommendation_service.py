@@ -0,0 +1,217 @@
+"""
+Recommendation Service
+Builds improvement recommendations from an analysis and persists them as
+Recommendation rows when the analysis completes
+"""
+
+import re
+from typing import Dict, List, Optional
+from sqlalchemy.orm import Session
+
+from ..models.site import Analysis, Recommendation
+
+# Map LLM action plan vocabulary onto the Recommendation columns
+LLM_PRIORITY_MAP = {
+    "critical": "high",
+    "high": "high",
+    "medium": "medium",
+    "low": "low",
+}
+
+LLM_CATEGORY_MAP = {
+    "technical": "technical",
+    "content": "content",
+    "ux": "user_experience",
+    "user_experience": "user_experience",
+    "authority": "authority",
+}
+
+
+def generate_recommendations(analysis: Analysis) -> List[Dict]:
+    """Generate recommendations based on analysis scores"""
+    recommendations = []
+
+    # Technical recommendations
+    if analysis.technical_score < 70:
+        if not analysis.has_ssl:
+            recommendations.append({
+                "title": "Enable HTTPS/SSL",
+                "description": "Your site is not using HTTPS. This is critical for security and SEO.",
+                "priority": "high",
+                "difficulty": "moderate",
+                "expected_impact": 15,
+                "category": "technical"
+            })
+
+        if not analysis.has_sitemap:
+            recommendations.append({
+                "title": "Create XML Sitemap",
+                "description": "Add an XML sitemap to help search engines discover and index your pages.",
+                "priority": "high",
+                "difficulty": "easy",
+                "expected_impact": 10,
+                "category": "technical"
+            })
+
+    # Content recommendations
+    if analysis.content_score < 70:
+        if not analysis.meta_title or len(analysis.meta_title) < 30:
+            recommendations.append({
+                "title": "Optimize Meta Title",
+                "description": "Your meta title is missing or too short. Aim for 50-60 characters with target keywords.",
+                "priority": "high",
+                "difficulty": "easy",
+                "expected_impact": 12,
+                "category": "content"
+            })
+
+        if analysis.h1_count != 1:
+            recommendations.append({
+                "title": "Fix H1 Tag Structure",
+                "description": f"Your page has {analysis.h1_count} H1 tags. There should be exactly one H1 per page.",
+                "priority": "medium",
+                "difficulty": "easy",
+                "expected_impact": 8,
+                "category": "content"
+            })
+
+    # UX recommendations
+    if analysis.user_experience_score < 70:
+        if not analysis.mobile_friendly:
+            recommendations.append({
+                "title": "Make Site Mobile-Friendly",
+                "description": "Add a responsive viewport meta tag and ensure mobile optimization.",
+                "priority": "high",
+                "difficulty": "moderate",
+                "expected_impact": 15,
+                "category": "user_experience"
+            })
+
+    # PageSpeed recommendations
+    if analysis.pagespeed_mobile_score and analysis.pagespeed_mobile_score < 50:
+        if analysis.largest_contentful_paint and analysis.largest_contentful_paint > 2.5:
+            recommendations.append({
+                "title": "Improve Largest Contentful Paint (LCP)",
+                "description": f"Your LCP is {analysis.largest_contentful_paint:.2f}s. Target is under 2.5s. Optimize images and server response time.",
+                "priority": "high",
+                "difficulty": "moderate",
+                "expected_impact": 10,
+                "category": "user_experience"
+            })
+
+    return recommendations
+
+
+def extract_action_plan_recommendations(action_plan: Optional[Dict]) -> List[Dict]:
+    """Convert the priority actions of an LLM action plan into recommendations"""
+    if not action_plan:
+        return []
+
+    recommendations = []
+    for action in action_plan.get("priority_actions") or []:
+        if not isinstance(action, dict) or not action.get("title"):
+            continue
+
+        steps = [str(step) for step in action.get("steps") or []]
+        category = str(action.get("category", "")).split("/")[0].strip().lower()
+
+        recommendations.append({
+            "title": str(action["title"]),
+            "description": "\n".join(steps) if steps else str(action["title"]),
+            "priority": LLM_PRIORITY_MAP.get(str(action.get("priority", "")).lower(), "medium"),
+            "difficulty": _effort_to_difficulty(action.get("effort")),
+            "expected_impact": _parse_number(action.get("expected_impact")) or 0.0,
+            "category": LLM_CATEGORY_MAP.get(category, "technical"),
+            "implementation_guide": "\n".join(f"{i}. {step}" for i, step in enumerate(steps, 1)) or None,
+            "external_resources": action.get("required_resources") or None,
+        })
+
+    return recommendations
+
+
+def persist_recommendations(
+    db: Session,
+    analysis: Analysis,
+    previous_analysis_id: Optional[int] = None
+) -> List[Recommendation]:
+    """
+    Materialize the recommendations of a completed analysis
+
+    Rule-based recommendations come first, followed by the ones extracted
+    from llm_action_plan. A recommendation that was marked completed on the
+    previous analysis of the site (same category and title) stays completed.
+    The caller commits.
+    """
+    completed = {}
+    if previous_analysis_id is not None:
+        rows = db.query(
+            Recommendation.category, Recommendation.title, Recommendation.completed_at
+        ).filter(
+            Recommendation.analysis_id == previous_analysis_id,
+            Recommendation.is_completed == True  # noqa: E712
+        ).all()
+        completed = {(row.category, row.title): row.completed_at for row in rows}
+
+    candidates = [("rule", rec) for rec in generate_recommendations(analysis)]
+    candidates += [("llm", rec) for rec in extract_action_plan_recommendations(analysis.llm_action_plan)]
+
+    records = []
+    for source, rec in candidates:
+        key = (rec["category"], rec["title"])
+        records.append(Recommendation(
+            site_id=analysis.site_id,
+            analysis_id=analysis.id,
+            source=source,
+            title=rec["title"],
+            description=rec["description"],
+            priority=rec["priority"],
+            difficulty=rec["difficulty"],
+            expected_impact=rec["expected_impact"],
+            category=rec["category"],
+            implementation_guide=rec.get("implementation_guide"),
+            external_resources=rec.get("external_resources"),
+            is_completed=key in completed,
+            completed_at=completed.get(key),
+        ))
+
+    db.add_all(records)
+    return records
+
+
+def recommendation_to_dict(recommendation: Recommendation) -> Dict:
+    """
+    Immutable view of a stored recommendation, as embedded in analysis results
+
+    Completion status is left out on purpose: it changes after the analysis
+    finished and is served by the recommendations endpoint instead.
+    """
+    return {
+        "id": recommendation.id,
+        "title": recommendation.title,
+        "description": recommendation.description,
+        "priority": recommendation.priority,
+        "difficulty": recommendation.difficulty,
+        "expected_impact": recommendation.expected_impact,
+        "category": recommendation.category,
+        "source": recommendation.source,
+    }
+
+
+def _effort_to_difficulty(effort) -> str:
+    """Map a 1-5 effort rating onto easy/moderate/complex"""
+    value = _parse_number(effort)
+    if value is None:
+        return "moderate"
+    if value <= 2:
+        return "easy"
+    if value <= 3:
+        return "moderate"
+    return "complex"
+
+
+def _parse_number(value) -> Optional[float]:
+    """Parse the first number out of an LLM-provided value such as '7' or '5-8'"""
+    if isinstance(value, (int, float)):
+        return float(value)
+    match = re.search(r"\d+(\.\d+)?", str(value or ""))
+    return float(match.group()) if match else None
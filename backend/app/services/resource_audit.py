@@ -0,0 +1,210 @@
+"""
+Resource Audit
+Page weight and render-blocking bytes from the sizes of a page's
+subresources
+
+Scripts, stylesheets, images and fonts are collected from the parsed DOM
+and their sizes probed concurrently: HEAD for Content-Length, then a
+one-byte ranged GET for the total in Content-Range. Probes go through the
+process-wide limits of http_client and sizes are cached per resource URL
+across analyses, so shared CDN assets are probed once per TTL. Resources
+whose size cannot be found are estimated from the known ones of the same
+type.
+"""
+
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+from urllib.parse import urldefrag, urljoin, urlparse
+
+import requests
+
+from ..core.cache import TTLCache
+from ..core.config import settings
+from .http_client import RequestDeadline, build_session, probe_request
+
+RESOURCE_TYPES = ("script", "stylesheet", "image", "font")
+
+# Sizes assumed when no resource of a type could be sized (bytes)
+TYPICAL_BYTES = {"script": 30000, "stylesheet": 15000, "image": 60000, "font": 30000}
+
+# Failed probes are cached for a shorter time than known sizes
+ERROR_CACHE_TTL_SECONDS = 300
+
+CONTENT_RANGE_TOTAL = re.compile(r"/\s*(\d+)\s*$")
+FONT_URL = re.compile(r"url\(\s*['\"]?([^'\")]+\.(?:woff2?|ttf|otf|eot)(?:\?[^'\")]*)?)['\"]?\s*\)", re.IGNORECASE)
+
+resource_cache = TTLCache(maxsize=settings.RESOURCE_AUDIT_CACHE_SIZE, ttl=settings.RESOURCE_AUDIT_CACHE_TTL_SECONDS)
+
+
+def collect_resources(soup, base_url: str, limit: int) -> List[Dict]:
+    """
+    Unique subresources of a page: url, type and whether they block rendering
+
+    Blocking: stylesheets (except print-only ones) and classic scripts in
+    <head> without async or defer. data: URIs are marked "inline" and sized
+    from their length; their bytes are part of the HTML already.
+    """
+    resources = {}
+
+    def add(src: Optional[str], kind: str, blocking: bool = False):
+        if not src or len(resources) >= limit:
+            return
+        src = src.strip()
+        if src.startswith("data:"):
+            resources.setdefault(src, {"url": src[:64], "type": kind, "render_blocking": False,
+                                       "bytes": len(src), "inline": True})
+            return
+        url = urldefrag(urljoin(base_url, src))[0]
+        if urlparse(url).scheme in ("http", "https"):
+            resources.setdefault(url, {"url": url, "type": kind, "render_blocking": blocking})
+
+    head = soup.head
+    for script in soup.find_all("script", src=True):
+        deferred = script.has_attr("async") or script.has_attr("defer") or script.get("type") == "module"
+        add(script["src"], "script", blocking=not deferred and head is not None and head in script.parents)
+
+    for link in soup.find_all("link", href=True):
+        rel = [value.lower() for value in link.get("rel") or []]
+        if "stylesheet" in rel:
+            media = (link.get("media") or "all").lower()
+            add(link["href"], "stylesheet", blocking=media != "print" and not link.has_attr("disabled"))
+        elif "preload" in rel and link.get("as") == "font":
+            add(link["href"], "font")
+        elif "preload" in rel and link.get("as") == "image":
+            add(link["href"], "image")
+
+    for image in soup.find_all("img"):
+        add(image.get("src") or image.get("data-src"), "image")
+
+    for style in soup.find_all("style"):
+        for font_url in FONT_URL.findall(style.get_text()):
+            add(font_url, "font")
+
+    return list(resources.values())
+
+
+def probe_sizes(
+    resources: List[Dict],
+    time_budget: float,
+    request_timeout: float,
+    should_stop: Optional[Callable[[], bool]] = None
+) -> List[Dict]:
+    """Fill in "bytes" (None when unknown) and "cached" for every resource"""
+    pending = []
+    for resource in resources:
+        if "bytes" in resource:
+            resource["cached"] = False
+            continue
+        cached = resource_cache.get(resource["url"])
+        if cached is not None:
+            resource.update(cached, cached=True)
+        else:
+            pending.append(resource)
+    if not pending:
+        return resources
+
+    deadline = time.monotonic() + time_budget
+    workers = max(1, min(len(pending), settings.RESOURCE_AUDIT_WORKERS))
+
+    def probe(resource: Dict):
+        resource["cached"] = False
+        if should_stop and should_stop():
+            resource["bytes"] = None
+            return
+        try:
+            size = probe_size(session, resource["url"], request_timeout, deadline)
+        except RequestDeadline:
+            resource["bytes"] = None
+            return
+        resource.update(size)
+        resource_cache.set(resource["url"], size, ttl=ERROR_CACHE_TTL_SECONDS if size["bytes"] is None else None)
+
+    with build_session(workers) as session, ThreadPoolExecutor(max_workers=workers) as pool:
+        list(pool.map(probe, pending))
+    return resources
+
+
+def probe_size(session: requests.Session, url: str, timeout: float, deadline: float) -> Dict:
+    """Transfer size of a resource (following up to 5 redirects)"""
+    for _ in range(5):
+        try:
+            response = probe_request(session, "HEAD", url, timeout, deadline)
+            if response.status_code in (301, 302, 303, 307, 308) and response.headers.get("Location"):
+                url = urljoin(url, response.headers["Location"])
+                continue
+
+            length = response.headers.get("Content-Length")
+            if response.status_code == 200 and length and length.isdigit():
+                return {"bytes": int(length), "status": 200}
+
+            # No length on HEAD (chunked, or HEAD refused): ask for one byte
+            response = probe_request(
+                session, "GET", url, timeout, deadline,
+                headers={"Range": "bytes=0-0", "Accept-Encoding": "identity"}
+            )
+            total = CONTENT_RANGE_TOTAL.search(response.headers.get("Content-Range", ""))
+            if response.status_code == 206 and total:
+                return {"bytes": int(total.group(1)), "status": 206}
+            length = response.headers.get("Content-Length")
+            if response.status_code == 200 and length and length.isdigit():
+                return {"bytes": int(length), "status": 200}
+            return {"bytes": None, "status": response.status_code}
+        except requests.exceptions.RequestException:
+            return {"bytes": None, "status": None}
+    return {"bytes": None, "status": None}
+
+
+def resource_audit_summary(resources: List[Dict], html_bytes: int, top: int = 10) -> Dict:
+    """
+    Page weight (HTML plus every subresource) and render-blocking bytes
+
+    Unknown sizes count as the median known size of their type (or a
+    typical size); "estimated_resources" tells how many were estimated.
+    Inline (data: URI) resources are already counted in `html_bytes`; they
+    are reported as "inline_bytes" and left out of the other figures.
+    """
+    inline = [r for r in resources if r.get("inline")]
+    resources = [r for r in resources if not r.get("inline")]
+    known_sizes = {kind: sorted(r["bytes"] for r in resources if r["type"] == kind and r.get("bytes") is not None)
+                   for kind in RESOURCE_TYPES}
+
+    def size_of(resource: Dict) -> int:
+        if resource.get("bytes") is not None:
+            return resource["bytes"]
+        sizes = known_sizes[resource["type"]]
+        return sizes[len(sizes) // 2] if sizes else TYPICAL_BYTES[resource["type"]]
+
+    by_type = {kind: {"count": 0, "bytes": 0} for kind in RESOURCE_TYPES}
+    blocking_bytes = 0
+    blocking_count = 0
+    for resource in resources:
+        size = size_of(resource)
+        by_type[resource["type"]]["count"] += 1
+        by_type[resource["type"]]["bytes"] += size
+        if resource["render_blocking"]:
+            blocking_bytes += size
+            blocking_count += 1
+
+    largest = sorted(
+        (r for r in resources if r.get("bytes") is not None),
+        key=lambda r: r["bytes"],
+        reverse=True
+    )[:top]
+
+    return {
+        "html_bytes": html_bytes,
+        "resources": len(resources),
+        "from_cache": sum(1 for r in resources if r.get("cached")),
+        "estimated_resources": sum(1 for r in resources if r.get("bytes") is None),
+        "inline_resources": len(inline),
+        "inline_bytes": sum(r["bytes"] for r in inline),
+        "total_bytes": html_bytes + sum(by_type[kind]["bytes"] for kind in RESOURCE_TYPES),
+        "render_blocking_bytes": blocking_bytes,
+        "render_blocking_resources": blocking_count,
+        "by_type": by_type,
+        "largest_resources": [
+            {key: r[key] for key in ("url", "type", "bytes", "render_blocking")} for r in largest
+        ],
+    }
@@ -0,0 +1,463 @@
+"""
+Feature Vectors and Vectorized Scoring
+Raw page signals as a fixed-schema vector, and the rule-based scores
+computed from them for any number of analyses at once
+
+Every analysis stores its signals as FEATURES float32 values (92 bytes).
+Scores are a function of that vector and a scoring profile (category
+weights, points and thresholds), so history can be re-scored with tuned
+or "what-if" profiles by NumPy column operations, without refetching
+anything. SEOAnalyzer scores live pages through the same function.
+
+FEATURES is append-only: vectors written before a feature existed are
+padded with NaN (unknown) when read.
+"""
+
+import copy
+import re
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+FEATURES = (
+    "has_ssl",
+    "response_time_seconds",
+    "robots_txt",                   # NaN when the probe timed out
+    "sitemap",                      # NaN when the probe timed out
+    "has_viewport",
+    "has_canonical",
+    "title_length",                 # 0 when missing
+    "meta_description_length",      # 0 when missing
+    "h1_count",
+    "h2_count",
+    "h3_count",
+    "word_count",
+    "image_count",
+    "images_with_alt",
+    "anchor_count",
+    "script_count",
+    "schema_count",
+    "open_graph_count",
+    "twitter_card_count",
+    "crawl_within_3_clicks_ratio",  # NaN without a crawl
+    "crawl_orphan_ratio",           # NaN without a crawl
+    "page_weight_bytes",            # NaN without a resource audit
+    "render_blocking_bytes",        # NaN without a resource audit
+)
+FEATURE_INDEX = {name: index for index, name in enumerate(FEATURES)}
+
+CATEGORIES = ("technical", "content", "user_experience", "authority")
+
+# Analysis columns holding the scores returned by score_features
+SCORE_COLUMNS = {
+    "total": "total_score",
+    "technical": "technical_score",
+    "content": "content_score",
+    "user_experience": "user_experience_score",
+    "authority": "authority_score",
+}
+
+# Points and thresholds of the rule-based scorers. Tier lists are checked
+# in order and the first match wins: "below" [[limit, points], ...] matches
+# value < limit, "at_least" value >= limit, "at_most" value <= limit.
+DEFAULT_PROFILE = {
+    "weights": {
+        "technical": 0.30,
+        "content": 0.25,
+        "user_experience": 0.25,
+        "authority": 0.20,
+    },
+    "technical": {
+        "ssl": 20,
+        "response_time": {"below": [[2, 20], [4, 10]]},
+        "robots_txt": 15,
+        "sitemap": 15,
+        "viewport": 15,
+        "canonical": 15,
+    },
+    "content": {
+        "title": {"optimal": [30, 60], "optimal_points": 25, "present_points": 15},
+        "meta_description": {"optimal": [120, 160], "optimal_points": 25, "present_points": 15},
+        "h1": {"single_points": 20, "multiple_points": 10},
+        "headings": {"h2_and_h3_points": 15, "h2_points": 10},
+        "word_count": {"at_least": [[1000, 15], [300, 10], [100, 5]]},
+    },
+    "user_experience": {
+        "image_alt": 30,
+        "internal_links": {"at_least": [[5, 25], [1, 15]]},
+        # Replaces internal_links when the site was crawled
+        "site_structure": {"points": 25, "within_3_clicks_weight": 0.6, "linked_weight": 0.4},
+        "viewport": 25,
+        "scripts": {"at_most": [[10, 20], [20, 10]]},
+        # Replaces scripts when the resources were sized:
+        # [[max total bytes, max render-blocking bytes, points], ...]
+        "page_weight": {"tiers": [[2 * 1024 * 1024, 200 * 1024, 20], [4 * 1024 * 1024, 500 * 1024, 10]]},
+    },
+    "authority": {
+        "base": 50,
+        "schema": 25,
+        "open_graph": {"min_tags": 3, "points": 15},
+        "twitter_card": {"min_tags": 2, "points": 10},
+    },
+}
+
+
+def resolve_profile(overrides: Optional[Dict] = None) -> Dict:
+    """
+    DEFAULT_PROFILE with `overrides` merged in (any subset of its keys)
+
+    Raises ValueError for keys the default profile does not have, so a
+    typo cannot silently leave a rule at its default.
+    """
+    profile = copy.deepcopy(DEFAULT_PROFILE)
+    if overrides:
+        _merge(profile, overrides, "profile")
+    return profile
+
+
+def _merge(target: Dict, overrides: Dict, path: str):
+    for key, value in overrides.items():
+        if key not in target:
+            raise ValueError(f"Unknown scoring profile key: {path}.{key}")
+        if isinstance(target[key], dict):
+            if not isinstance(value, dict):
+                raise ValueError(f"Scoring profile key {path}.{key} takes an object")
+            _merge(target[key], value, f"{path}.{key}")
+        else:
+            target[key] = value
+
+
+# FEATURES read straight from the page's signals
+SIGNAL_FEATURES = FEATURES[FEATURE_INDEX["has_viewport"]:FEATURE_INDEX["twitter_card_count"] + 1]
+
+
+def page_signals(soup) -> Dict:
+    """
+    Everything scoring and the score details read from a parsed page, as
+    plain values: the SIGNAL_FEATURES plus the title, description and
+    first H1 texts. Small and picklable, so pages can be parsed in another
+    process.
+    """
+    title = soup.find('title')
+    meta_desc = soup.find('meta', attrs={'name': 'description'})
+    h1_tags = soup.find_all('h1')
+    images = soup.find_all('img')
+    meta_title = title.string.strip() if title and title.string else None
+    meta_description = meta_desc.get('content') if meta_desc else None
+
+    return {
+        "meta_title": meta_title,
+        "meta_description": meta_description,
+        "h1_text": h1_tags[0].get_text().strip() if h1_tags else None,
+        "has_viewport": bool(soup.find('meta', attrs={'name': 'viewport'})),
+        "has_canonical": bool(soup.find('link', attrs={'rel': 'canonical'})),
+        "title_length": len(meta_title) if meta_title is not None else 0,
+        "meta_description_length": len(meta_description.strip()) if meta_description else 0,
+        "h1_count": len(h1_tags),
+        "h2_count": len(soup.find_all('h2')),
+        "h3_count": len(soup.find_all('h3')),
+        "word_count": len(soup.get_text().split()),
+        "image_count": len(images),
+        "images_with_alt": sum(1 for img in images if img.get('alt')),
+        "anchor_count": len(soup.find_all('a', href=True)),
+        "script_count": len(soup.find_all('script', src=True)),
+        "schema_count": len(soup.find_all('script', type='application/ld+json')),
+        "open_graph_count": len(soup.find_all('meta', property=lambda x: x and x.startswith('og:'))),
+        "twitter_card_count": len(soup.find_all('meta', attrs={'name': lambda x: x and x.startswith('twitter:')})),
+    }
+
+
+def extract_features(
+    url: str,
+    response,
+    signals: Dict,
+    probes: Dict,
+    site_structure: Optional[Dict] = None,
+    resource_audit: Optional[Dict] = None
+) -> np.ndarray:
+    """Signals of a fetched page (see page_signals) as a FEATURES vector"""
+    values = {
+        "has_ssl": url.startswith('https://'),
+        "response_time_seconds": response.elapsed.total_seconds(),
+        "robots_txt": _probe_value(probes.get("robots_txt")),
+        "sitemap": _probe_value(probes.get("sitemap")),
+    }
+    values.update((name, signals[name]) for name in SIGNAL_FEATURES)
+    if site_structure:
+        values["crawl_within_3_clicks_ratio"] = site_structure["within_3_clicks_ratio"]
+        values["crawl_orphan_ratio"] = site_structure["orphan_ratio"]
+    if resource_audit:
+        values["page_weight_bytes"] = resource_audit["total_bytes"]
+        values["render_blocking_bytes"] = resource_audit["render_blocking_bytes"]
+
+    return _vector(values)
+
+
+def features_from_breakdown(score_breakdown: Dict, detailed_results: Optional[Dict] = None) -> Optional[np.ndarray]:
+    """
+    FEATURES vector rebuilt from a stored score breakdown (for analyses
+    written before feature vectors existed); None when it cannot be parsed
+
+    Response times are only kept to two decimals in the breakdown.
+    """
+    detailed_results = detailed_results or {}
+    try:
+        technical = score_breakdown["technical"]["details"]
+        content = score_breakdown["content"]["details"]
+        ux = score_breakdown["user_experience"]["details"]
+        authority = score_breakdown["authority"]["details"]
+
+        h2_count, h3_count = re.fullmatch(r"H2: (\d+)個, H3: (\d+)個", content["heading_structure"]["value"]).groups()
+        images_with_alt, image_count = _numbers(ux["image_alt_tags"]["value"])
+        values = {
+            "has_ssl": technical["ssl"]["status"] == "Pass",
+            "response_time_seconds": _numbers(technical["response_time"]["value"])[0],
+            "robots_txt": _status_value(technical["robots_txt"]["status"]),
+            "sitemap": _status_value(technical["sitemap"]["status"]),
+            "has_viewport": technical["viewport"]["status"] == "Pass",
+            "has_canonical": technical["canonical"]["status"] == "Pass",
+            "title_length": _numbers(content["title_tag"]["value"])[0],
+            "meta_description_length": _numbers(content["meta_description"]["value"])[0],
+            "h1_count": _numbers(content["h1_tag"]["value"])[0],
+            "h2_count": h2_count,
+            "h3_count": h3_count,
+            "word_count": _numbers(content["word_count"]["value"])[0],
+            "image_count": image_count,
+            "images_with_alt": images_with_alt,
+            "schema_count": _numbers(authority["schema_markup"]["value"])[0],
+            "open_graph_count": _numbers(authority["open_graph"]["value"])[0],
+            "twitter_card_count": _numbers(authority["twitter_card"]["value"])[0],
+        }
+
+        site_structure = detailed_results.get("site_structure")
+        if site_structure and "page" in ux["internal_links"]:
+            values["crawl_within_3_clicks_ratio"] = site_structure["within_3_clicks_ratio"]
+            values["crawl_orphan_ratio"] = site_structure["orphan_ratio"]
+        else:
+            values["anchor_count"] = _numbers(ux["internal_links"]["value"])[0]
+
+        resource_audit = detailed_results.get("resource_audit")
+        if resource_audit and ux["external_scripts"]["value"].startswith("合計"):
+            values["page_weight_bytes"] = resource_audit["total_bytes"]
+            values["render_blocking_bytes"] = resource_audit["render_blocking_bytes"]
+        else:
+            values["script_count"] = _numbers(ux["external_scripts"]["value"])[0]
+    except (KeyError, IndexError, TypeError, ValueError, AttributeError):
+        return None
+
+    return _vector(values)
+
+
+# (points, level) arrays of every breakdown rule, by category and rule name
+RuleScores = Dict[str, Dict[str, Tuple[np.ndarray, np.ndarray]]]
+
+
+def score_features(features: np.ndarray, profile: Dict = DEFAULT_PROFILE) -> Dict[str, np.ndarray]:
+    """
+    Category and total scores of every row of a (rows x FEATURES) matrix
+
+    Returns float64 arrays keyed by category name plus "total", unrounded
+    (the analyzer rounds to one decimal when it stores them).
+    """
+    return scores_from_rules(rule_scores(features, profile, levels=False), profile)
+
+
+def scores_from_rules(rules: RuleScores, profile: Dict = DEFAULT_PROFILE) -> Dict[str, np.ndarray]:
+    """score_features from rule_scores already computed with `profile`"""
+    scores = {
+        category: np.minimum(100, sum(points for points, _ in category_rules.values()))
+        for category, category_rules in rules.items()
+    }
+    weights = profile["weights"]
+    scores["total"] = sum(scores[category] * weights[category] for category in CATEGORIES)
+    return scores
+
+
+def rule_scores(features: np.ndarray, profile: Dict = DEFAULT_PROFILE, levels: bool = True) -> RuleScores:
+    """
+    (points, level) of every score breakdown rule for every row, by
+    category and rule name
+
+    The level is the index of the branch of the rule that earned the
+    points (the matched tier, optimal before present, a single H1 before
+    several, ...) and -1 when none did. Category scores are the sums of
+    the points; the analyzer turns levels into breakdown statuses. With
+    `levels` False they are None (faster, for scores alone).
+    """
+    features = np.atleast_2d(features)
+    rows = features.shape[0]
+
+    def column(name: str) -> np.ndarray:
+        return features[:, FEATURE_INDEX[name]].astype(np.float64)
+
+    def flag(name: str) -> np.ndarray:
+        # Unknown (NaN) counts as missing
+        return column(name) > 0
+
+    def passed(name: str, points) -> Tuple[np.ndarray, np.ndarray]:
+        earned = flag(name)
+        return points * earned, np.where(earned, 0, -1) if levels else None
+
+    rules = profile["technical"]
+    technical = {
+        "ssl": passed("has_ssl", rules["ssl"]),
+        "response_time": _tiers(column("response_time_seconds"), rules["response_time"], levels),
+        "robots_txt": passed("robots_txt", rules["robots_txt"]),
+        "sitemap": passed("sitemap", rules["sitemap"]),
+        "viewport": passed("has_viewport", rules["viewport"]),
+        "canonical": passed("has_canonical", rules["canonical"]),
+    }
+
+    rules = profile["content"]
+    h1_count = column("h1_count")
+    h2_count = column("h2_count")
+    content = {
+        "title_tag": _length_points(column("title_length"), rules["title"], levels),
+        "meta_description": _length_points(column("meta_description_length"), rules["meta_description"], levels),
+        "h1_tag": _levels(
+            (h1_count == 1, h1_count > 1),
+            (rules["h1"]["single_points"], rules["h1"]["multiple_points"]),
+            levels
+        ),
+        "heading_structure": _levels(
+            ((h2_count > 0) & (column("h3_count") > 0), h2_count > 0),
+            (rules["headings"]["h2_and_h3_points"], rules["headings"]["h2_points"]),
+            levels
+        ),
+        "word_count": _tiers(column("word_count"), rules["word_count"], levels),
+    }
+
+    rules = profile["user_experience"]
+    image_count = column("image_count")
+    alt_ratio = np.divide(column("images_with_alt"), image_count, out=np.zeros(rows), where=image_count > 0)
+
+    structure = rules["site_structure"]
+    within_3 = column("crawl_within_3_clicks_ratio")
+    crawled = ~np.isnan(within_3)
+    structure_points = np.round(structure["points"] * (
+        structure["within_3_clicks_weight"] * within_3 +
+        structure["linked_weight"] * (1 - column("crawl_orphan_ratio"))
+    ), 1)
+    anchor_points, anchor_level = _tiers(column("anchor_count"), rules["internal_links"], levels)
+
+    page_weight = column("page_weight_bytes")
+    blocking = column("render_blocking_bytes")
+    audited = ~np.isnan(page_weight)
+    weight_tiers = rules["page_weight"]["tiers"]
+    weight_points, weight_level = _levels(
+        tuple((page_weight <= max_total) & (blocking <= max_blocking) for max_total, max_blocking, _ in weight_tiers),
+        tuple(points for _, _, points in weight_tiers),
+        levels
+    )
+    script_points, script_level = _tiers(column("script_count"), rules["scripts"], levels)
+
+    user_experience = {
+        "image_alt_tags": (alt_ratio * rules["image_alt"], np.where(image_count > 0, 0, -1) if levels else None),
+        "internal_links": (
+            np.where(crawled, structure_points, anchor_points),
+            np.where(crawled, 0, anchor_level) if levels else None
+        ),
+        "mobile_viewport": passed("has_viewport", rules["viewport"]),
+        "external_scripts": (
+            np.where(audited, weight_points, script_points),
+            np.where(audited, weight_level, script_level) if levels else None
+        ),
+    }
+
+    rules = profile["authority"]
+    authority = {
+        "base_score": (np.full(rows, rules["base"]), np.zeros(rows, dtype=int) if levels else None),
+        "schema_markup": passed("schema_count", rules["schema"]),
+        "open_graph": _levels(
+            (column("open_graph_count") >= rules["open_graph"]["min_tags"],), (rules["open_graph"]["points"],), levels
+        ),
+        "twitter_card": _levels(
+            (column("twitter_card_count") >= rules["twitter_card"]["min_tags"],), (rules["twitter_card"]["points"],),
+            levels
+        ),
+    }
+
+    return {"technical": technical, "content": content, "user_experience": user_experience, "authority": authority}
+
+
+def tier_max(rule: Dict) -> float:
+    """Most points a tier rule gives (its tiers end with the points)"""
+    return max(tier[-1] for tier in next(iter(rule.values())))
+
+
+def encode_features(vector: np.ndarray) -> bytes:
+    """FEATURES vector as little-endian float32 bytes"""
+    return np.asarray(vector, dtype="<f4").tobytes()
+
+
+def decode_feature_matrix(blobs: Iterable[bytes]) -> np.ndarray:
+    """Stack stored vectors into a (rows x FEATURES) float32 matrix"""
+    blobs = list(blobs)
+    width = len(FEATURES) * 4
+    if all(len(blob) == width for blob in blobs):
+        return np.frombuffer(b"".join(blobs), dtype="<f4").reshape(len(blobs), len(FEATURES)).astype(np.float32)
+
+    # Vectors from before features were added: pad with NaN
+    matrix = np.full((len(blobs), len(FEATURES)), np.nan, dtype=np.float32)
+    for row, blob in enumerate(blobs):
+        vector = np.frombuffer(blob, dtype="<f4")[:len(FEATURES)]
+        matrix[row, :len(vector)] = vector
+    return matrix
+
+
+def _vector(values: Dict) -> np.ndarray:
+    vector = np.full(len(FEATURES), np.nan, dtype=np.float32)
+    for name, value in values.items():
+        vector[FEATURE_INDEX[name]] = np.nan if value is None else float(value)
+    return vector
+
+
+def _levels(conditions: Tuple[np.ndarray, ...], points: Tuple, levels: bool = True) -> Tuple:
+    """
+    (points, level) of the first true condition, 0 points and level -1
+    when none is (level None without `levels`)
+    """
+    earned = np.zeros(np.shape(conditions[0]))
+    level = np.full(np.shape(conditions[0]), -1) if levels else None
+    # Applied last to first, so the first true condition wins
+    for index in reversed(range(len(conditions))):
+        earned = np.where(conditions[index], points[index], earned)
+        if levels:
+            level = np.where(conditions[index], index, level)
+    return earned, level
+
+
+def _tiers(values: np.ndarray, rule: Dict, levels: bool = True) -> Tuple:
+    """First matching tier of a tier rule (NaN never matches)"""
+    kind, tiers = next(iter(rule.items()))
+    compare = {"below": np.less, "at_least": np.greater_equal, "at_most": np.less_equal}[kind]
+    return _levels(tuple(compare(values, limit) for limit, _ in tiers), tuple(points for _, points in tiers), levels)
+
+
+def _length_points(lengths: np.ndarray, rule: Dict, levels: bool = True) -> Tuple:
+    """Optimal (level 0) or present (level 1) length"""
+    low, high = rule["optimal"]
+    return _levels(
+        ((lengths >= low) & (lengths <= high), lengths > 0),
+        (rule["optimal_points"], rule["present_points"]),
+        levels
+    )
+
+
+def _probe_value(found: Optional[bool]) -> Optional[float]:
+    return None if found is None else float(bool(found))
+
+
+def _status_value(status: str) -> Optional[float]:
+    """Pass / Fail / Timeout of a probe check"""
+    if status == "Timeout":
+        return None
+    return 1.0 if status == "Pass" else 0.0
+
+
+def _numbers(text: str) -> List[float]:
+    """Numbers in a breakdown value such as "12/15画像" or "1.23秒" """
+    found = re.findall(r"\d+(?:\.\d+)?", text.replace(",", ""))
+    if not found:
+        raise ValueError(text)
+    return [float(number) for number in found]
@@ -4,23 +4,26 @@ Analyzes websites and calculates SEO scores based on multiple factors
 """
 
 import requests
-from bs4 import BeautifulSoup
-from typing import Dict, Tuple
+from typing import Dict, Optional, Tuple, Union
 from urllib.parse import urlparse
 import ssl
 import socket
 
+from ..core.config import settings
+from .analysis_job import AnalysisJob, AnalysisCancelled, StageTimeout
+from .parse_pool import parse_response, submit
+
 
 class SEOAnalyzer:
     """Main SEO analysis engine"""
 
     def __init__(self, use_llm: bool = True):
-        self.weights = {
-            "technical": 0.30,
-            "content": 0.25,
-            "user_experience": 0.25,
-            "authority": 0.20
-        }
+        from .scoring import DEFAULT_PROFILE
+
+        # Weights, points and thresholds live in the scoring profile, shared
+        # with the re-scoring of stored history
+        self.profile = DEFAULT_PROFILE
+        self.weights = self.profile["weights"]
         self.use_llm = use_llm
         self.llm_analyzer = None
         self.progress_callback = None
@@ -34,70 +37,232 @@ class SEOAnalyzer:
                 self.use_llm = False
 
     def set_progress_callback(self, callback):
-        """Set a callback function to report progress"""
-        self.progress_callback = callback
+        """
+        Set a callback function to report progress
 
-    def _report_progress(self, step: str, percentage: int):
-        """Report progress if callback is set"""
-        if self.progress_callback:
-            self.progress_callback(step, percentage)
+        Only used by analyze_site calls without a job. The analyzer is shared
+        between workers, so concurrent analyses must pass an AnalysisJob.
+        """
+        self.progress_callback = callback
 
-    def analyze_site(self, url: str) -> Dict:
+    def analyze_site(self, url: str, job: Optional[AnalysisJob] = None) -> Dict:
         """
         Perform complete SEO analysis on a URL
         Returns analysis results with scores and metrics
+
+        Blocking stages run within the job's budgets. Optional stages that
+        time out are listed under "timed_out_stages"; AnalysisCancelled
+        propagates to the caller.
         """
+        if job is None:
+            job = AnalysisJob(progress_callback=self.progress_callback)
+
         # Ensure URL has protocol
         if not url.startswith(('http://', 'https://')):
             url = 'https://' + url
 
         # Step 1: Fetch page content (0-15%)
-        self._report_progress("ページコンテンツを取得中...", 0)
+        job.report_progress("ページコンテンツを取得中...", 0)
         try:
-            response = requests.get(url, timeout=10, headers={
-                'User-Agent': 'Mozilla/5.0 (SEO Analyzer Bot)'
-            })
+            response = job.run_stage("fetch", self._fetch_page, url, job.stage_timeout("fetch"))
+            # Parsed in the parse pool while the probes and the crawl run
+            parsing = parse_response(
+                response, settings.LINK_CHECK_MAX_LINKS, settings.RESOURCE_AUDIT_MAX_RESOURCES,
+                llm_inputs=bool(self.use_llm and self.llm_analyzer)
+            )
             html_content = response.text
-            soup = BeautifulSoup(html_content, 'lxml')
-            self._report_progress("ページコンテンツの取得完了", 15)
+            job.report_progress("ページコンテンツの取得完了", 15)
+        except AnalysisCancelled:
+            raise
+        except StageTimeout as e:
+            return {
+                "error": f"Failed to fetch URL: timed out after {e.budget:.0f}s",
+                "total_score": 0
+            }
         except Exception as e:
             return {
                 "error": f"Failed to fetch URL: {str(e)}",
                 "total_score": 0
             }
 
-        # Step 2: Calculate technical score (15-35%)
-        self._report_progress("技術的SEOを分析中...", 15)
-        technical_score = self._calculate_technical_score(url, response, soup)
-        self._report_progress("技術的SEO分析完了", 35)
-
-        # Step 3: Calculate content score (35-50%)
-        self._report_progress("コンテンツ品質を分析中...", 35)
-        content_score = self._calculate_content_score(soup)
-        self._report_progress("コンテンツ分析完了", 50)
-
-        # Step 4: Calculate UX score (50-65%)
-        self._report_progress("ユーザー体験を分析中...", 50)
-        ux_score = self._calculate_ux_score(soup)
-        self._report_progress("UX分析完了", 65)
-
-        # Step 5: Calculate authority score (65-75%)
-        self._report_progress("権威性を分析中...", 65)
-        authority_score = self._calculate_authority_score(soup)
-        self._report_progress("権威性分析完了", 75)
-
-        # Calculate total score
-        total_score = (
-            technical_score * self.weights["technical"] +
-            content_score * self.weights["content"] +
-            ux_score * self.weights["user_experience"] +
-            authority_score * self.weights["authority"]
+        # robots.txt / sitemap.xml (None when the probes time out)
+        probes = job.run_optional_stage(
+            "probes", {"robots_txt": None, "sitemap": None},
+            self._probe_site_files, url, job.stage_timeout("probes")
         )
 
+        # Keep the page's HTML, so later checks can be re-run on it offline
+        page_snapshot = self._snapshot_record(url, response, html_content, probes)
+
+        # Internal link graph and near-duplicate clusters of the crawled
+        # site (empty when crawling is off or the crawl fails)
+        crawl = {}
+        if settings.CRAWL_MAX_PAGES > 0:
+            job.report_progress("サイト内リンクをクロール中...", 15)
+            crawl = job.run_check_stage(
+                "crawl", {}, self._analyze_site_structure,
+                url, html_content, job.stage_timeout("crawl"), job
+            )
+
+        try:
+            page = parsing.result()
+        except Exception as e:
+            return {
+                "error": f"Failed to parse page: {str(e)}",
+                "total_score": 0
+            }
+
+        # Status and redirect chain of every link on the page
+        link_check = None
+        if settings.LINK_CHECK_MAX_LINKS > 0:
+            job.report_progress("リンク切れをチェック中...", 15)
+            link_check = job.run_check_stage(
+                "links", None, self._check_page_links,
+                page["link_targets"], job.stage_timeout("links"), job
+            )
+
+        # Sizes of scripts, stylesheets, images and fonts (page weight)
+        resource_audit = None
+        if settings.RESOURCE_AUDIT_MAX_RESOURCES > 0:
+            job.report_progress("ページ重量を計測中...", 15)
+            resource_audit = job.run_check_stage(
+                "resources", None, self._audit_resources,
+                page["resources"], len(response.content), job.stage_timeout("resources"), job
+            )
+
+        result = self.score_page(
+            url, response, page, probes, job,
+            crawl.get("site_structure"), crawl.get("duplicate_content"), resource_audit
+        )
+        if page_snapshot:
+            if crawl.get("page_snapshots"):
+                page_snapshot["crawled"] = crawl["page_snapshots"]
+            result["page_snapshot"] = page_snapshot
+        if link_check:
+            result["link_check"] = link_check
+            result["technical_details"]["broken_links"] = link_check["broken"]
+            result["technical_details"]["redirected_links"] = link_check["redirected"]
+        total_score = result["total_score"]
+        technical_details = result["technical_details"]
+        content_details = result["content_details"]
+        ux_details = result["ux_details"]
+
+        # Add LLM-powered deep analysis if enabled
+        if self.use_llm and self.llm_analyzer:
+            try:
+                html_snippet = page["html_snippet"]
+                page_text = page["page_text"]
+                domain = urlparse(url).netloc
+
+                # Each Gemini call gets its own budget; a timed-out call
+                # leaves its section empty
+                # Step 6: LLM Technical Analysis (75-80%)
+                job.report_progress("AI技術分析を実行中...", 75)
+                result["llm_technical_analysis"] = job.run_optional_stage(
+                    "llm_technical", None, self.llm_analyzer.analyze_technical_seo,
+                    technical_details, html_snippet, url,
+                    timeout=job.stage_timeout("llm_technical")
+                )
+
+                # Step 7: LLM Content Analysis (80-85%)
+                job.report_progress("AIコンテンツ分析を実行中...", 80)
+                result["llm_content_analysis"] = job.run_optional_stage(
+                    "llm_content", None, self.llm_analyzer.analyze_content_seo,
+                    content_details, page_text, url,
+                    content_details.get("meta_title"),
+                    content_details.get("meta_description"),
+                    timeout=job.stage_timeout("llm_content")
+                )
+
+                # Step 8: LLM UX and Authority Analysis (85-90%)
+                job.report_progress("AIUX・権威性分析を実行中...", 85)
+                result["llm_ux_analysis"] = job.run_optional_stage(
+                    "llm_ux", None, self.llm_analyzer.analyze_ux_seo,
+                    ux_details, html_snippet, url,
+                    timeout=job.stage_timeout("llm_ux")
+                )
+                result["llm_authority_analysis"] = job.run_optional_stage(
+                    "llm_authority", None, self.llm_analyzer.analyze_authority_seo,
+                    html_snippet, url, domain,
+                    timeout=job.stage_timeout("llm_authority")
+                )
+
+                # Step 9: Generate Action Plan (90-100%)
+                job.report_progress("アクションプランを生成中...", 90)
+                result["llm_action_plan"] = job.run_optional_stage(
+                    "llm_action_plan", None, self.llm_analyzer.generate_action_plan,
+                    {
+                        "technical": result.get("llm_technical_analysis"),
+                        "content": result.get("llm_content_analysis"),
+                        "ux": result.get("llm_ux_analysis"),
+                        "authority": result.get("llm_authority_analysis")
+                    },
+                    url,
+                    total_score,
+                    timeout=job.stage_timeout("llm_action_plan")
+                )
+                job.report_progress("分析完了", 100)
+            except AnalysisCancelled:
+                raise
+            except Exception as e:
+                print(f"LLM analysis error: {str(e)}")
+                result["llm_analysis_error"] = str(e)
+                job.report_progress("分析完了（AI分析エラー）", 100)
+        else:
+            job.report_progress("分析完了", 100)
+
+        if job.timed_out_stages:
+            result["timed_out_stages"] = list(job.timed_out_stages)
+
+        return result
+
+    def score_page(
+        self,
+        url: str,
+        response,
+        page: Dict,
+        probes: Dict,
+        job: Optional[AnalysisJob] = None,
+        site_structure: Optional[Dict] = None,
+        duplicate_content: Optional[Dict] = None,
+        resource_audit: Optional[Dict] = None
+    ) -> Dict:
+        """
+        Rule-based scores, score breakdown and details of a fetched page
+
+        Deterministic and without network access; analyze_site adds the LLM
+        sections on top, competitor comparisons use it alone. `page` is the
+        page's parse_pool.parse_page record. With `site_structure` (link
+        graph metrics of a crawl) internal linking is scored on the whole
+        site instead of this page's anchors.
+        `duplicate_content` (near-duplicate clusters of the crawl) adds the
+        page's cluster to its content details. With `resource_audit` (sizes
+        of the page's subresources) page weight replaces the script count.
+        """
+        from .scoring import encode_features, extract_features, rule_scores, scores_from_rules
+
+        if job is None:
+            job = AnalysisJob()
+
+        # Steps 2-5: scores are computed from the page's feature vector, the
+        # same way stored history is re-scored (15-75%)
+        job.report_progress("技術的SEOを分析中...", 15)
+        signals = page["signals"]
+        features = extract_features(url, response, signals, probes, site_structure, resource_audit)
+        rules = rule_scores(features, self.profile)
+        scores = {category: float(values[0]) for category, values in scores_from_rules(rules, self.profile).items()}
+        technical_score = scores["technical"]
+        content_score = scores["content"]
+        ux_score = scores["user_experience"]
+        authority_score = scores["authority"]
+        total_score = scores["total"]
+        job.report_progress("権威性分析完了", 75)
+
         # Get basic details
-        technical_details = self._get_technical_details(url, response, soup)
-        content_details = self._get_content_details(soup)
-        ux_details = self._get_ux_details(soup)
+        technical_details = self._get_technical_details(url, response, signals)
+        content_details = self._get_content_details(signals)
+        content_details.update(_duplicate_details(page["content_fingerprint"], duplicate_content))
+        ux_details = self._get_ux_details(signals)
 
         # Add score breakdown for transparency
         score_breakdown = {
@@ -105,25 +270,27 @@ class SEOAnalyzer:
                 "score": round(technical_score, 1),
                 "weight": self.weights["technical"],
                 "contribution": round(technical_score * self.weights["technical"], 1),
-                "details": self._get_technical_score_details(url, response, soup)
+                "details": self._get_technical_score_details(response, probes, rules["technical"])
             },
             "content": {
                 "score": round(content_score, 1),
                 "weight": self.weights["content"],
                 "contribution": round(content_score * self.weights["content"], 1),
-                "details": self._get_content_score_details(soup)
+                "details": self._get_content_score_details(signals, rules["content"])
             },
             "user_experience": {
                 "score": round(ux_score, 1),
                 "weight": self.weights["user_experience"],
                 "contribution": round(ux_score * self.weights["user_experience"], 1),
-                "details": self._get_ux_score_details(soup)
+                "details": self._get_ux_score_details(
+                    signals, rules["user_experience"], site_structure, resource_audit
+                )
             },
             "authority": {
                 "score": round(authority_score, 1),
                 "weight": self.weights["authority"],
                 "contribution": round(authority_score * self.weights["authority"], 1),
-                "details": self._get_authority_score_details(soup)
+                "details": self._get_authority_score_details(signals, rules["authority"])
             }
         }
 
@@ -137,619 +304,509 @@ class SEOAnalyzer:
             "technical_details": technical_details,
             "content_details": content_details,
             "ux_details": ux_details,
+            "feature_vector": encode_features(features),
         }
+        if site_structure:
+            result["site_structure"] = site_structure
+        if duplicate_content:
+            result["duplicate_content"] = duplicate_content
+        if resource_audit:
+            result["resource_audit"] = resource_audit
+        return result
 
-        # Add LLM-powered deep analysis if enabled
-        if self.use_llm and self.llm_analyzer:
-            try:
-                html_snippet = str(soup)[:5000]  # Limit HTML size
-                page_text = soup.get_text()
-                domain = urlparse(url).netloc
+    def score_site(
+        self,
+        url: str,
+        fetch_timeout: float,
+        probe_timeout: float,
+        session: Optional[requests.Session] = None
+    ) -> Dict:
+        """
+        Fetch a URL and run only the rule-based scorers (no LLM)
 
-                # Step 6: LLM Technical Analysis (75-80%)
-                self._report_progress("AI技術分析を実行中...", 75)
-                result["llm_technical_analysis"] = self.llm_analyzer.analyze_technical_seo(
-                    technical_details, html_snippet, url
-                )
+        Returns {"error": ..., "total_score": 0} when the page cannot be
+        fetched, like analyze_site.
+        """
+        if not url.startswith(('http://', 'https://')):
+            url = 'https://' + url
 
-                # Step 7: LLM Content Analysis (80-85%)
-                self._report_progress("AIコンテンツ分析を実行中...", 80)
-                result["llm_content_analysis"] = self.llm_analyzer.analyze_content_seo(
-                    content_details, page_text, url,
-                    content_details.get("meta_title"),
-                    content_details.get("meta_description")
-                )
+        try:
+            response = self._fetch_page(url, fetch_timeout, session)
+            parsing = parse_response(response)
+        except Exception as e:
+            return {
+                "error": f"Failed to fetch URL: {str(e)}",
+                "total_score": 0
+            }
 
-                # Step 8: LLM UX and Authority Analysis (85-90%)
-                self._report_progress("AIUX・権威性分析を実行中...", 85)
-                result["llm_ux_analysis"] = self.llm_analyzer.analyze_ux_seo(
-                    ux_details, html_snippet, url
-                )
-                result["llm_authority_analysis"] = self.llm_analyzer.analyze_authority_seo(
-                    html_snippet, url, domain
-                )
+        probes = self._probe_site_files(url, probe_timeout, session)
+        try:
+            page = parsing.result()
+        except Exception as e:
+            return {
+                "error": f"Failed to parse page: {str(e)}",
+                "total_score": 0
+            }
+        return self.score_page(url, response, page, probes)
 
-                # Step 9: Generate Action Plan (90-100%)
-                self._report_progress("アクションプランを生成中...", 90)
-                result["llm_action_plan"] = self.llm_analyzer.generate_action_plan(
-                    {
-                        "technical": result.get("llm_technical_analysis"),
-                        "content": result.get("llm_content_analysis"),
-                        "ux": result.get("llm_ux_analysis"),
-                        "authority": result.get("llm_authority_analysis")
-                    },
-                    url,
-                    total_score
-                )
-                self._report_progress("分析完了", 100)
-            except Exception as e:
-                print(f"LLM analysis error: {str(e)}")
-                result["llm_analysis_error"] = str(e)
-                self._report_progress("分析完了（AI分析エラー）", 100)
-        else:
-            self._report_progress("分析完了", 100)
+    def _analyze_site_structure(self, url: str, html: str, time_budget: float, job: AnalysisJob) -> Dict:
+        """
+        Crawl the site's internal pages; returns the link graph summary
+        ("site_structure") and near-duplicate clusters ("duplicate_content")
+        """
+        import numpy as np
+        from .link_graph import LinkGraph, link_graph_metrics
+        from .near_duplicates import duplicate_summary, page_fingerprint
+        from .site_crawler import crawl_site
+        from .snapshot_store import store_snapshot
+
+        # Stored in the fetching threads and handed to the parse pool for
+        # fingerprinting, while the HTML is at hand
+        fingerprinting = {}
+        snapshots = {}
+
+        def fingerprint(page_id: int, page_html: str):
+            fingerprinting[page_id] = submit(page_fingerprint, page_html)
+            if page_id > 0:
+                digest = store_snapshot(page_html)
+                if digest is not None:
+                    snapshots[page_id] = digest
+
+        crawl = crawl_site(
+            url, html,
+            max_pages=settings.CRAWL_MAX_PAGES,
+            workers=settings.CRAWL_WORKERS,
+            # Leave time to build the graph before the stage budget runs out
+            time_budget=time_budget * 0.8,
+            request_timeout=settings.ANALYSIS_PROBE_TIMEOUT_SECONDS,
+            should_stop=lambda: job.cancelled,
+            on_page=fingerprint
+        )
+        if len(crawl.urls) < 2:
+            return {}
+        fingerprints = {}
+        for page_id, future in fingerprinting.items():
+            signature = future.result()
+            if signature is not None:
+                fingerprints[page_id] = signature
+
+        graph = LinkGraph(
+            len(crawl.urls),
+            np.frombuffer(crawl.sources, dtype=np.int32),
+            np.frombuffer(crawl.targets, dtype=np.int32)
+        )
+        metrics = link_graph_metrics(graph, crawl.urls)
+        metrics["crawled_pages"] = crawl.fetched
+        metrics["stopped_early"] = crawl.stopped_early
 
-        return result
+        duplicates = duplicate_summary(crawl.urls, fingerprints, settings.DUPLICATE_SIMILARITY_THRESHOLD)
+        duplicates["root_cluster_id"] = duplicates["page_clusters"].get(crawl.urls[0])
+        return {
+            "site_structure": metrics,
+            "duplicate_content": duplicates,
+            "page_snapshots": {crawl.urls[page_id]: digest for page_id, digest in sorted(snapshots.items())},
+        }
 
-    def _calculate_technical_score(self, url: str, response, soup) -> float:
-        """Calculate technical SEO score (0-100)"""
-        score = 0
-        max_score = 100
+    def _snapshot_record(self, url: str, response, html: str, probes: Dict) -> Optional[Dict]:
+        """
+        Store the page's HTML; returns what score_page needs besides it to
+        score the page again offline (None when snapshots are off)
+        """
+        from .snapshot_store import store_snapshot
+
+        digest = store_snapshot(html)
+        if digest is None:
+            return None
+        return {
+            "hash": digest,
+            "url": url,
+            "final_url": response.url,
+            "status_code": response.status_code,
+            "response_time": response.elapsed.total_seconds(),
+            "probes": probes,
+        }
 
-        # SSL Certificate (20 points)
-        if url.startswith('https://'):
-            score += 20
+    def _check_page_links(self, targets, time_budget: float, job: AnalysisJob) -> Dict:
+        """Check the page's links concurrently and summarize broken links and redirects"""
+        from .link_checker import check_links, link_check_summary
 
-        # Response time (20 points)
-        if response.elapsed.total_seconds() < 2:
-            score += 20
-        elif response.elapsed.total_seconds() < 4:
-            score += 10
+        results = check_links(
+            targets,
+            # Leave time to summarize before the stage budget runs out
+            time_budget=time_budget * 0.9,
+            request_timeout=settings.ANALYSIS_PROBE_TIMEOUT_SECONDS,
+            should_stop=lambda: job.cancelled
+        )
+        return link_check_summary(results)
+
+    def _audit_resources(self, resources, html_bytes: int, time_budget: float, job: AnalysisJob) -> Dict:
+        """Probe the sizes of the page's subresources and estimate its weight"""
+        from .resource_audit import probe_sizes, resource_audit_summary
+
+        probe_sizes(
+            resources,
+            # Leave time to summarize before the stage budget runs out
+            time_budget=time_budget * 0.9,
+            request_timeout=settings.ANALYSIS_PROBE_TIMEOUT_SECONDS,
+            should_stop=lambda: job.cancelled
+        )
+        return resource_audit_summary(resources, html_bytes)
+
+    def _fetch_page(self, url: str, timeout: float, session: Optional[requests.Session] = None) -> requests.Response:
+        """Fetch the page to analyze (through `session`'s connection pool if given)"""
+        return (session or requests).get(url, timeout=timeout, headers={
+            'User-Agent': 'Mozilla/5.0 (SEO Analyzer Bot)'
+        })
+
+    def _probe_site_files(
+        self,
+        url: str,
+        timeout: float,
+        session: Optional[requests.Session] = None
+    ) -> Dict[str, bool]:
+        """Check whether robots.txt and sitemap.xml exist"""
+        parsed = urlparse(url)
+        probes = {}
+        for key, path in (("robots_txt", "robots.txt"), ("sitemap", "sitemap.xml")):
+            try:
+                probe_response = (session or requests).get(f"{parsed.scheme}://{parsed.netloc}/{path}", timeout=timeout)
+                probes[key] = probe_response.status_code == 200
+            except requests.exceptions.RequestException:
+                probes[key] = False
+        return probes
 
-        # Robots.txt (15 points)
-        domain = urlparse(url).netloc
-        robots_url = f"{urlparse(url).scheme}://{domain}/robots.txt"
-        try:
-            robots_response = requests.get(robots_url, timeout=5)
-            if robots_response.status_code == 200:
-                score += 15
-        except:
-            pass
-
-        # Sitemap (15 points)
-        sitemap_url = f"{urlparse(url).scheme}://{domain}/sitemap.xml"
-        try:
-            sitemap_response = requests.get(sitemap_url, timeout=5)
-            if sitemap_response.status_code == 200:
-                score += 15
-        except:
-            pass
-
-        # Meta viewport for mobile (15 points)
-        viewport = soup.find('meta', attrs={'name': 'viewport'})
-        if viewport:
-            score += 15
-
-        # Canonical tag (15 points)
-        canonical = soup.find('link', attrs={'rel': 'canonical'})
-        if canonical:
-            score += 15
-
-        return min(score, max_score)
-
-    def _calculate_content_score(self, soup) -> float:
-        """Calculate content quality score (0-100)"""
-        score = 0
-
-        # Title tag (25 points)
-        title = soup.find('title')
-        if title and title.string:
-            title_text = title.string.strip()
-            if 30 <= len(title_text) <= 60:
-                score += 25
-            elif len(title_text) > 0:
-                score += 15
-
-        # Meta description (25 points)
-        meta_desc = soup.find('meta', attrs={'name': 'description'})
-        if meta_desc and meta_desc.get('content'):
-            desc_text = meta_desc.get('content').strip()
-            if 120 <= len(desc_text) <= 160:
-                score += 25
-            elif len(desc_text) > 0:
-                score += 15
-
-        # H1 tag (20 points)
-        h1_tags = soup.find_all('h1')
-        if len(h1_tags) == 1:
-            score += 20
-        elif len(h1_tags) > 1:
-            score += 10
-
-        # Heading structure (15 points)
-        h2_tags = soup.find_all('h2')
-        h3_tags = soup.find_all('h3')
-        if len(h2_tags) > 0 and len(h3_tags) > 0:
-            score += 15
-        elif len(h2_tags) > 0:
-            score += 10
-
-        # Word count (15 points)
-        text_content = soup.get_text()
-        word_count = len(text_content.split())
-        if word_count >= 1000:
-            score += 15
-        elif word_count >= 300:
-            score += 10
-        elif word_count >= 100:
-            score += 5
-
-        return min(score, 100)
-
-    def _calculate_ux_score(self, soup) -> float:
-        """Calculate user experience score (0-100)"""
-        score = 0
-
-        # Images with alt tags (30 points)
-        images = soup.find_all('img')
-        if images:
-            images_with_alt = [img for img in images if img.get('alt')]
-            alt_ratio = len(images_with_alt) / len(images)
-            score += alt_ratio * 30
-
-        # Internal links (25 points)
-        internal_links = soup.find_all('a', href=True)
-        if len(internal_links) >= 5:
-            score += 25
-        elif len(internal_links) > 0:
-            score += 15
-
-        # Mobile-friendly viewport (25 points)
-        viewport = soup.find('meta', attrs={'name': 'viewport'})
-        if viewport:
-            score += 25
-
-        # No excessive external scripts (20 points)
-        scripts = soup.find_all('script', src=True)
-        if len(scripts) <= 10:
-            score += 20
-        elif len(scripts) <= 20:
-            score += 10
-
-        return min(score, 100)
-
-    def _calculate_authority_score(self, soup) -> float:
-        """Calculate authority score (0-100) - Basic implementation"""
-        score = 50  # Base score
-
-        # Schema markup (25 points)
-        schema = soup.find_all('script', type='application/ld+json')
-        if schema:
-            score += 25
-
-        # Social meta tags (25 points)
-        og_tags = soup.find_all('meta', property=lambda x: x and x.startswith('og:'))
-        twitter_tags = soup.find_all('meta', attrs={'name': lambda x: x and x.startswith('twitter:')})
-
-        if len(og_tags) >= 3:
-            score += 15
-        if len(twitter_tags) >= 2:
-            score += 10
-
-        return min(score, 100)
-
-    def _get_technical_details(self, url: str, response, soup) -> Dict:
+    def _get_technical_details(self, url: str, response, signals: Dict) -> Dict:
         """Get detailed technical metrics"""
-        viewport = soup.find('meta', attrs={'name': 'viewport'})
-        canonical = soup.find('link', attrs={'rel': 'canonical'})
-
         return {
             "has_ssl": url.startswith('https://'),
             "response_time": response.elapsed.total_seconds(),
-            "has_viewport": bool(viewport),
-            "has_canonical": bool(canonical),
+            "has_viewport": signals["has_viewport"],
+            "has_canonical": signals["has_canonical"],
             "status_code": response.status_code
         }
 
-    def _get_content_details(self, soup) -> Dict:
+    def _get_content_details(self, signals: Dict) -> Dict:
         """Get detailed content metrics"""
-        title = soup.find('title')
-        meta_desc = soup.find('meta', attrs={'name': 'description'})
-        h1_tags = soup.find_all('h1')
-
-        text_content = soup.get_text()
-        word_count = len(text_content.split())
-
         return {
-            "meta_title": title.string.strip() if title and title.string else None,
-            "meta_description": meta_desc.get('content') if meta_desc else None,
-            "h1_count": len(h1_tags),
-            "h1_text": h1_tags[0].get_text().strip() if h1_tags else None,
-            "word_count": word_count
+            "meta_title": signals["meta_title"],
+            "meta_description": signals["meta_description"],
+            "h1_count": signals["h1_count"],
+            "h1_text": signals["h1_text"],
+            "word_count": signals["word_count"]
         }
 
-    def _get_ux_details(self, soup) -> Dict:
+    def _get_ux_details(self, signals: Dict) -> Dict:
         """Get detailed UX metrics"""
-        images = soup.find_all('img')
-        images_with_alt = [img for img in images if img.get('alt')]
-
         return {
-            "total_images": len(images),
-            "images_with_alt": len(images_with_alt),
-            "mobile_friendly": bool(soup.find('meta', attrs={'name': 'viewport'}))
+            "total_images": signals["image_count"],
+            "images_with_alt": signals["images_with_alt"],
+            "mobile_friendly": signals["has_viewport"]
         }
 
-    def _get_technical_score_details(self, url: str, response, soup) -> Dict:
+    def _get_technical_score_details(self, response, probes: Dict, rules: Dict) -> Dict:
         """Get detailed breakdown of technical score calculation"""
+        from .scoring import tier_max
+
+        profile = self.profile["technical"]
         details = {}
 
-        # SSL Certificate (20 points)
-        has_ssl = url.startswith('https://')
+        # SSL Certificate
+        points, status = _rule_result(rules["ssl"], ("Pass",), "Fail")
         details["ssl"] = {
-            "status": "Pass" if has_ssl else "Fail",
-            "points_earned": 20 if has_ssl else 0,
-            "max_points": 20,
+            "status": status,
+            "points_earned": points,
+            "max_points": profile["ssl"],
             "description": "HTTPS/SSL証明書"
         }
 
-        # Response time (20 points)
-        response_time = response.elapsed.total_seconds()
-        if response_time < 2:
-            time_points = 20
-            time_status = "Excellent"
-        elif response_time < 4:
-            time_points = 10
-            time_status = "Good"
-        else:
-            time_points = 0
-            time_status = "Slow"
-
+        # Response time
+        points, status = _rule_result(rules["response_time"], ("Excellent", "Good"), "Slow")
         details["response_time"] = {
-            "status": time_status,
-            "value": f"{response_time:.2f}秒",
-            "points_earned": time_points,
-            "max_points": 20,
+            "status": status,
+            "value": f"{response.elapsed.total_seconds():.2f}秒",
+            "points_earned": points,
+            "max_points": tier_max(profile["response_time"]),
             "description": "ページ読み込み速度"
         }
 
-        # Robots.txt (15 points)
-        domain = urlparse(url).netloc
-        robots_url = f"{urlparse(url).scheme}://{domain}/robots.txt"
-        has_robots = False
-        try:
-            robots_response = requests.get(robots_url, timeout=5)
-            has_robots = robots_response.status_code == 200
-        except:
-            pass
-
+        # Robots.txt and sitemap, probed once in analyze_site
         details["robots_txt"] = {
-            "status": "Pass" if has_robots else "Fail",
-            "points_earned": 15 if has_robots else 0,
-            "max_points": 15,
+            "status": _probe_status(probes.get("robots_txt")),
+            "points_earned": _rule_points(rules["robots_txt"]),
+            "max_points": profile["robots_txt"],
             "description": "robots.txtファイル"
         }
 
-        # Sitemap (15 points)
-        sitemap_url = f"{urlparse(url).scheme}://{domain}/sitemap.xml"
-        has_sitemap = False
-        try:
-            sitemap_response = requests.get(sitemap_url, timeout=5)
-            has_sitemap = sitemap_response.status_code == 200
-        except:
-            pass
-
         details["sitemap"] = {
-            "status": "Pass" if has_sitemap else "Fail",
-            "points_earned": 15 if has_sitemap else 0,
-            "max_points": 15,
+            "status": _probe_status(probes.get("sitemap")),
+            "points_earned": _rule_points(rules["sitemap"]),
+            "max_points": profile["sitemap"],
             "description": "XMLサイトマップ"
         }
 
-        # Meta viewport for mobile (15 points)
-        viewport = soup.find('meta', attrs={'name': 'viewport'})
-        has_viewport = bool(viewport)
+        # Meta viewport for mobile
+        points, status = _rule_result(rules["viewport"], ("Pass",), "Fail")
         details["viewport"] = {
-            "status": "Pass" if has_viewport else "Fail",
-            "points_earned": 15 if has_viewport else 0,
-            "max_points": 15,
+            "status": status,
+            "points_earned": points,
+            "max_points": profile["viewport"],
             "description": "モバイル対応(viewport)"
         }
 
-        # Canonical tag (15 points)
-        canonical = soup.find('link', attrs={'rel': 'canonical'})
-        has_canonical = bool(canonical)
+        # Canonical tag
+        points, status = _rule_result(rules["canonical"], ("Pass",), "Fail")
         details["canonical"] = {
-            "status": "Pass" if has_canonical else "Fail",
-            "points_earned": 15 if has_canonical else 0,
-            "max_points": 15,
+            "status": status,
+            "points_earned": points,
+            "max_points": profile["canonical"],
             "description": "正規URLタグ"
         }
 
         return details
 
-    def _get_content_score_details(self, soup) -> Dict:
+    def _get_content_score_details(self, signals: Dict, rules: Dict) -> Dict:
         """Get detailed breakdown of content score calculation"""
-        details = {}
+        from .scoring import tier_max
 
-        # Title tag (25 points)
-        title = soup.find('title')
-        if title and title.string:
-            title_text = title.string.strip()
-            title_len = len(title_text)
-            if 30 <= title_len <= 60:
-                title_points = 25
-                title_status = "Optimal"
-            elif title_len > 0:
-                title_points = 15
-                title_status = "Present"
-            else:
-                title_points = 0
-                title_status = "Missing"
-        else:
-            title_text = ""
-            title_len = 0
-            title_points = 0
-            title_status = "Missing"
+        profile = self.profile["content"]
+        details = {}
 
+        # Title tag
+        points, status = _rule_result(rules["title_tag"], ("Optimal", "Present"), "Missing")
+        low, high = profile["title"]["optimal"]
         details["title_tag"] = {
-            "status": title_status,
-            "value": f"{title_len}文字",
-            "points_earned": title_points,
-            "max_points": 25,
-            "description": "タイトルタグ(30-60文字推奨)"
+            "status": status,
+            "value": f"{signals['title_length']}文字",
+            "points_earned": points,
+            "max_points": profile["title"]["optimal_points"],
+            "description": f"タイトルタグ({low}-{high}文字推奨)"
         }
 
-        # Meta description (25 points)
-        meta_desc = soup.find('meta', attrs={'name': 'description'})
-        if meta_desc and meta_desc.get('content'):
-            desc_text = meta_desc.get('content').strip()
-            desc_len = len(desc_text)
-            if 120 <= desc_len <= 160:
-                desc_points = 25
-                desc_status = "Optimal"
-            elif desc_len > 0:
-                desc_points = 15
-                desc_status = "Present"
-            else:
-                desc_points = 0
-                desc_status = "Missing"
-        else:
-            desc_len = 0
-            desc_points = 0
-            desc_status = "Missing"
-
+        # Meta description
+        points, status = _rule_result(rules["meta_description"], ("Optimal", "Present"), "Missing")
+        low, high = profile["meta_description"]["optimal"]
         details["meta_description"] = {
-            "status": desc_status,
-            "value": f"{desc_len}文字",
-            "points_earned": desc_points,
-            "max_points": 25,
-            "description": "メタディスクリプション(120-160文字推奨)"
+            "status": status,
+            "value": f"{signals['meta_description_length']}文字",
+            "points_earned": points,
+            "max_points": profile["meta_description"]["optimal_points"],
+            "description": f"メタディスクリプション({low}-{high}文字推奨)"
         }
 
-        # H1 tag (20 points)
-        h1_tags = soup.find_all('h1')
-        h1_count = len(h1_tags)
-        if h1_count == 1:
-            h1_points = 20
-            h1_status = "Optimal"
-        elif h1_count > 1:
-            h1_points = 10
-            h1_status = "Multiple"
-        else:
-            h1_points = 0
-            h1_status = "Missing"
-
+        # H1 tag
+        points, status = _rule_result(rules["h1_tag"], ("Optimal", "Multiple"), "Missing")
         details["h1_tag"] = {
-            "status": h1_status,
-            "value": f"{h1_count}個",
-            "points_earned": h1_points,
-            "max_points": 20,
+            "status": status,
+            "value": f"{signals['h1_count']}個",
+            "points_earned": points,
+            "max_points": max(profile["h1"].values()),
             "description": "H1タグ(1個推奨)"
         }
 
-        # Heading structure (15 points)
-        h2_tags = soup.find_all('h2')
-        h3_tags = soup.find_all('h3')
-        h2_count = len(h2_tags)
-        h3_count = len(h3_tags)
-
-        if h2_count > 0 and h3_count > 0:
-            heading_points = 15
-            heading_status = "Good"
-        elif h2_count > 0:
-            heading_points = 10
-            heading_status = "Fair"
-        else:
-            heading_points = 0
-            heading_status = "Poor"
-
+        # Heading structure
+        points, status = _rule_result(rules["heading_structure"], ("Good", "Fair"), "Poor")
         details["heading_structure"] = {
-            "status": heading_status,
-            "value": f"H2: {h2_count}個, H3: {h3_count}個",
-            "points_earned": heading_points,
-            "max_points": 15,
+            "status": status,
+            "value": f"H2: {signals['h2_count']}個, H3: {signals['h3_count']}個",
+            "points_earned": points,
+            "max_points": max(profile["headings"].values()),
             "description": "見出し構造"
         }
 
-        # Word count (15 points)
-        text_content = soup.get_text()
-        word_count = len(text_content.split())
-
-        if word_count >= 1000:
-            wc_points = 15
-            wc_status = "Excellent"
-        elif word_count >= 300:
-            wc_points = 10
-            wc_status = "Good"
-        elif word_count >= 100:
-            wc_points = 5
-            wc_status = "Fair"
-        else:
-            wc_points = 0
-            wc_status = "Poor"
-
+        # Word count; the tier worth the most points is the recommendation
+        points, status = _rule_result(rules["word_count"], ("Excellent", "Good", "Fair"), "Poor")
+        recommended = max(profile["word_count"]["at_least"], key=lambda tier: tier[1])[0]
         details["word_count"] = {
-            "status": wc_status,
-            "value": f"{word_count}語",
-            "points_earned": wc_points,
-            "max_points": 15,
-            "description": "コンテンツ量(1000語以上推奨)"
+            "status": status,
+            "value": f"{signals['word_count']}語",
+            "points_earned": points,
+            "max_points": tier_max(profile["word_count"]),
+            "description": f"コンテンツ量({recommended}語以上推奨)"
         }
 
         return details
 
-    def _get_ux_score_details(self, soup) -> Dict:
+    def _get_ux_score_details(
+        self,
+        signals: Dict,
+        rules: Dict,
+        site_structure: Optional[Dict] = None,
+        resource_audit: Optional[Dict] = None
+    ) -> Dict:
         """Get detailed breakdown of UX score calculation"""
-        details = {}
+        from .scoring import tier_max
 
-        # Images with alt tags (30 points)
-        images = soup.find_all('img')
-        total_images = len(images)
-        if total_images > 0:
-            images_with_alt = [img for img in images if img.get('alt')]
-            alt_count = len(images_with_alt)
-            alt_ratio = alt_count / total_images
-            alt_points = alt_ratio * 30
-
-            if alt_ratio >= 0.9:
-                alt_status = "Excellent"
-            elif alt_ratio >= 0.5:
-                alt_status = "Good"
-            else:
-                alt_status = "Poor"
-        else:
-            alt_count = 0
-            alt_ratio = 0
-            alt_points = 0
-            alt_status = "No Images"
+        profile = self.profile["user_experience"]
+        details = {}
 
+        # Images with alt tags, points in proportion to the share with alt
+        total_images = signals["image_count"]
+        alt_count = signals["images_with_alt"] if total_images > 0 else 0
         details["image_alt_tags"] = {
-            "status": alt_status,
+            "status": _share_status(alt_count / total_images, 0.9, 0.5) if total_images > 0 else "No Images",
             "value": f"{alt_count}/{total_images}画像",
-            "points_earned": round(alt_points, 1),
-            "max_points": 30,
+            "points_earned": _rule_points(rules["image_alt_tags"]),
+            "max_points": profile["image_alt"],
             "description": "画像のalt属性"
         }
 
-        # Internal links (25 points)
-        internal_links = soup.find_all('a', href=True)
-        link_count = len(internal_links)
-
-        if link_count >= 5:
-            link_points = 25
-            link_status = "Good"
-        elif link_count > 0:
-            link_points = 15
-            link_status = "Fair"
+        # Internal links: site-wide internal linking replaces the anchor
+        # count when crawled
+        if site_structure:
+            points = _rule_points(rules["internal_links"])
+            max_points = profile["site_structure"]["points"]
+            root = site_structure.get("root") or {}
+            details["internal_links"] = {
+                "status": _share_status(points / max_points, 0.8, 0.48),
+                "value": (
+                    f"{site_structure['pages']}ページ中 3クリック以内 "
+                    f"{site_structure['within_3_clicks_ratio']:.0%}, "
+                    f"孤立ページ {site_structure['orphan_count']}件"
+                ),
+                "points_earned": points,
+                "max_points": max_points,
+                "description": "内部リンク構造（クロール）",
+                "page": {
+                    "inlinks": root.get("inlinks"),
+                    "outlinks": root.get("outlinks"),
+                    "pagerank": root.get("pagerank"),
+                    "pagerank_percentile": root.get("pagerank_percentile")
+                }
+            }
         else:
-            link_points = 0
-            link_status = "Poor"
-
-        details["internal_links"] = {
-            "status": link_status,
-            "value": f"{link_count}個",
-            "points_earned": link_points,
-            "max_points": 25,
-            "description": "内部リンク数"
-        }
-
-        # Mobile-friendly viewport (25 points)
-        viewport = soup.find('meta', attrs={'name': 'viewport'})
-        has_viewport = bool(viewport)
+            points, status = _rule_result(rules["internal_links"], ("Good", "Fair"), "Poor")
+            details["internal_links"] = {
+                "status": status,
+                "value": f"{signals['anchor_count']}個",
+                "points_earned": points,
+                "max_points": tier_max(profile["internal_links"]),
+                "description": "内部リンク数"
+            }
 
+        # Mobile-friendly viewport
+        points, status = _rule_result(rules["mobile_viewport"], ("Pass",), "Fail")
         details["mobile_viewport"] = {
-            "status": "Pass" if has_viewport else "Fail",
-            "points_earned": 25 if has_viewport else 0,
-            "max_points": 25,
+            "status": status,
+            "points_earned": points,
+            "max_points": profile["viewport"],
             "description": "モバイル対応設定"
         }
 
-        # External scripts (20 points)
-        scripts = soup.find_all('script', src=True)
-        script_count = len(scripts)
-
-        if script_count <= 10:
-            script_points = 20
-            script_status = "Excellent"
-        elif script_count <= 20:
-            script_points = 10
-            script_status = "Good"
+        # External scripts: page weight replaces the script count when the
+        # resources were sized
+        if resource_audit:
+            points, status = _rule_result(rules["external_scripts"], ("Excellent", "Good"), "Too Heavy")
+            details["external_scripts"] = {
+                "status": status,
+                "value": (
+                    f"合計 {resource_audit['total_bytes'] / 1024:,.0f}KB, "
+                    f"レンダリングブロック {resource_audit['render_blocking_bytes'] / 1024:,.0f}KB "
+                    f"({resource_audit['render_blocking_resources']}件)"
+                ),
+                "points_earned": points,
+                "max_points": tier_max(profile["page_weight"]),
+                "description": "ページ重量（リソース監査）"
+            }
         else:
-            script_points = 0
-            script_status = "Too Many"
-
-        details["external_scripts"] = {
-            "status": script_status,
-            "value": f"{script_count}個",
-            "points_earned": script_points,
-            "max_points": 20,
-            "description": "外部スクリプト数"
-        }
+            points, status = _rule_result(rules["external_scripts"], ("Excellent", "Good"), "Too Many")
+            details["external_scripts"] = {
+                "status": status,
+                "value": f"{signals['script_count']}個",
+                "points_earned": points,
+                "max_points": tier_max(profile["scripts"]),
+                "description": "外部スクリプト数"
+            }
 
         return details
 
-    def _get_authority_score_details(self, soup) -> Dict:
+    def _get_authority_score_details(self, signals: Dict, rules: Dict) -> Dict:
         """Get detailed breakdown of authority score calculation"""
+        profile = self.profile["authority"]
         details = {}
 
-        # Base score (50 points)
+        # Base score
         details["base_score"] = {
             "status": "Default",
             "value": "ベーススコア",
-            "points_earned": 50,
-            "max_points": 50,
+            "points_earned": _rule_points(rules["base_score"]),
+            "max_points": profile["base"],
             "description": "基本権威スコア"
         }
 
-        # Schema markup (25 points)
-        schema = soup.find_all('script', type='application/ld+json')
-        schema_count = len(schema)
-        has_schema = schema_count > 0
-
+        # Schema markup
+        points, status = _rule_result(rules["schema_markup"], ("Pass",), "Fail")
         details["schema_markup"] = {
-            "status": "Pass" if has_schema else "Fail",
-            "value": f"{schema_count}個",
-            "points_earned": 25 if has_schema else 0,
-            "max_points": 25,
+            "status": status,
+            "value": f"{signals['schema_count']}個",
+            "points_earned": points,
+            "max_points": profile["schema"],
             "description": "構造化データ(Schema.org)"
         }
 
-        # Open Graph tags (15 points)
-        og_tags = soup.find_all('meta', property=lambda x: x and x.startswith('og:'))
-        og_count = len(og_tags)
-
-        if og_count >= 3:
-            og_points = 15
-            og_status = "Good"
-        else:
-            og_points = 0
-            og_status = "Insufficient"
-
+        # Open Graph tags
+        points, status = _rule_result(rules["open_graph"], ("Good",), "Insufficient")
         details["open_graph"] = {
-            "status": og_status,
-            "value": f"{og_count}個",
-            "points_earned": og_points,
-            "max_points": 15,
+            "status": status,
+            "value": f"{signals['open_graph_count']}個",
+            "points_earned": points,
+            "max_points": profile["open_graph"]["points"],
             "description": "Open Graphタグ"
         }
 
-        # Twitter Card tags (10 points)
-        twitter_tags = soup.find_all('meta', attrs={'name': lambda x: x and x.startswith('twitter:')})
-        twitter_count = len(twitter_tags)
-
-        if twitter_count >= 2:
-            twitter_points = 10
-            twitter_status = "Good"
-        else:
-            twitter_points = 0
-            twitter_status = "Insufficient"
-
+        # Twitter Card tags
+        points, status = _rule_result(rules["twitter_card"], ("Good",), "Insufficient")
         details["twitter_card"] = {
-            "status": twitter_status,
-            "value": f"{twitter_count}個",
-            "points_earned": twitter_points,
-            "max_points": 10,
+            "status": status,
+            "value": f"{signals['twitter_card_count']}個",
+            "points_earned": points,
+            "max_points": profile["twitter_card"]["points"],
             "description": "Twitter Cardタグ"
         }
 
         return details
+
+
+def _rule_points(result: Tuple) -> Union[int, float]:
+    """Points earned from a one-page scoring.rule_scores (points, level) result"""
+    points = float(result[0][0])
+    return int(points) if points.is_integer() else round(points, 1)
+
+
+def _rule_result(result: Tuple, statuses: Tuple[str, ...], otherwise: str) -> Tuple[Union[int, float], str]:
+    """
+    Points earned and status of a rule from a one-page scoring.rule_scores
+    result: `statuses` are named by level (levels beyond them take the
+    last one), `otherwise` when no level applied
+    """
+    level = int(result[1][0])
+    status = otherwise if level < 0 else statuses[min(level, len(statuses) - 1)]
+    return _rule_points(result), status
+
+
+def _share_status(share: float, excellent: float, good: float) -> str:
+    """Status of a proportional rule from the share earned (presentation only, points don't depend on it)"""
+    if share >= excellent:
+        return "Excellent"
+    if share >= good:
+        return "Good"
+    return "Poor"
+
+
+def _duplicate_details(content_fingerprint: Optional[str], duplicate_content: Optional[Dict]) -> Dict:
+    """
+    MinHash fingerprint of the page's main text (kept with every analysis,
+    so pages and snapshots can be compared later) and its near-duplicate
+    cluster in the crawl
+    """
+    details = {"content_fingerprint": content_fingerprint}
+    if duplicate_content:
+        details["duplicate_cluster_id"] = duplicate_content["root_cluster_id"]
+        details["duplicate_ratio"] = duplicate_content["duplicate_ratio"]
+    return details
+
+
+def _probe_status(found: Optional[bool]) -> str:
+    """Pass / Fail, or Timeout when the probe did not finish"""
+    if found is None:
+        return "Timeout"
+    return "Pass" if found else "Fail"
@@ -0,0 +1,199 @@
+"""
+Site Crawler
+Breadth-first crawl of a site's internal pages into a link graph
+
+Pages on the start URL's host are fetched concurrently through one
+requests.Session, up to a page limit and a time budget. URLs listed in
+sitemap.xml are added as pages too, so pages that no crawled page links
+to show up as orphans. Links are kept as integer page IDs (0 = start
+page) in compact arrays for LinkGraph.
+"""
+
+import re
+import time
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+from urllib.parse import urldefrag, urljoin, urlparse
+
+import lxml.html
+import requests
+
+from .http_client import build_session
+
+# <loc> entries of sitemap.xml (and of sitemap indexes)
+SITEMAP_LOC = re.compile(r"<loc>\s*([^<\s]+)\s*</loc>", re.IGNORECASE)
+
+SKIPPED_SCHEMES = ("mailto:", "javascript:", "tel:", "data:")
+
+# Links to these are not pages
+SKIPPED_EXTENSIONS = (
+    ".jpg", ".jpeg", ".png", ".gif", ".svg", ".webp", ".ico", ".pdf", ".zip",
+    ".css", ".js", ".xml", ".mp4", ".mp3", ".woff", ".woff2",
+)
+
+
+class CrawlResult:
+    """Pages found by a crawl and the links between them"""
+
+    def __init__(self):
+        self.urls: List[str] = []
+        self.page_ids: Dict[str, int] = {}
+        self.sources = array("i")
+        self.targets = array("i")
+        self.fetched = 0
+        self.stopped_early = False
+
+    def page_id(self, url: str) -> int:
+        page_id = self.page_ids.get(url)
+        if page_id is None:
+            page_id = self.page_ids[url] = len(self.urls)
+            self.urls.append(url)
+        return page_id
+
+
+def normalize_url(url: str) -> str:
+    """Drop the fragment and default to "/" as path"""
+    url = urldefrag(url)[0]
+    parsed = urlparse(url)
+    if not parsed.path:
+        url = parsed._replace(path="/").geturl()
+    return url
+
+
+def same_site(url: str, host: str) -> bool:
+    netloc = urlparse(url).netloc.lower()
+    return netloc.removeprefix("www.") == host
+
+
+def extract_links(html: str, base_url: str, host: str) -> List[str]:
+    """Internal page links of an HTML document, resolved and normalized"""
+    try:
+        document = lxml.html.fromstring(html)
+    except (ValueError, lxml.etree.ParserError):
+        return []
+
+    links = []
+    for href in document.xpath("//a/@href"):
+        href = href.strip()
+        if not href or href.startswith("#") or href.lower().startswith(SKIPPED_SCHEMES):
+            continue
+        url = normalize_url(urljoin(base_url, href))
+        if not url.startswith(("http://", "https://")) or not same_site(url, host):
+            continue
+        if urlparse(url).path.lower().endswith(SKIPPED_EXTENSIONS):
+            continue
+        links.append(url)
+    return links
+
+
+def crawl_site(
+    start_url: str,
+    start_html: Optional[str],
+    max_pages: int,
+    workers: int,
+    time_budget: float,
+    request_timeout: float,
+    should_stop: Optional[Callable[[], bool]] = None,
+    on_page: Optional[Callable[[int, str], None]] = None
+) -> CrawlResult:
+    """
+    Crawl internal pages breadth-first from `start_url`
+
+    `start_html` (the already fetched start page) is parsed instead of
+    fetched again. Stops at `max_pages` fetched pages, after `time_budget`
+    seconds or when `should_stop` returns True, keeping what was found.
+    `on_page` is called with the ID and HTML of every fetched page, from
+    the fetching threads.
+    """
+    start_url = normalize_url(start_url)
+    host = urlparse(start_url).netloc.lower().removeprefix("www.")
+    deadline = time.monotonic() + time_budget
+    result = CrawlResult()
+    result.page_id(start_url)
+
+    def out_of_time() -> bool:
+        return time.monotonic() >= deadline or bool(should_stop and should_stop())
+
+    def fetch_links(page_id: int) -> Optional[List[str]]:
+        url = result.urls[page_id]
+        if out_of_time():
+            return None
+        try:
+            response = session.get(url, timeout=request_timeout, headers={
+                'User-Agent': 'Mozilla/5.0 (SEO Analyzer Bot)'
+            })
+        except requests.exceptions.RequestException:
+            return []
+        if response.status_code != 200 or "html" not in response.headers.get("Content-Type", ""):
+            return []
+        if on_page:
+            on_page(page_id, response.text)
+        return extract_links(response.text, response.url, host)
+
+    with build_session(workers) as session, ThreadPoolExecutor(max_workers=workers) as pool:
+        # Sitemap URLs become pages even when nothing links to them
+        sitemap = _sitemap_urls(session, start_url, request_timeout)
+        for url in sitemap:
+            if same_site(url, host) and len(result.urls) < max_pages:
+                result.page_id(normalize_url(url))
+
+        def record(source_id: int, links: List[str]):
+            for link in links:
+                if link not in result.page_ids and len(result.urls) >= max_pages:
+                    continue
+                target_id = result.page_id(link)
+                result.sources.append(source_id)
+                result.targets.append(target_id)
+
+        if start_html is not None:
+            if on_page:
+                on_page(0, start_html)
+            record(0, extract_links(start_html, start_url, host))
+            next_id = 1
+        else:
+            next_id = 0
+        result.fetched = next_id
+
+        # Every known page is fetched once, in ID order (= breadth-first)
+        while next_id < len(result.urls) and result.fetched < max_pages:
+            if out_of_time():
+                result.stopped_early = True
+                break
+            batch = range(next_id, min(len(result.urls), next_id + workers * 2, next_id + max_pages - result.fetched))
+            for page_id, links in zip(batch, pool.map(fetch_links, batch)):
+                if links is None:
+                    result.stopped_early = True
+                    continue
+                record(page_id, links)
+                result.fetched += 1
+            next_id = batch.stop
+
+    return result
+
+
+def _sitemap_urls(session: requests.Session, start_url: str, timeout: float, limit: int = 50000) -> List[str]:
+    """Page URLs from /sitemap.xml, following one level of sitemap index"""
+    parsed = urlparse(start_url)
+    try:
+        response = session.get(f"{parsed.scheme}://{parsed.netloc}/sitemap.xml", timeout=timeout)
+    except requests.exceptions.RequestException:
+        return []
+    if response.status_code != 200:
+        return []
+
+    urls = SITEMAP_LOC.findall(response.text)
+    if "<sitemapindex" not in response.text:
+        return urls[:limit]
+
+    pages = []
+    for sitemap_url in urls[:10]:
+        try:
+            child = session.get(sitemap_url, timeout=timeout)
+        except requests.exceptions.RequestException:
+            continue
+        if child.status_code == 200:
+            pages += SITEMAP_LOC.findall(child.text)
+        if len(pages) >= limit:
+            break
+    return pages[:limit]
@@ -0,0 +1,154 @@
+"""
+Snapshot Store
+Content-addressed, zstd-compressed store of fetched page HTML
+
+Every blob is named after the SHA-256 of the page's HTML (as decoded for
+analysis, UTF-8 encoded) and written once, so a page that did not change
+between analyses, or that several sites share, is stored once. Layout:
+{SNAPSHOT_STORE_DIR}/ab/abcdef...64 hex....zst. Blobs are written to a
+temporary file and renamed into place, so readers never see a partial
+blob and concurrent writers of the same page do no harm.
+
+Analyses reference their page by hash (Analysis.html_snapshot_hash), which
+lets checks be re-run over past pages without fetching them again.
+"""
+
+import hashlib
+import mmap
+import os
+import tempfile
+import threading
+from datetime import timedelta
+from functools import lru_cache
+from typing import Dict, Iterator, Optional
+
+from ..core.config import settings
+
+
+class SnapshotNotFound(Exception):
+    """No blob with this hash in the store"""
+
+
+class SnapshotStore:
+    """Blobs under one directory; safe to share between threads and processes"""
+
+    def __init__(self, root: str, level: int = 10):
+        self.root = root
+        self.level = level
+        # zstd (de)compressors are not thread-safe; one of each per thread
+        self._local = threading.local()
+
+    def path(self, digest: str) -> str:
+        return os.path.join(self.root, digest[:2], f"{digest}.zst")
+
+    def put(self, html: str) -> str:
+        """Store `html` unless an identical page is stored; returns its hash"""
+        body = html.encode("utf-8")
+        digest = hashlib.sha256(body).hexdigest()
+        path = self.path(digest)
+        if os.path.exists(path):
+            return digest
+
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(self._compressor().compress(body))
+            os.replace(temp_path, path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+        return digest
+
+    def get(self, digest: str) -> str:
+        """HTML of a stored page; the blob is decompressed straight from a memory map"""
+        try:
+            f = open(self.path(digest), "rb")
+        except FileNotFoundError:
+            raise SnapshotNotFound(digest) from None
+        with f:
+            try:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as blob:
+                    body = self._decompressor().decompress(blob)
+            except (ValueError, OSError):
+                # Empty or unmappable file (e.g. some network filesystems)
+                body = self._decompressor().decompress(f.read())
+        return body.decode("utf-8")
+
+    def contains(self, digest: str) -> bool:
+        return os.path.exists(self.path(digest))
+
+    def hashes(self) -> Iterator[str]:
+        """Hashes of every stored blob"""
+        if not os.path.isdir(self.root):
+            return
+        for prefix in sorted(os.listdir(self.root)):
+            directory = os.path.join(self.root, prefix)
+            if len(prefix) != 2 or not os.path.isdir(directory):
+                continue
+            for name in sorted(os.listdir(directory)):
+                if name.endswith(".zst"):
+                    yield name[:-4]
+
+    def _compressor(self):
+        compressor = getattr(self._local, "compressor", None)
+        if compressor is None:
+            import zstandard
+            compressor = self._local.compressor = zstandard.ZstdCompressor(level=self.level)
+        return compressor
+
+    def _decompressor(self):
+        decompressor = getattr(self._local, "decompressor", None)
+        if decompressor is None:
+            import zstandard
+            decompressor = self._local.decompressor = zstandard.ZstdDecompressor()
+        return decompressor
+
+
+class SnapshotResponse:
+    """
+    Stand-in for the requests.Response of a stored page, for scoring it
+    offline (url, status_code, elapsed, text and content)
+    """
+
+    def __init__(self, text: str, url: str, status_code: int = 200, response_time: float = 0.0):
+        self.text = text
+        self.url = url
+        self.status_code = status_code
+        self.elapsed = timedelta(seconds=response_time)
+        self.encoding = "utf-8"
+
+    @property
+    def content(self) -> bytes:
+        return self.text.encode("utf-8")
+
+
+@lru_cache(maxsize=None)
+def get_snapshot_store() -> Optional[SnapshotStore]:
+    """The store under SNAPSHOT_STORE_DIR, or None when snapshots are off"""
+    if not settings.SNAPSHOT_STORE_DIR:
+        return None
+    return SnapshotStore(settings.SNAPSHOT_STORE_DIR, settings.SNAPSHOT_COMPRESSION_LEVEL)
+
+
+def snapshot_response(store: SnapshotStore, page_snapshot: Dict) -> SnapshotResponse:
+    """Rebuild the response of an analysis from its "page_snapshot" record"""
+    return SnapshotResponse(
+        store.get(page_snapshot["hash"]),
+        page_snapshot["final_url"],
+        page_snapshot.get("status_code", 200),
+        page_snapshot.get("response_time", 0.0)
+    )
+
+
+def store_snapshot(html: str) -> Optional[str]:
+    """Store a fetched page; its hash, or None when snapshots are off or the write fails"""
+    store = get_snapshot_store()
+    if store is None:
+        return None
+    try:
+        return store.put(html)
+    except OSError as e:
+        print(f"Snapshot store error: {str(e)}", flush=True)
+        return None
@@ -0,0 +1,5 @@
+"""
+End-to-end load test harness
+Runs the real FastAPI app against local stand-ins for target sites,
+Gemini and PageSpeed Insights (see loadtest/run.py)
+"""
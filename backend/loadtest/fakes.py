@@ -0,0 +1,307 @@
+"""
+Local stand-ins for the external services an analysis depends on
+
+- SiteFarm: target sites with generated HTML, robots.txt and sitemap.xml,
+  plus shared reference pages the sites link to (some redirect, some 404)
+  and the images, stylesheet and script the pages load
+- FakeGemini: generateContent REST endpoint returning valid JSON shaped
+  after the template in each prompt
+- FakePageSpeed: runPagespeed endpoint returning a Lighthouse result
+
+Each server runs in a daemon thread on an ephemeral port and sleeps for a
+configurable latency (with jitter) before answering.
+"""
+
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+# Filler text for generated pages and LLM answers
+JAPANESE_SENTENCE = "検索エンジン最適化ではページの表示速度と構造化データ、そして読者にとって有益なコンテンツが重要です。"
+
+
+class FakeServer:
+    """Threaded HTTP server with simulated latency and error injection"""
+
+    def __init__(self, latency_ms: float = 0, jitter: float = 0.2, error_rate: float = 0.0, seed: int = 0):
+        self.latency_ms = latency_ms
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.requests = 0
+        self.errors = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server: Optional[ThreadingHTTPServer] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FakeServer":
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                fake._serve(self, "GET")
+
+            def do_POST(self):
+                fake._serve(self, "POST")
+
+            def do_HEAD(self):
+                fake._serve(self, "HEAD")
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+
+    def _serve(self, handler: BaseHTTPRequestHandler, method: str):
+        with self._lock:
+            self.requests += 1
+            delay = self.latency_ms * (1 + self._random.uniform(-self.jitter, self.jitter)) / 1000
+            fail = self._random.random() < self.error_rate
+            if fail:
+                self.errors += 1
+
+        if delay > 0:
+            time.sleep(delay)
+
+        headers = {}
+        if fail:
+            status, content_type, body = 503, "application/json", b'{"error": {"code": 503, "message": "injected"}}'
+        else:
+            length = int(handler.headers.get("Content-Length") or 0)
+            request_body = handler.rfile.read(length) if length else b""
+            status, content_type, body, *extra = self.handle(method, urlparse(handler.path), request_body)
+            if extra:
+                headers = extra[0]
+
+        handler.send_response(status)
+        handler.send_header("Content-Type", content_type)
+        for name, value in headers.items():
+            handler.send_header(name, value)
+        handler.send_header("Content-Length", str(len(body)))
+        handler.end_headers()
+        if method != "HEAD":
+            handler.wfile.write(body)
+
+    def handle(self, method: str, url, body: bytes) -> Tuple:
+        """(status, content type, body) or (status, content type, body, extra headers)"""
+        raise NotImplementedError
+
+
+class SiteFarm(FakeServer):
+    """Target sites served under /s/{n}/, one generated page per site"""
+
+    def __init__(self, page_kb: int = 60, **kwargs):
+        super().__init__(**kwargs)
+        self.page_kb = page_kb
+
+    def site_url(self, index: int) -> str:
+        return f"{self.url}/s/{index}/"
+
+    def handle(self, method, url, body):
+        if url.path == "/robots.txt":
+            return 200, "text/plain", f"User-agent: *\nAllow: /\nSitemap: {self.url}/sitemap.xml\n".encode()
+
+        if url.path == "/sitemap.xml":
+            return 200, "application/xml", (
+                '<?xml version="1.0" encoding="UTF-8"?>'
+                '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">'
+                f"<url><loc>{self.url}/</loc></url></urlset>"
+            ).encode()
+
+        # Assets: the stylesheet and script are shared by every site
+        if url.path == "/assets/site.css":
+            return 200, "text/css", b"body { margin: 0 }\n" * 2000
+        if url.path == "/assets/app.js":
+            return 200, "application/javascript", b"console.log('loadtest');\n" * 4000
+        match = re.match(r"^/img/(\d+)-(\d+)\.jpg$", url.path)
+        if match:
+            return 200, "image/jpeg", b"\xff" * (20000 + 1000 * (int(match.group(2)) % 60))
+
+        # Reference pages: every 10th is gone, every 7th moved
+        match = re.match(r"^/ref/(\d+)(/final)?$", url.path)
+        if match:
+            section = int(match.group(1))
+            if section % 10 == 0:
+                return 404, "text/plain", b"not found"
+            if section % 7 == 0 and not match.group(2):
+                return 301, "text/plain", b"moved", {"Location": f"/ref/{section}/final"}
+            return 200, "text/html; charset=utf-8", f"<html><body>参考資料 {section}</body></html>".encode()
+
+        match = re.match(r"^/s/(\d+)/", url.path)
+        if not match:
+            return 404, "text/plain", b"not found"
+
+        return 200, "text/html; charset=utf-8", self.render_page(int(match.group(1))).encode()
+
+    def render_page(self, index: int) -> str:
+        """Deterministic page per site; sites differ in which SEO signals they have"""
+        rng = random.Random(index)
+        page_url = self.site_url(index)
+
+        head = [f"<title>ロードテスト サイト {index} | SEO分析のサンプルページ</title>"]
+        if rng.random() < 0.8:
+            head.append(f'<meta name="description" content="サイト{index}の説明文です。{JAPANESE_SENTENCE}">')
+        if rng.random() < 0.9:
+            head.append('<meta name="viewport" content="width=device-width, initial-scale=1">')
+        if rng.random() < 0.7:
+            head.append(f'<link rel="canonical" href="{page_url}">')
+        if rng.random() < 0.5:
+            head.append(
+                '<script type="application/ld+json">'
+                + json.dumps({"@context": "https://schema.org", "@type": "Organization", "name": f"Site {index}"})
+                + "</script>"
+            )
+        head.append('<meta property="og:title" content="ロードテスト">')
+        head.append(f'<link rel="stylesheet" href="{self.url}/assets/site.css">')
+        head.append(f'<script src="{self.url}/assets/app.js" defer></script>')
+
+        body = [f"<header><nav><a href=\"{page_url}\">ホーム</a> <a href=\"{page_url}about\">会社概要</a></nav></header>"]
+        body.append(f"<h1>サイト {index} のトップページ</h1>")
+
+        section = 0
+        while sum(len(part) for part in body) < self.page_kb * 1024 // 3:
+            section += 1
+            body.append(f"<h2>セクション {section}</h2>")
+            body.append("<p>" + JAPANESE_SENTENCE * rng.randint(3, 8) + "</p>")
+            alt = f' alt="画像 {section}"' if rng.random() < 0.7 else ""
+            body.append(f'<img src="/img/{index}-{section}.jpg"{alt} width="640" height="360">')
+            body.append(f'<a href="{self.url}/ref/{section}">参考資料 {section}</a>')
+
+        body.append("<footer><p>会社概要 お問い合わせ プライバシーポリシー</p></footer>")
+        return (
+            '<!DOCTYPE html><html lang="ja"><head><meta charset="utf-8">'
+            + "".join(head) + "</head><body>" + "".join(body) + "</body></html>"
+        )
+
+
+class FakeGemini(FakeServer):
+    """generateContent endpoint answering with the prompt's JSON template filled in"""
+
+    def __init__(self, answer_kb: int = 8, **kwargs):
+        super().__init__(**kwargs)
+        self.answer_kb = answer_kb
+
+    def handle(self, method, url, body):
+        if method != "POST" or not url.path.endswith(":generateContent"):
+            return 404, "application/json", b'{"error": {"code": 404}}'
+
+        request = json.loads(body or b"{}")
+        prompt = "".join(
+            part.get("text", "")
+            for content in request.get("contents", [])
+            for part in content.get("parts", [])
+        )
+        answer = self.fill_template(prompt)
+        text = "```json\n" + json.dumps(answer, ensure_ascii=False, indent=2) + "\n```"
+
+        return 200, "application/json", json.dumps({
+            "candidates": [{
+                "content": {"role": "model", "parts": [{"text": text}]},
+                "finishReason": "STOP",
+                "index": 0
+            }],
+            "usageMetadata": {
+                "promptTokenCount": len(prompt) // 2,
+                "candidatesTokenCount": len(text) // 2,
+                "totalTokenCount": (len(prompt) + len(text)) // 2
+            }
+        }, ensure_ascii=False).encode()
+
+    def fill_template(self, prompt: str) -> Dict:
+        """Turn the example JSON in a prompt into a concrete, valid answer"""
+        rng = random.Random(hashlib.sha1(prompt.encode()).hexdigest())
+        # The template is the last top-level object; earlier braces may come
+        # from the page's HTML or JSON-LD quoted in the prompt
+        start, end = prompt.rfind("\n{\n") + 1, prompt.rfind("}") + 1
+        template = prompt[start:end]
+
+        # Ranges such as 0-100 / "1-5" become numbers, "a/b/c" picks one option
+        template = re.sub(
+            r':\s*(?:"(\d+)-(\d+)"|(\d+)-(\d+)(?=\s*[,}\n]))',
+            lambda m: f": {rng.randint(int(m.group(1) or m.group(3)), int(m.group(2) or m.group(4)))}",
+            template
+        )
+        template = re.sub(
+            r'"([a-z_]+(?:/[a-z_]+)+)"',
+            lambda m: '"' + rng.choice(m.group(1).split("/")) + '"',
+            template
+        )
+
+        try:
+            answer = json.loads(template)
+        except ValueError:
+            answer = {"overall_assessment": JAPANESE_SENTENCE}
+
+        # Templates show one example item per list; answer with several
+        answer = _expand_lists(answer, rng)
+
+        # Pad free-text fields so answers have a realistic size
+        answer["overall_assessment"] = JAPANESE_SENTENCE * max(1, self.answer_kb * 1024 // 3 // len(JAPANESE_SENTENCE))
+        return answer
+
+
+class FakePageSpeed(FakeServer):
+    """runPagespeed endpoint returning a minimal Lighthouse result"""
+
+    def handle(self, method, url, body):
+        params = parse_qs(url.query)
+        target = params.get("url", [""])[0]
+        strategy = params.get("strategy", ["mobile"])[0]
+        rng = random.Random(f"{target}:{strategy}")
+
+        def audit(value: float, display: str) -> Dict:
+            return {"numericValue": value, "displayValue": display}
+
+        lcp_ms = rng.uniform(1200, 5000)
+        return 200, "application/json", json.dumps({
+            "lighthouseResult": {
+                "categories": {
+                    name: {"score": round(rng.uniform(0.4, 1.0), 2)}
+                    for name in ("performance", "accessibility", "best-practices", "seo")
+                },
+                "audits": {
+                    "largest-contentful-paint": audit(lcp_ms, f"{lcp_ms / 1000:.1f} s"),
+                    "max-potential-fid": audit(rng.uniform(50, 400), "100 ms"),
+                    "cumulative-layout-shift": audit(rng.uniform(0, 0.3), "0.1"),
+                    "first-contentful-paint": audit(rng.uniform(800, 3000), "1.5 s"),
+                    "speed-index": audit(rng.uniform(1500, 6000), "3.0 s"),
+                    "total-blocking-time": audit(rng.uniform(0, 800), "200 ms"),
+                    "interactive": audit(rng.uniform(2000, 9000), "5.0 s"),
+                }
+            }
+        }).encode()
+
+
+def _expand_lists(value, rng: random.Random):
+    """Repeat the single example object of each list a few times"""
+    if isinstance(value, dict):
+        return {key: _expand_lists(item, rng) for key, item in value.items()}
+    if isinstance(value, list) and value and isinstance(value[0], dict):
+        items = []
+        for n in range(rng.randint(2, 5)):
+            item = _expand_lists(value[0], rng)
+            if "title" in item:
+                item["title"] = f"{item['title']} {n + 1}"
+            items.append(item)
+        return items
+    return value
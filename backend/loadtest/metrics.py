@@ -0,0 +1,186 @@
+"""
+Load test measurements: request latencies, analysis queue depth and
+database lock waits
+"""
+
+import threading
+import time
+from collections import defaultdict
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy import event
+
+# Statements that take SQLite's write lock (or row locks on PostgreSQL)
+WRITE_STATEMENTS = ("INSERT", "UPDATE", "DELETE", "REPLACE")
+
+
+def percentile(sorted_values: List[float], pct: float) -> Optional[float]:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    rank = max(0, min(len(sorted_values) - 1, round(pct / 100 * len(sorted_values) + 0.5) - 1))
+    return sorted_values[rank]
+
+
+def summarize(values: List[float]) -> Dict:
+    """count / mean / p50 / p90 / p95 / p99 / max of a list of milliseconds"""
+    ordered = sorted(values)
+    return {
+        "count": len(ordered),
+        "mean": sum(ordered) / len(ordered) if ordered else None,
+        "p50": percentile(ordered, 50),
+        "p90": percentile(ordered, 90),
+        "p95": percentile(ordered, 95),
+        "p99": percentile(ordered, 99),
+        "max": ordered[-1] if ordered else None,
+    }
+
+
+class LatencyRecorder:
+    """Thread-safe latency samples grouped by operation name"""
+
+    def __init__(self):
+        self._samples = defaultdict(list)
+        self._lock = threading.Lock()
+
+    def record(self, name: str, ms: float):
+        with self._lock:
+            self._samples[name].append(ms)
+
+    def samples(self, name: str) -> List[float]:
+        with self._lock:
+            return list(self._samples.get(name, []))
+
+    def summary(self) -> Dict[str, Dict]:
+        with self._lock:
+            return {name: summarize(values) for name, values in self._samples.items()}
+
+
+class StatementTimer:
+    """
+    Times every statement on the given engines
+
+    Write statements include the time spent waiting for SQLite's write lock
+    (busy_timeout) or PostgreSQL row locks, so their tail is the lock wait.
+    """
+
+    def __init__(self, slow_write_ms: float = 50.0):
+        self.slow_write_ms = slow_write_ms
+        self.reads = LatencyRecorder()
+        self.writes = LatencyRecorder()
+        self.lock_errors = 0
+        self._lock = threading.Lock()
+
+    def attach(self, engine):
+        event.listen(engine, "before_cursor_execute", self._before)
+        event.listen(engine, "after_cursor_execute", self._after)
+        event.listen(engine, "handle_error", self._error)
+
+    def _before(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("loadtest_started", []).append(time.perf_counter())
+
+    def _after(self, conn, cursor, statement, parameters, context, executemany):
+        started = conn.info["loadtest_started"].pop()
+        ms = (time.perf_counter() - started) * 1000
+        kind = statement.lstrip()[:7].upper()
+        recorder = self.writes if kind.startswith(WRITE_STATEMENTS) else self.reads
+        recorder.record("all", ms)
+
+    def _error(self, context):
+        stack = context.connection.info.get("loadtest_started") if context.connection else None
+        if stack:
+            stack.pop()
+        message = str(context.original_exception).lower()
+        if "locked" in message or "lock timeout" in message or "deadlock" in message:
+            with self._lock:
+                self.lock_errors += 1
+
+    def summary(self) -> Dict:
+        writes = self.writes.samples("all")
+        return {
+            "reads": summarize(self.reads.samples("all")),
+            "writes": summarize(writes),
+            "slow_writes": sum(1 for ms in writes if ms >= self.slow_write_ms),
+            "slow_write_threshold_ms": self.slow_write_ms,
+            "lock_errors": self.lock_errors,
+        }
+
+
+class QueueSampler(threading.Thread):
+    """Samples the number of unfinished analyses and pool usage over time"""
+
+    def __init__(
+        self,
+        count_unfinished: Callable[[], int],
+        pool_status: Callable[[], Dict],
+        worker_target: str = "run_analysis_in_thread",
+        interval: float = 0.5
+    ):
+        super().__init__(daemon=True)
+        self.worker_target = worker_target
+        self.count_unfinished = count_unfinished
+        self.pool_status = pool_status
+        self.interval = interval
+        self.samples: List[Dict] = []
+        self.submitting = True
+        self._stop_event = threading.Event()
+        self._started_at = time.perf_counter()
+
+    def run(self):
+        while not self._stop_event.is_set():
+            self.sample()
+            self._stop_event.wait(self.interval)
+
+    def sample(self):
+        status = self.pool_status()
+        self.samples.append({
+            "t": time.perf_counter() - self._started_at,
+            "depth": self.count_unfinished(),
+            "workers": _count_threads(self.worker_target),
+            "checked_out": _checked_out(status),
+            "submitting": self.submitting,
+        })
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+        self.sample()
+
+    def summary(self) -> Dict:
+        depths = [s["depth"] for s in self.samples]
+        submit_phase = [s for s in self.samples if s["submitting"]]
+        checked_out = [s["checked_out"] for s in self.samples if s["checked_out"] is not None]
+        return {
+            "max_depth": max(depths) if depths else 0,
+            "final_depth": depths[-1] if depths else 0,
+            # Slope while jobs are still being submitted: >0 means the
+            # workers fall behind the arrival rate
+            "growth_per_second": _slope([s["t"] for s in submit_phase], [s["depth"] for s in submit_phase]),
+            "max_workers": max(s["workers"] for s in self.samples) if self.samples else 0,
+            "max_pool_checked_out": max(checked_out) if checked_out else None,
+            "timeline": [(round(s["t"], 1), s["depth"]) for s in self.samples],
+        }
+
+
+def _count_threads(target_name: str) -> int:
+    """Live threads started with the given target (Python names them after it)"""
+    return sum(1 for thread in threading.enumerate() if f"({target_name})" in thread.name)
+
+
+def _checked_out(status: Dict) -> Optional[int]:
+    """Connections in use across the sync and async pools (QueuePool only)"""
+    counts = [status[pool].get("checkedout") for pool in ("sync_pool", "async_pool")]
+    counts = [count for count in counts if count is not None]
+    return sum(counts) if counts else None
+
+
+def _slope(xs: List[float], ys: List[float]) -> Optional[float]:
+    """Least-squares slope of ys over xs"""
+    if len(xs) < 2:
+        return None
+    mean_x = sum(xs) / len(xs)
+    mean_y = sum(ys) / len(ys)
+    denominator = sum((x - mean_x) ** 2 for x in xs)
+    if denominator == 0:
+        return None
+    return sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys)) / denominator
@@ -0,0 +1,272 @@
+"""
+Load test runner
+Usage (from backend/): python -m loadtest.run --cycles 50 --concurrency 10
+
+Starts the fake site farm, Gemini and PageSpeed servers, points the app at
+them through environment variables, serves the real FastAPI app in this
+process and drives create site -> analyze -> poll progress -> fetch latest
+cycles. Reports throughput, latency percentiles, analysis queue growth and
+database lock waits.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import shutil
+import socket
+import tempfile
+import threading
+import time
+from collections import Counter
+from typing import Dict
+
+import httpx
+
+from .fakes import SiteFarm, FakeGemini, FakePageSpeed
+from .metrics import LatencyRecorder, StatementTimer, QueueSampler
+
+# Steps reported in the latency table, in cycle order
+STEPS = ["create_site", "start_analysis", "poll_progress", "fetch_latest", "cycle"]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="End-to-end load test against local fake services")
+    parser.add_argument("--cycles", type=int, default=20, help="analyses to run in total")
+    parser.add_argument("--concurrency", type=int, default=5, help="concurrent virtual users")
+    parser.add_argument("--ramp-up", type=float, default=0.0, help="seconds over which users start")
+    parser.add_argument("--poll-interval", type=float, default=0.5)
+    parser.add_argument("--cycle-timeout", type=float, default=300.0)
+    parser.add_argument("--database-url", default=None, help="defaults to a temporary SQLite file")
+    parser.add_argument("--site-latency-ms", type=float, default=100)
+    parser.add_argument("--page-kb", type=int, default=60)
+    parser.add_argument("--gemini-latency-ms", type=float, default=1500)
+    parser.add_argument("--gemini-answer-kb", type=int, default=8)
+    parser.add_argument("--gemini-error-rate", type=float, default=0.0)
+    parser.add_argument("--psi-latency-ms", type=float, default=800)
+    parser.add_argument("--psi-error-rate", type=float, default=0.0)
+    parser.add_argument("--no-llm", action="store_true", help="run without Gemini (rule-based analysis only)")
+    parser.add_argument("--slow-write-ms", type=float, default=50.0, help="write time counted as a lock wait")
+    parser.add_argument("--asgi", action="store_true", help="call the app through ASGI instead of uvicorn")
+    parser.add_argument("--json", dest="json_path", default=None, help="also write the report as JSON")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+
+    farm = SiteFarm(page_kb=args.page_kb, latency_ms=args.site_latency_ms).start()
+    gemini = FakeGemini(
+        answer_kb=args.gemini_answer_kb, latency_ms=args.gemini_latency_ms, error_rate=args.gemini_error_rate
+    ).start()
+    pagespeed = FakePageSpeed(latency_ms=args.psi_latency_ms, error_rate=args.psi_error_rate).start()
+
+    workdir = tempfile.mkdtemp(prefix="seo-loadtest-")
+    os.environ.update({
+        "DATABASE_URL": args.database_url or f"sqlite:///{workdir}/loadtest.db",
+        "AUTO_CREATE_TABLES": "True",
+        "PAGESPEED_API_URL": f"{pagespeed.url}/pagespeedonline/v5/runPagespeed",
+        "PAGESPEED_API_KEY": "loadtest",
+        "GEMINI_API_KEY": "" if args.no_llm else "loadtest",
+        "GEMINI_API_ENDPOINT": gemini.url,
+    })
+
+    # Settings are read on import, so the app is imported after the environment is set
+    from sqlalchemy import func
+    from app.core import database
+    from app.main import app
+    from app.models.site import AnalysisProgress
+
+    timer = StatementTimer(slow_write_ms=args.slow_write_ms)
+    timer.attach(database.engine)
+    timer.attach(database.async_engine.sync_engine)
+
+    def count_unfinished() -> int:
+        with database.SessionLocal() as db:
+            return db.query(func.count(AnalysisProgress.id)).filter(
+                AnalysisProgress.status.in_(["pending", "running", "cancelling"])
+            ).scalar()
+
+    server = None
+    try:
+        if args.asgi:
+            database.init_db()
+            transport = httpx.ASGITransport(app=app)
+            base_url = "http://loadtest"
+        else:
+            server, base_url = start_uvicorn(app)
+            transport = None
+
+        sampler = QueueSampler(count_unfinished, database.get_pool_status)
+        sampler.start()
+        latencies = LatencyRecorder()
+
+        outcomes, elapsed = asyncio.run(drive(args, base_url, transport, farm, latencies, sampler))
+        sampler.stop()
+
+        report = build_report(args, outcomes, elapsed, latencies, sampler, timer, farm, gemini, pagespeed)
+        print_report(report)
+        if args.json_path:
+            with open(args.json_path, "w") as f:
+                json.dump(report, f, indent=2, ensure_ascii=False)
+
+    finally:
+        if server:
+            server.should_exit = True
+        for fake in (farm, gemini, pagespeed):
+            fake.stop()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def start_uvicorn(app):
+    """Serve the app with uvicorn on a free port in a background thread"""
+    import uvicorn
+
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    server.install_signal_handlers = lambda: None  # not the main thread
+    threading.Thread(target=server.run, daemon=True).start()
+
+    deadline = time.monotonic() + 30
+    while not server.started:
+        if time.monotonic() > deadline:
+            raise RuntimeError("uvicorn did not start")
+        time.sleep(0.05)
+
+    return server, f"http://127.0.0.1:{port}"
+
+
+async def drive(args, base_url, transport, farm, latencies, sampler):
+    """Run all cycles with `concurrency` virtual users; returns (outcomes, seconds)"""
+    indices = iter(range(args.cycles))
+    outcomes = Counter()
+    submitted = 0
+    run_id = int(time.time())
+
+    def on_submitted():
+        nonlocal submitted
+        submitted += 1
+        if submitted >= args.cycles:
+            sampler.submitting = False
+
+    limits = httpx.Limits(max_connections=args.concurrency * 2)
+    async with httpx.AsyncClient(base_url=base_url, transport=transport, limits=limits, timeout=60) as client:
+
+        async def user(n: int):
+            if args.ramp_up:
+                await asyncio.sleep(args.ramp_up * n / args.concurrency)
+            for index in indices:
+                outcome = await run_cycle(client, f"{run_id}-{index}", farm.site_url(index), args, latencies, on_submitted)
+                outcomes[outcome] += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(user(n) for n in range(args.concurrency)))
+        return outcomes, time.perf_counter() - started
+
+
+async def run_cycle(client, name, site_url, args, latencies, on_submitted) -> str:
+    """One create -> analyze -> poll -> fetch cycle; returns its outcome"""
+    started = time.perf_counter()
+    try:
+        response = await _timed(latencies, "create_site", client.post(
+            "/api/v1/sites/", json={"domain": f"site-{name}.loadtest", "url": site_url, "name": f"Load test {name}"}
+        ))
+        response.raise_for_status()
+        site_id = response.json()["id"]
+
+        try:
+            response = await _timed(latencies, "start_analysis", client.post(f"/api/v1/analysis/{site_id}"))
+            response.raise_for_status()
+        finally:
+            on_submitted()
+
+        while True:
+            await asyncio.sleep(args.poll_interval)
+            response = await _timed(latencies, "poll_progress", client.get(f"/api/v1/analysis/{site_id}/progress"))
+            response.raise_for_status()
+            status = response.json()["status"]
+            if status in ("completed", "failed", "cancelled"):
+                break
+            if time.perf_counter() - started > args.cycle_timeout:
+                return "timeout"
+
+        if status in ("failed", "cancelled"):
+            return status
+
+        response = await _timed(latencies, "fetch_latest", client.get(f"/api/v1/analysis/{site_id}/latest"))
+        response.raise_for_status()
+        latencies.record("cycle", (time.perf_counter() - started) * 1000)
+        return "completed"
+
+    except httpx.HTTPError:
+        return "error"
+
+
+async def _timed(latencies: LatencyRecorder, name: str, request):
+    started = time.perf_counter()
+    response = await request
+    latencies.record(name, (time.perf_counter() - started) * 1000)
+    return response
+
+
+def build_report(args, outcomes, elapsed, latencies, sampler, timer, farm, gemini, pagespeed) -> Dict:
+    return {
+        "config": vars(args),
+        "outcomes": dict(outcomes),
+        "elapsed_seconds": elapsed,
+        "throughput_per_minute": outcomes["completed"] / elapsed * 60 if elapsed else 0,
+        "latency_ms": latencies.summary(),
+        "queue": sampler.summary(),
+        "database": timer.summary(),
+        "fakes": {
+            name: {"requests": fake.requests, "injected_errors": fake.errors}
+            for name, fake in (("site_farm", farm), ("gemini", gemini), ("pagespeed", pagespeed))
+        },
+    }
+
+
+def print_report(report: Dict):
+    config = report["config"]
+    print()
+    print(f"=== {config['cycles']} cycles, concurrency {config['concurrency']} ===")
+    print("outcomes: " + ", ".join(f"{k} {v}" for k, v in sorted(report["outcomes"].items())))
+    print(f"wall time {report['elapsed_seconds']:.1f}s, throughput {report['throughput_per_minute']:.1f} analyses/min")
+
+    print()
+    print(f"{'latency (ms)':<16}{'count':>7}{'mean':>9}{'p50':>9}{'p90':>9}{'p95':>9}{'p99':>9}{'max':>9}")
+    for step in STEPS:
+        stats = report["latency_ms"].get(step)
+        if stats:
+            print(f"{step:<16}{stats['count']:>7}" + "".join(
+                f"{stats[key]:>9.1f}" for key in ("mean", "p50", "p90", "p95", "p99", "max")
+            ))
+
+    queue = report["queue"]
+    growth = queue["growth_per_second"]
+    print()
+    print(f"analysis queue: max depth {queue['max_depth']}, final depth {queue['final_depth']}, "
+          f"growth {growth:+.2f}/s while submitting" if growth is not None else
+          f"analysis queue: max depth {queue['max_depth']}, final depth {queue['final_depth']}")
+    print(f"worker threads: max {queue['max_workers']}, "
+          f"pool connections in use: max {queue['max_pool_checked_out']}")
+
+    db = report["database"]
+    for kind in ("reads", "writes"):
+        stats = db[kind]
+        if stats["count"]:
+            print(f"db {kind:<6}: {stats['count']} statements, p50 {stats['p50']:.2f} ms, "
+                  f"p99 {stats['p99']:.2f} ms, max {stats['max']:.2f} ms")
+    print(f"lock waits: {db['slow_writes']} writes >= {db['slow_write_threshold_ms']:.0f} ms, "
+          f"{db['lock_errors']} lock errors")
+
+    print("fakes: " + ", ".join(
+        f"{name} {stats['requests']} req ({stats['injected_errors']} injected errors)"
+        for name, stats in report["fakes"].items()
+    ))
+
+
+if __name__ == "__main__":
+    main()
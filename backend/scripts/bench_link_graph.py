@@ -0,0 +1,68 @@
+"""
+Link graph benchmark
+Usage: python scripts/bench_link_graph.py [--pages 100000] [--links-per-page 30]
+
+Builds a synthetic site (a page tree plus random cross links, with a few
+orphans) and times graph construction, PageRank, click depth and the full
+metrics summary.
+"""
+import argparse
+import sys
+import os
+import time
+
+# Add the backend directory to the Python path
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, backend_dir)
+
+import numpy as np
+
+from app.services.link_graph import LinkGraph, link_graph_metrics
+
+
+def synthetic_site(pages: int, links_per_page: int, seed: int = 0):
+    """Tree of navigation links (10 children per page) plus random cross links"""
+    rng = np.random.default_rng(seed)
+    children = np.arange(1, pages)
+    tree_sources = (children - 1) // 10
+    cross_sources = np.repeat(np.arange(pages), links_per_page - 1)
+    cross_targets = rng.integers(0, pages, size=len(cross_sources))
+    # The last 1% of pages get no incoming links at all
+    orphan_start = pages - pages // 100
+    keep = (children < orphan_start)
+    cross_keep = cross_targets < orphan_start
+    sources = np.concatenate([tree_sources[keep], cross_sources[cross_keep]])
+    targets = np.concatenate([children[keep], cross_targets[cross_keep]])
+    return sources, targets
+
+
+def timed(label: str, func):
+    started = time.perf_counter()
+    value = func()
+    print(f"{label:<16}: {(time.perf_counter() - started) * 1000:8.1f} ms")
+    return value
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--pages", type=int, default=100000)
+    parser.add_argument("--links-per-page", type=int, default=30)
+    args = parser.parse_args()
+
+    sources, targets = synthetic_site(args.pages, args.links_per_page)
+    print(f"pages: {args.pages}, raw links: {len(sources)}")
+
+    graph = timed("build", lambda: LinkGraph(args.pages, sources, targets))
+    timed("pagerank", graph.pagerank)
+    timed("click depth", graph.click_depth)
+    urls = [f"/p/{i}" for i in range(args.pages)]
+    metrics = timed("metrics", lambda: link_graph_metrics(graph, urls))
+
+    memory = graph.indices.nbytes + graph.indptr.nbytes + graph._edge_sources.nbytes
+    print(f"links: {graph.num_links}, graph arrays: {memory / 1e6:.1f} MB")
+    print(f"max depth: {metrics['max_depth']}, orphans: {metrics['orphan_count']}, "
+          f"within 3 clicks: {metrics['within_3_clicks_ratio']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Parse pool benchmark
+Usage: python scripts/bench_parse_pool.py [--pages 400] [--threads 8] [--workers 4]
+
+Parses and scores synthetic pages from --threads concurrent threads (like
+concurrent analyses), first in the threads themselves, then through a
+parse pool of --workers processes, and reports pages per second. Scaling
+is bounded by the cores available (os.cpu_count()).
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Add the backend directory to the Python path
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, backend_dir)
+
+from app.core.config import settings
+from app.services import parse_pool
+from app.services.seo_analyzer import SEOAnalyzer
+from app.services.snapshot_store import SnapshotResponse
+
+WORDS = ["seo", "analysis", "ページ", "コンテンツ", "search", "ranking", "link", "site"]
+
+
+def synthetic_page(rng: random.Random, index: int) -> str:
+    """An article-like page of roughly 10-50 KB"""
+    parts = [
+        "<!DOCTYPE html><html><head>",
+        f"<title>Synthetic page {index} タイトル</title>",
+        '<meta name="description" content="' + " ".join(rng.choices(WORDS, k=20)) + '">',
+        '<meta name="viewport" content="width=device-width">',
+        '<meta property="og:title" content="x"><meta property="og:type" content="article">',
+    ]
+    parts += [f'<script src="/js/{k}.js"></script>' for k in range(rng.randint(2, 15))]
+    parts += [f'<link rel="stylesheet" href="/css/{k}.css">' for k in range(rng.randint(1, 4))]
+    parts.append("</head><body><nav>" + "".join(f'<a href="/p/{k}">nav {k}</a>' for k in range(30)) + "</nav><main>")
+    parts.append(f"<h1>Heading {index}</h1>")
+    for section in range(rng.randint(5, 15)):
+        parts.append(f"<h2>Section {section}</h2>")
+        for _ in range(rng.randint(2, 6)):
+            parts.append("<p>" + " ".join(rng.choices(WORDS, k=rng.randint(40, 120))) + "</p>")
+        parts.append(f'<img src="/img/{index}-{section}.png" alt="figure {section}">')
+        parts.append(f'<a href="https://example.com/ref/{section}">reference</a>')
+    parts.append("</main></body></html>")
+    return "".join(parts)
+
+
+def run(analyzer: SEOAnalyzer, pages, threads: int) -> float:
+    """Pages per second parsed and scored from `threads` threads"""
+    def analyze(item):
+        url, response = item
+        page = parse_pool.parse_response(
+            response, settings.LINK_CHECK_MAX_LINKS, settings.RESOURCE_AUDIT_MAX_RESOURCES
+        ).result()
+        return analyzer.score_page(url, response, page, {"robots_txt": True, "sitemap": True})
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(analyze, pages))
+    return len(pages) / (time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--pages", type=int, default=400)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    pages = []
+    for index in range(args.pages):
+        url = f"https://site{index}.example/"
+        pages.append((url, SnapshotResponse(synthetic_page(rng, index), url, response_time=0.4)))
+    size = sum(len(response.content) for _, response in pages) / len(pages)
+    print(f"{args.pages} pages ({size / 1024:.0f} KB mean), {args.threads} threads, {os.cpu_count()} CPUs")
+
+    analyzer = SEOAnalyzer(use_llm=False)
+    settings.PARSE_POOL_WORKERS = 0
+    print(f"in threads       : {run(analyzer, pages, args.threads):7.1f} pages/s")
+
+    settings.PARSE_POOL_WORKERS = args.workers
+    # Start the workers before timing
+    for future in [parse_pool.parse_response(response) for _, response in pages[:args.workers]]:
+        future.result()
+    print(f"pool, {args.workers:>2} workers: {run(analyzer, pages, args.threads):7.1f} pages/s")
+    parse_pool.shutdown_parse_pool()
+
+
+if __name__ == "__main__":
+    main()
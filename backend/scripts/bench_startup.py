@@ -0,0 +1,99 @@
+"""
+Cold-start benchmark for the API
+Usage: python scripts/bench_startup.py [--runs 5] [--max-import-ms 800] [--max-rss-mb 120]
+
+Imports app.main in fresh interpreters (as a serverless cold start does),
+serves one /health request, and reports import time and peak RSS. Exits
+with status 1 when the median exceeds the budget or when a heavy SDK is
+imported eagerly.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules that must only be loaded on first use
+LAZY_MODULES = [
+    "google.generativeai",
+    "googleapiclient",
+    "bs4",
+    "lxml",
+    "requests",
+    "numpy",
+]
+
+PROBE = """
+import json, resource, sys, time
+start = time.perf_counter()
+import app.main
+import_ms = (time.perf_counter() - start) * 1000
+
+from starlette.testclient import TestClient
+start = time.perf_counter()
+status = TestClient(app.main.app).get("/health").status_code
+health_ms = (time.perf_counter() - start) * 1000
+
+print(json.dumps({
+    "import_ms": import_ms,
+    "health_ms": health_ms,
+    "health_status": status,
+    "rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    "eager_modules": [name for name in %r if name in sys.modules],
+}))
+""" % (LAZY_MODULES,)
+
+
+def run_once() -> dict:
+    """Measure one cold start in a fresh interpreter"""
+    env = dict(os.environ)
+    env.setdefault("DATABASE_URL", "sqlite:///:memory:")
+    result = subprocess.run(
+        [sys.executable, "-c", PROBE],
+        cwd=backend_dir, env=env, capture_output=True, text=True, check=True
+    )
+    # app.main prints startup logs; the measurement is the last line
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--max-import-ms", type=float, default=float(os.getenv("STARTUP_BUDGET_IMPORT_MS", 800)))
+    parser.add_argument("--max-rss-mb", type=float, default=float(os.getenv("STARTUP_BUDGET_RSS_MB", 120)))
+    args = parser.parse_args()
+
+    samples = [run_once() for _ in range(args.runs)]
+    import_ms = statistics.median(s["import_ms"] for s in samples)
+    health_ms = statistics.median(s["health_ms"] for s in samples)
+    rss_mb = statistics.median(s["rss_mb"] for s in samples)
+    eager = sorted({name for s in samples for name in s["eager_modules"]})
+
+    print(f"import app.main : {import_ms:8.1f} ms (budget {args.max_import_ms:.0f} ms)")
+    print(f"first /health   : {health_ms:8.1f} ms")
+    print(f"peak RSS        : {rss_mb:8.1f} MB (budget {args.max_rss_mb:.0f} MB)")
+    print(f"eager heavy SDKs: {', '.join(eager) or 'none'}")
+
+    failures = []
+    if import_ms > args.max_import_ms:
+        failures.append("import time over budget")
+    if rss_mb > args.max_rss_mb:
+        failures.append("RSS over budget")
+    if eager:
+        failures.append("heavy modules imported at startup")
+    if any(s["health_status"] != 200 for s in samples):
+        failures.append("/health did not return 200")
+
+    if failures:
+        print("FAIL: " + "; ".join(failures))
+        return 1
+
+    print("OK")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,163 @@
+"""
+Scoring parity check
+Usage: python scripts/check_scoring_parity.py [--pages 3000] [--seed 0]
+
+Scores synthetic pages (random titles, headings, images, links, scripts,
+response times, crawl and resource audit results around the rule
+thresholds) with the default scoring profile and a tuned one, and checks
+for every page and profile that the score breakdown agrees with the
+scores:
+
+- each category score is its breakdown's points_earned summed (capped
+  at 100), and no rule earns more than its max_points
+- re-scoring the feature vector rebuilt from the breakdown
+  (features_from_breakdown, as --backfill does) gives the same scores
+
+Exits with status 1 and prints the first mismatches when any check fails.
+"""
+import argparse
+import os
+import random
+import sys
+
+# Add the backend directory to the Python path
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, backend_dir)
+
+from app.services.parse_pool import parse_page
+from app.services.scoring import CATEGORIES, DEFAULT_PROFILE, features_from_breakdown, resolve_profile, score_features
+from app.services.seo_analyzer import SEOAnalyzer
+from app.services.snapshot_store import SnapshotResponse
+
+# Every threshold of the default profile moved, and some points changed
+TUNED_PROFILE = resolve_profile({
+    "weights": {"technical": 0.25, "content": 0.35, "user_experience": 0.25, "authority": 0.15},
+    "technical": {"ssl": 10, "response_time": {"below": [[1, 25], [3, 15], [5, 5]]}},
+    "content": {
+        "title": {"optimal": [20, 50], "present_points": 10},
+        "meta_description": {"optimal": [80, 140]},
+        "h1": {"multiple_points": 5},
+        "word_count": {"at_least": [[600, 20], [200, 10]]},
+    },
+    "user_experience": {
+        "image_alt": 20,
+        "internal_links": {"at_least": [[10, 30], [3, 20], [1, 5]]},
+        "site_structure": {"points": 30, "within_3_clicks_weight": 0.8, "linked_weight": 0.2},
+        "scripts": {"at_most": [[5, 25], [15, 15]]},
+        "page_weight": {"tiers": [[1024 * 1024, 100 * 1024, 25], [3 * 1024 * 1024, 300 * 1024, 15]]},
+    },
+    "authority": {"base": 40, "open_graph": {"min_tags": 2}, "twitter_card": {"min_tags": 1, "points": 20}},
+})
+
+WORDS = ["seo", "analysis", "ページ", "コンテンツ", "search", "ranking", "link", "site"]
+
+
+def synthetic_page(rng: random.Random, index: int) -> str:
+    """A page whose signals spread around the rule thresholds"""
+    parts = ["<!DOCTYPE html><html><head>"]
+    if rng.random() < 0.9:
+        parts.append(f"<title>{'t' * rng.randint(0, 80)}</title>")
+    if rng.random() < 0.8:
+        parts.append(f'<meta name="description" content="{"d" * rng.randint(0, 200)}">')
+    if rng.random() < 0.7:
+        parts.append('<meta name="viewport" content="width=device-width">')
+    if rng.random() < 0.5:
+        parts.append(f'<link rel="canonical" href="https://site{index}.example/">')
+    parts += [f'<meta property="og:p{k}" content="x">' for k in range(rng.randint(0, 5))]
+    parts += [f'<meta name="twitter:p{k}" content="x">' for k in range(rng.randint(0, 3))]
+    parts += ['<script type="application/ld+json">{}</script>' for _ in range(rng.randint(0, 2))]
+    parts += [f'<script src="/js/{k}.js"></script>' for k in range(rng.randint(0, 25))]
+    parts.append("</head><body>")
+    parts += [f"<h1>Heading {k}</h1>" for k in range(rng.randint(0, 3))]
+    parts += ["<h2>Section</h2>" for _ in range(rng.randint(0, 4))]
+    parts += ["<h3>Subsection</h3>" for _ in range(rng.randint(0, 3))]
+    parts.append("<p>" + " ".join(rng.choices(WORDS, k=rng.choice([0, 50, 150, 250, 400, 700, 1200]))) + "</p>")
+    for k in range(rng.randint(0, 12)):
+        parts.append(f'<img src="/img/{k}.png"' + (' alt="figure"' if rng.random() < 0.7 else "") + ">")
+    parts += [f'<a href="/p/{k}">link {k}</a>' for k in range(rng.randint(0, 15))]
+    parts.append("</body></html>")
+    return "".join(parts)
+
+
+def synthetic_inputs(rng: random.Random, index: int):
+    """(url, response, probes, site_structure, resource_audit) of one page"""
+    url = rng.choice(["https", "http"]) + f"://site{index}.example/"
+    # Response times with two decimals, as the breakdown keeps them
+    response = SnapshotResponse(synthetic_page(rng, index), url, response_time=rng.randint(0, 600) / 100)
+    probes = {"robots_txt": rng.choice([True, False, None]), "sitemap": rng.choice([True, False, None])}
+    site_structure = None
+    if rng.random() < 0.4:
+        site_structure = {
+            "pages": 40,
+            "within_3_clicks_ratio": rng.random(),
+            "orphan_ratio": rng.random() * 0.5,
+            "orphan_count": rng.randint(0, 20),
+            "root": {"inlinks": 1, "outlinks": 5, "pagerank": 0.1, "pagerank_percentile": 50},
+        }
+    resource_audit = None
+    if rng.random() < 0.5:
+        resource_audit = {
+            "total_bytes": rng.randint(100 * 1024, 6 * 1024 * 1024),
+            "render_blocking_bytes": rng.randint(0, 800 * 1024),
+            "render_blocking_resources": rng.randint(0, 10),
+        }
+    return url, response, probes, site_structure, resource_audit
+
+
+def check_page(result: dict, detailed_results: dict, profile: dict) -> list:
+    """Disagreements between a scored page's breakdown and its scores"""
+    problems = []
+    breakdown = result["score_breakdown"]
+    for category in CATEGORIES:
+        details = breakdown[category]["details"]
+        earned = min(100, sum(detail["points_earned"] for detail in details.values()))
+        # points_earned and scores are both rounded to one decimal
+        if abs(earned - breakdown[category]["score"]) > 0.1 + 1e-9:
+            problems.append(f"{category}: points_earned sum {earned} != score {breakdown[category]['score']}")
+        for name, detail in details.items():
+            if detail["points_earned"] > detail["max_points"]:
+                problems.append(f"{category}.{name}: {detail['points_earned']} > max {detail['max_points']}")
+
+    vector = features_from_breakdown(breakdown, detailed_results)
+    if vector is None:
+        return problems + ["breakdown cannot be parsed back into features"]
+    rescored = score_features(vector, profile)
+    for category in CATEGORIES:
+        score = round(float(rescored[category][0]), 1)
+        if score != breakdown[category]["score"]:
+            problems.append(f"{category}: backfilled score {score} != score {breakdown[category]['score']}")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--pages", type=int, default=3000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    inputs = [synthetic_inputs(rng, index) for index in range(args.pages)]
+    pages = [parse_page(response.content, response.encoding, response.url) for _, response, *_ in inputs]
+
+    analyzer = SEOAnalyzer(use_llm=False)
+    failed = False
+    for name, profile in (("default", DEFAULT_PROFILE), ("tuned", TUNED_PROFILE)):
+        analyzer.profile = profile
+        analyzer.weights = profile["weights"]
+        mismatches = 0
+        for (url, response, probes, site_structure, resource_audit), page in zip(inputs, pages):
+            result = analyzer.score_page(url, response, page, probes, None, site_structure, None, resource_audit)
+            detailed_results = {"site_structure": site_structure, "resource_audit": resource_audit}
+            problems = check_page(result, detailed_results, profile)
+            if problems:
+                mismatches += 1
+                if mismatches <= 5:
+                    print(f"  {url}: " + "; ".join(problems))
+        print(f"{name} profile: {args.pages} pages, {mismatches} mismatches")
+        failed = failed or mismatches > 0
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+Site deletion check
+Usage (from backend/): python scripts/check_site_delete.py [--analyses 14]
+
+Runs --analyses analyses of a site (against the local fake site farm,
+without the LLM) in each ANALYSIS_STORAGE_MODE, plus a competitor
+comparison, on a temporary SQLite database with foreign keys enforced as
+PostgreSQL does, then deletes the site through the API. Checks that the
+delete succeeds, that no row of any table still references the site, and
+that another site's history is untouched.
+
+Exits with status 1 when any check fails.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+# Add the backend directory to the Python path
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, backend_dir)
+
+from loadtest.fakes import SiteFarm
+
+
+def run_analyses(client, site_id: int, count: int):
+    """Run `count` analyses of a site one after another"""
+    for _ in range(count):
+        client.post(f"/api/v1/analysis/{site_id}")
+        while client.get(f"/api/v1/analysis/{site_id}/progress").json()["status"] not in ("completed", "failed"):
+            time.sleep(0.05)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--analyses", type=int, default=14)
+    args = parser.parse_args()
+
+    farm = SiteFarm(page_kb=20, latency_ms=5).start()
+    workdir = tempfile.mkdtemp(prefix="seo-delete-check-")
+    os.environ.update({
+        "DATABASE_URL": f"sqlite:///{workdir}/check.db",
+        "AUTO_CREATE_TABLES": "True",
+        "GEMINI_API_KEY": "",
+        # Unreachable, so PageSpeed fails fast
+        "PAGESPEED_API_URL": "http://127.0.0.1:1/pagespeedonline/v5/runPagespeed",
+        "SNAPSHOT_STORE_DIR": "",
+        "ANALYSIS_KEYFRAME_INTERVAL": "5",
+    })
+
+    # Settings are read on import, so the app is imported after the environment is set
+    from fastapi.testclient import TestClient
+    from sqlalchemy import event, func, select
+    from app.core import database
+    from app.core.config import settings
+    from app.main import app
+
+    for engine in (database.engine, database.async_engine.sync_engine):
+        event.listen(engine, "connect", lambda connection, _: connection.execute("PRAGMA foreign_keys=ON"))
+    site_tables = [table for table in database.Base.metadata.sorted_tables if "site_id" in table.c]
+
+    def remaining(site_id: int) -> dict:
+        """Rows per table that still reference the site"""
+        with database.SessionLocal() as db:
+            counts = {
+                table.name: db.execute(select(func.count()).select_from(table).where(table.c.site_id == site_id)).scalar()
+                for table in site_tables
+            }
+        return {name: count for name, count in counts.items() if count}
+
+    failed = False
+    with TestClient(app, raise_server_exceptions=False) as client:
+        for index, mode in enumerate(("full", "delta")):
+            settings.ANALYSIS_STORAGE_MODE = mode
+            site_ids = []
+            for offset in range(2):
+                response = client.post("/api/v1/sites/", json={
+                    "domain": f"delete-{mode}-{offset}.test", "url": farm.site_url(2 * index + offset)
+                })
+                site_ids.append(response.json()["id"])
+            deleted, kept = site_ids
+            run_analyses(client, kept, 2)
+            run_analyses(client, deleted, args.analyses)
+            client.post(f"/api/v1/comparisons/{deleted}", json={"competitor_urls": [farm.site_url(10 + index)]})
+            # The comparison runs in the background
+            time.sleep(3)
+            kept_rows = remaining(kept)
+
+            response = client.delete(f"/api/v1/sites/{deleted}")
+            problems = []
+            if response.status_code != 200:
+                problems.append(f"delete returned {response.status_code}: {response.text[:200]}")
+            left = remaining(deleted)
+            if left:
+                problems.append(f"rows left: {left}")
+            if remaining(kept) != kept_rows:
+                problems.append(f"other site changed: {kept_rows} -> {remaining(kept)}")
+            if client.get(f"/api/v1/analysis/{kept}/latest").status_code != 200:
+                problems.append("other site's latest analysis unreadable")
+
+            print(f"{mode:5} mode: {args.analyses} analyses, " + ("; ".join(problems) if problems else "ok"))
+            failed = failed or bool(problems)
+
+    farm.stop()
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
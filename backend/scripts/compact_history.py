@@ -0,0 +1,72 @@
+"""
+Re-encode stored analysis history with delta storage
+Usage: ANALYSIS_STORAGE_MODE=delta python scripts/compact_history.py [--site-id N]
+
+Walks each site's analyses oldest first and rewrites every full row into
+keyframes and deltas, as if it had been written in delta mode. Rows that
+already carry a delta are left alone. On SQLite run VACUUM afterwards to
+return the freed pages to the file system.
+"""
+import argparse
+import sys
+import os
+
+# Add the backend directory to the Python path
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, backend_dir)
+
+from sqlalchemy import func, select
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.site import Analysis
+from app.services.analysis_history import encode_analysis_payload, load_payload_sync
+
+
+def compact_site(db, site_id: int) -> int:
+    """Re-encode one site's history; returns the number of rows rewritten"""
+    analysis_ids = db.execute(
+        select(Analysis.id).where(Analysis.site_id == site_id).order_by(Analysis.id)
+    ).scalars().all()
+
+    rewritten = 0
+    previous_id = None
+    for analysis_id in analysis_ids:
+        analysis, _ = load_payload_sync(db, analysis_id)
+        if analysis.payload_delta is None and analysis.payload_keyframe_id is None:
+            encode_analysis_payload(db, analysis, previous_id=previous_id)
+            db.flush()
+            rewritten += analysis.payload_delta is not None
+        previous_id = analysis_id
+
+    db.commit()
+    return rewritten
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--site-id", type=int, default=None, help="only this site")
+    args = parser.parse_args()
+
+    if settings.ANALYSIS_STORAGE_MODE != "delta":
+        sys.exit("Set ANALYSIS_STORAGE_MODE=delta to compact the history")
+
+    with SessionLocal() as db:
+        if args.site_id is not None:
+            site_ids = [args.site_id]
+        else:
+            site_ids = db.execute(select(Analysis.site_id).distinct()).scalars().all()
+
+        for site_id in site_ids:
+            rewritten = compact_site(db, site_id)
+            keyframes = db.scalar(
+                select(func.count(Analysis.id)).where(
+                    Analysis.site_id == site_id,
+                    Analysis.payload_keyframe_id.is_(None)
+                )
+            )
+            print(f"site {site_id}: {rewritten} analyses re-encoded, {keyframes} keyframes")
+
+
+if __name__ == "__main__":
+    main()
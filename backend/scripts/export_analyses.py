@@ -0,0 +1,67 @@
+"""
+Export analyses as NDJSON, CSV or Parquet
+Usage: python scripts/export_analyses.py --output analyses.parquet [--site-id 1 --site-id 2] [--since 2024-01-01] [--until 2024-07-01] [--breakdown]
+       python scripts/export_analyses.py --format csv --output - > analyses.csv
+
+The format follows the output file's extension unless --format is given.
+Rows are read through a server-side cursor in --batch-size partitions and
+written as they arrive (one Parquet row group per partition), so memory
+stays flat however many analyses are exported.
+"""
+import argparse
+import os
+import resource
+import sys
+import time
+from datetime import datetime
+
+# Add the backend directory to the Python path
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, backend_dir)
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.services.analysis_export import EXPORT_FORMATS, export_chunks_sync, export_query, make_encoder
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--output", required=True, help="output file, or - for stdout")
+    parser.add_argument("--format", choices=sorted(EXPORT_FORMATS), default=None)
+    parser.add_argument("--site-id", type=int, action="append", dest="site_ids", help="repeat for several sites (default: all)")
+    parser.add_argument("--since", type=datetime.fromisoformat, default=None, help="created at or after (ISO date)")
+    parser.add_argument("--until", type=datetime.fromisoformat, default=None, help="created before (ISO date)")
+    parser.add_argument("--breakdown", action="store_true", help="add the score breakdown as flat columns")
+    parser.add_argument("--batch-size", type=int, default=settings.EXPORT_BATCH_SIZE)
+    args = parser.parse_args()
+
+    export_format = args.format or os.path.splitext(args.output)[1].lstrip(".").lower()
+    if export_format not in EXPORT_FORMATS:
+        sys.exit(f"Cannot tell the format from {args.output!r}; use --format {'/'.join(sorted(EXPORT_FORMATS))}")
+    try:
+        encoder = make_encoder(export_format, args.breakdown)
+    except ImportError:
+        sys.exit("Parquet export requires pyarrow (pip install pyarrow)")
+
+    query = export_query(args.site_ids, args.since, args.until, args.breakdown)
+    output = sys.stdout.buffer if args.output == "-" else open(args.output, "wb")
+
+    started = time.perf_counter()
+    written = 0
+    try:
+        with SessionLocal() as db:
+            for chunk in export_chunks_sync(db, query, encoder, args.breakdown, args.batch_size):
+                output.write(chunk)
+                written += len(chunk)
+    finally:
+        if output is not sys.stdout.buffer:
+            output.close()
+
+    elapsed = time.perf_counter() - started
+    peak_rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"{export_format}: {written / 1e6:.1f} MB in {elapsed:.1f}s, "
+          f"peak RSS {peak_rss_mb:.0f} MB", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
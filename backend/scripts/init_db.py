@@ -0,0 +1,19 @@
+"""
+Create missing database tables
+Usage: python scripts/init_db.py
+
+Use this for deployments that run with AUTO_CREATE_TABLES=False
+(e.g. the Vercel serverless function), where cold starts skip schema creation.
+"""
+import sys
+import os
+
+# Add the backend directory to the Python path
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, backend_dir)
+
+from app.core.database import init_db
+
+if __name__ == "__main__":
+    init_db()
+    print("Database tables are up to date")
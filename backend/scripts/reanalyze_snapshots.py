@@ -0,0 +1,164 @@
+"""
+Re-run the rule-based checks on stored page snapshots, without network access
+Usage: python scripts/reanalyze_snapshots.py [--site-id N] [--limit N] [--output results.jsonl]
+       python scripts/reanalyze_snapshots.py --store-stats
+
+For every analysis with a snapshot (newest first), the page's HTML is read
+from the snapshot store and scored by the current SEOAnalyzer.score_page
+with the context stored with the analysis: the requested and final URL,
+status, response time, robots.txt / sitemap probes and the crawl and
+resource audit results. Nothing is fetched and nothing is written to the
+database; --output writes every new result (scores, breakdown and details)
+as one JSON line.
+
+With PARSE_POOL_WORKERS set, pages are parsed in that many processes, a
+few pages ahead of scoring.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from collections import deque
+
+# Add the backend directory to the Python path
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, backend_dir)
+
+from sqlalchemy import func, select
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.site import Analysis
+from app.services.analysis_history import load_payload_sync
+from app.services.parse_pool import parse_response, shutdown_parse_pool
+from app.services.seo_analyzer import SEOAnalyzer
+from app.services.snapshot_store import SnapshotNotFound, get_snapshot_store, snapshot_response
+
+
+def reanalyze(db, store, site_id=None, limit=None, output=None) -> dict:
+    """Score every snapshot again; returns counts, score changes and timings"""
+    analyzer = SEOAnalyzer(use_llm=False)
+    query = select(Analysis.id).where(Analysis.html_snapshot_hash.is_not(None)).order_by(Analysis.id.desc())
+    if site_id is not None:
+        query = query.where(Analysis.site_id == site_id)
+    if limit:
+        query = query.limit(limit)
+
+    stats = {"analyses": 0, "missing": 0, "changed_1pt": 0, "stored_sum": 0.0, "new_sum": 0.0,
+             "load_seconds": 0.0, "read_seconds": 0.0, "score_seconds": 0.0, "movers": []}
+
+    # Parsed pages in flight: (analysis, detailed results, snapshot record, response, parse future)
+    pending = deque()
+    window = max(1, settings.PARSE_POOL_WORKERS) * 4
+
+    for analysis_id in db.execute(query).scalars().all():
+        started = time.perf_counter()
+        analysis, payload = load_payload_sync(db, analysis_id)
+        detailed = payload.get("detailed_results") or {}
+        record = detailed.get("page_snapshot")
+        stats["load_seconds"] += time.perf_counter() - started
+        if not record:
+            stats["missing"] += 1
+            continue
+
+        started = time.perf_counter()
+        try:
+            response = snapshot_response(store, record)
+        except SnapshotNotFound:
+            stats["missing"] += 1
+            continue
+        stats["read_seconds"] += time.perf_counter() - started
+
+        started = time.perf_counter()
+        pending.append((analysis, detailed, record, response, parse_response(response)))
+        stats["score_seconds"] += time.perf_counter() - started
+        if len(pending) >= window:
+            score(analyzer, pending.popleft(), stats, output)
+
+    while pending:
+        score(analyzer, pending.popleft(), stats, output)
+
+    stats["movers"] = sorted(stats["movers"], key=lambda mover: -abs(mover[0]))[:10]
+    return stats
+
+
+def score(analyzer, item, stats: dict, output=None):
+    """Score one parsed snapshot and add it to `stats`"""
+    analysis, detailed, record, response, parsing = item
+    started = time.perf_counter()
+    result = analyzer.score_page(
+        record["url"], response, parsing.result(), record.get("probes") or {}, None,
+        detailed.get("site_structure"), detailed.get("duplicate_content"), detailed.get("resource_audit")
+    )
+    stats["score_seconds"] += time.perf_counter() - started
+
+    change = result["total_score"] - analysis.total_score
+    stats["analyses"] += 1
+    stats["stored_sum"] += analysis.total_score
+    stats["new_sum"] += result["total_score"]
+    if abs(change) >= 1:
+        stats["changed_1pt"] += 1
+        stats["movers"].append((round(change, 1), analysis.id, analysis.site_id, analysis.total_score, result["total_score"]))
+
+    if output:
+        result.pop("feature_vector", None)
+        output.write(json.dumps(
+            {"analysis_id": analysis.id, "site_id": analysis.site_id, "stored_total_score": analysis.total_score, **result},
+            ensure_ascii=False, default=str
+        ) + "\n")
+
+
+def store_stats(db, store):
+    """Blobs, bytes on disk and how many analyses reference a stored page"""
+    blobs = 0
+    disk_bytes = 0
+    for digest in store.hashes():
+        blobs += 1
+        disk_bytes += os.path.getsize(store.path(digest))
+    referenced = db.execute(select(func.count(func.distinct(Analysis.html_snapshot_hash)))).scalar()
+    analyses = db.execute(select(func.count()).select_from(Analysis).where(Analysis.html_snapshot_hash.is_not(None))).scalar()
+    print(f"{store.root}: {blobs} blobs, {disk_bytes / 1e6:.1f} MB on disk")
+    print(f"{analyses} analyses reference {referenced} distinct pages")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--site-id", type=int, default=None, help="only this site")
+    parser.add_argument("--limit", type=int, default=None, help="newest N analyses")
+    parser.add_argument("--output", help="write the new results to this JSON Lines file")
+    parser.add_argument("--store-stats", action="store_true", help="show the size of the snapshot store and exit")
+    args = parser.parse_args()
+
+    store = get_snapshot_store()
+    if store is None:
+        sys.exit("SNAPSHOT_STORE_DIR is not set")
+
+    with SessionLocal() as db:
+        if args.store_stats:
+            store_stats(db, store)
+            return
+
+        output = open(args.output, "w", encoding="utf-8") if args.output else None
+        try:
+            stats = reanalyze(db, store, args.site_id, args.limit, output)
+        finally:
+            shutdown_parse_pool()
+            if output:
+                output.close()
+
+    analyses = stats["analyses"]
+    print(f"{analyses} analyses re-scored, {stats['missing']} without a snapshot")
+    if not analyses:
+        return
+    busy = stats["read_seconds"] + stats["score_seconds"]
+    print(f"load {stats['load_seconds']:.2f}s, read {stats['read_seconds']:.2f}s, "
+          f"parse and score {stats['score_seconds']:.2f}s ({analyses / busy:.1f} pages/s)")
+    print(f"mean total: stored {stats['stored_sum'] / analyses:.1f}, new {stats['new_sum'] / analyses:.1f}, "
+          f"changed by >= 1 point: {stats['changed_1pt']}")
+    for change, analysis_id, site_id, stored, total in stats["movers"]:
+        print(f"  analysis {analysis_id} (site {site_id}): {stored:.1f} -> {total:.1f} ({change:+.1f})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+"""
+Re-score stored analyses with a scoring profile
+Usage: python scripts/rescore_history.py [--profile what_if.json] [--site-id N] [--output scores.csv]
+       python scripts/rescore_history.py --backfill
+       python scripts/rescore_history.py --synthetic 5000000
+
+Scores are recomputed from the stored feature vectors in batches of
+NumPy column operations; nothing is fetched and no score is written. The
+profile file holds overrides of scoring.DEFAULT_PROFILE, e.g.
+{"weights": {"content": 0.4, "authority": 0.05}}.
+
+--backfill first rebuilds the feature vectors of analyses written before
+they existed, from their stored score breakdowns. --synthetic times the
+scoring of N random rows without a database.
+"""
+import argparse
+import csv
+import json
+import sys
+import os
+import time
+
+# Add the backend directory to the Python path
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, backend_dir)
+
+import numpy as np
+from sqlalchemy import select
+
+from app.core.database import SessionLocal
+from app.models.site import Analysis
+from app.services.analysis_history import load_payload_sync
+from app.services.scoring import (
+    FEATURES, SCORE_COLUMNS, decode_feature_matrix, encode_features,
+    features_from_breakdown, resolve_profile, score_features
+)
+
+
+def backfill(db, site_id=None) -> int:
+    """Store feature vectors rebuilt from score breakdowns; returns the number written"""
+    query = select(Analysis.id).where(Analysis.feature_vector.is_(None)).order_by(Analysis.id)
+    if site_id is not None:
+        query = query.where(Analysis.site_id == site_id)
+
+    written = 0
+    for analysis_id in db.execute(query).scalars().all():
+        analysis, payload = load_payload_sync(db, analysis_id)
+        vector = features_from_breakdown(payload.get("score_breakdown") or {}, payload.get("detailed_results"))
+        if vector is not None:
+            analysis.feature_vector = encode_features(vector)
+            written += 1
+        if written and written % 1000 == 0:
+            db.commit()
+    db.commit()
+    return written
+
+
+def rescore(db, profile, site_id=None, batch_size=100000, writer=None) -> dict:
+    """Re-score every analysis with a feature vector, batch by batch"""
+    columns = [getattr(Analysis, column) for column in SCORE_COLUMNS.values()]
+    query = select(Analysis.id, Analysis.site_id, Analysis.feature_vector, *columns).where(
+        Analysis.feature_vector.is_not(None)
+    ).order_by(Analysis.id).execution_options(yield_per=batch_size)
+    if site_id is not None:
+        query = query.where(Analysis.site_id == site_id)
+
+    stats = {"rows": 0, "load_seconds": 0.0, "score_seconds": 0.0, "stored_sum": 0.0, "rescored_sum": 0.0,
+             "abs_change_sum": 0.0, "changed_1pt": 0}
+    movers = []
+
+    started = time.perf_counter()
+    for rows in db.execute(query).partitions():
+        matrix = decode_feature_matrix(row.feature_vector for row in rows)
+        stored = np.array([row.total_score for row in rows], dtype=np.float64)
+        stats["load_seconds"] += time.perf_counter() - started
+
+        started = time.perf_counter()
+        scores = score_features(matrix, profile)
+        total = np.round(scores["total"], 1)
+        change = total - stored
+        stats["score_seconds"] += time.perf_counter() - started
+
+        stats["rows"] += len(rows)
+        stats["stored_sum"] += float(stored.sum())
+        stats["rescored_sum"] += float(total.sum())
+        stats["abs_change_sum"] += float(np.abs(change).sum())
+        stats["changed_1pt"] += int((np.abs(change) >= 1).sum())
+        for index in np.argsort(-np.abs(change))[:10]:
+            movers.append((float(change[index]), rows[index].id, rows[index].site_id, float(stored[index]), float(total[index])))
+
+        if writer:
+            rounded = {key: np.round(values, 1) for key, values in scores.items()}
+            for index, row in enumerate(rows):
+                writer.writerow([row.id, row.site_id] + [getattr(row, column) for column in SCORE_COLUMNS.values()]
+                                + [float(rounded[key][index]) for key in SCORE_COLUMNS])
+        started = time.perf_counter()
+
+    stats["movers"] = sorted(movers, key=lambda mover: -abs(mover[0]))[:10]
+    return stats
+
+
+def synthetic(rows: int, profile):
+    """Time score_features on random feature rows"""
+    rng = np.random.default_rng(0)
+    matrix = np.empty((rows, len(FEATURES)), dtype=np.float32)
+    # Crawl and resource-audit columns come in pairs that are NaN together
+    crawled = rng.random(rows) < 0.2
+    audited = rng.random(rows) < 0.2
+    for index, name in enumerate(FEATURES):
+        if name in ("has_ssl", "robots_txt", "sitemap", "has_viewport", "has_canonical"):
+            matrix[:, index] = rng.integers(0, 2, rows)
+        elif name.endswith("ratio"):
+            matrix[:, index] = np.where(crawled, rng.random(rows), np.nan)
+        elif name.endswith("bytes"):
+            matrix[:, index] = np.where(audited, rng.integers(10**5, 10**7, rows), np.nan)
+        else:
+            matrix[:, index] = rng.integers(0, 200, rows)
+
+    started = time.perf_counter()
+    scores = score_features(matrix, profile)
+    elapsed = time.perf_counter() - started
+    print(f"{rows} rows ({matrix.nbytes / 1e6:.0f} MB of features) scored in {elapsed:.2f}s "
+          f"({rows / elapsed / 1e6:.1f}M rows/s), mean total {scores['total'].mean():.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--profile", help="JSON file with scoring profile overrides")
+    parser.add_argument("--site-id", type=int, default=None, help="only this site")
+    parser.add_argument("--batch-size", type=int, default=100000)
+    parser.add_argument("--output", help="write stored and re-scored scores per analysis to this CSV file")
+    parser.add_argument("--backfill", action="store_true", help="rebuild missing feature vectors first")
+    parser.add_argument("--synthetic", type=int, default=None, metavar="ROWS", help="benchmark without a database")
+    args = parser.parse_args()
+
+    overrides = {}
+    if args.profile:
+        with open(args.profile) as f:
+            overrides = json.load(f)
+    try:
+        profile = resolve_profile(overrides)
+    except ValueError as e:
+        sys.exit(str(e))
+
+    if args.synthetic:
+        synthetic(args.synthetic, profile)
+        return
+
+    with SessionLocal() as db:
+        if args.backfill:
+            print(f"backfilled {backfill(db, args.site_id)} feature vectors")
+
+        output = open(args.output, "w", newline="") if args.output else None
+        try:
+            writer = None
+            if output:
+                writer = csv.writer(output)
+                writer.writerow(["analysis_id", "site_id"] + [f"stored_{key}" for key in SCORE_COLUMNS]
+                                + [f"rescored_{key}" for key in SCORE_COLUMNS])
+            stats = rescore(db, profile, args.site_id, args.batch_size, writer)
+        finally:
+            if output:
+                output.close()
+
+    rows = stats["rows"]
+    if not rows:
+        print("no analyses with feature vectors (run with --backfill)")
+        return
+
+    print(f"{rows} analyses: load {stats['load_seconds']:.2f}s, score {stats['score_seconds']:.2f}s")
+    print(f"mean total: stored {stats['stored_sum'] / rows:.1f}, re-scored {stats['rescored_sum'] / rows:.1f}, "
+          f"mean |change| {stats['abs_change_sum'] / rows:.2f}, changed by >= 1 point: {stats['changed_1pt']}")
+    for change, analysis_id, site_id, stored, total in stats["movers"]:
+        if change:
+            print(f"  analysis {analysis_id} (site {site_id}): {stored:.1f} -> {total:.1f} ({change:+.1f})")
+
+
+if __name__ == "__main__":
+    main()
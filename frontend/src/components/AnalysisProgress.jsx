@@ -1,10 +1,11 @@
 import { useEffect, useState } from 'react'
-import { Loader2, CheckCircle, XCircle, AlertCircle } from 'lucide-react'
+import { Loader2, CheckCircle, XCircle, AlertCircle, Ban } from 'lucide-react'
 import { analysisApi } from '../services/api'
 
 export default function AnalysisProgress({ siteId, onComplete, onError }) {
   const [progress, setProgress] = useState(null)
   const [polling, setPolling] = useState(true)
+  const [cancelRequested, setCancelRequested] = useState(false)
 
   useEffect(() => {
     if (!polling) return
@@ -26,6 +27,11 @@ export default function AnalysisProgress({ siteId, onComplete, onError }) {
           if (onError) {
             onError(progressData.error_message)
           }
+        } else if (progressData.status === 'cancelled') {
+          setPolling(false)
+          if (onError) {
+            onError('分析がキャンセルされました')
+          }
         }
       } catch (err) {
         console.error('Progress poll error:', err)
@@ -51,6 +57,17 @@ export default function AnalysisProgress({ siteId, onComplete, onError }) {
     return () => clearInterval(interval)
   }, [siteId, polling, onComplete, onError])
 
+  const handleCancel = async () => {
+    setCancelRequested(true)
+    try {
+      const response = await analysisApi.cancelJob(progress.id)
+      setProgress(response.data)
+    } catch (err) {
+      console.error('Cancel error:', err)
+      setCancelRequested(false)
+    }
+  }
+
   if (!progress) {
     return (
       <div className="flex items-center justify-center py-8">
@@ -66,8 +83,11 @@ export default function AnalysisProgress({ siteId, onComplete, onError }) {
         return <CheckCircle className="h-8 w-8 text-green-600" />
       case 'failed':
         return <XCircle className="h-8 w-8 text-red-600" />
+      case 'cancelled':
+        return <Ban className="h-8 w-8 text-gray-500" />
       case 'running':
       case 'pending':
+      case 'cancelling':
         return <Loader2 className="h-8 w-8 text-primary-600 animate-spin" />
       default:
         return <AlertCircle className="h-8 w-8 text-gray-400" />
@@ -84,6 +104,10 @@ export default function AnalysisProgress({ siteId, onComplete, onError }) {
         return '分析中'
       case 'pending':
         return '待機中'
+      case 'cancelling':
+        return 'キャンセル中'
+      case 'cancelled':
+        return 'キャンセル済み'
       default:
         return '不明'
     }
@@ -97,6 +121,7 @@ export default function AnalysisProgress({ siteId, onComplete, onError }) {
         return 'bg-red-50 border-red-200'
       case 'running':
       case 'pending':
+      case 'cancelling':
         return 'bg-blue-50 border-blue-200'
       default:
         return 'bg-gray-50 border-gray-200'
@@ -107,16 +132,25 @@ export default function AnalysisProgress({ siteId, onComplete, onError }) {
     <div className={`border rounded-lg p-6 ${getStatusColor()}`}>
       <div className="flex items-center mb-4">
         {getStatusIcon()}
-        <div className="ml-3">
+        <div className="ml-3 flex-1">
           <h3 className="text-lg font-semibold text-gray-900">{getStatusText()}</h3>
           {progress.current_step && (
             <p className="text-sm text-gray-600 mt-1">{progress.current_step}</p>
           )}
         </div>
+        {(progress.status === 'pending' || progress.status === 'running') && (
+          <button
+            onClick={handleCancel}
+            disabled={cancelRequested}
+            className="px-3 py-1.5 text-sm border border-gray-300 rounded-md text-gray-700 bg-white hover:bg-gray-50 disabled:opacity-50"
+          >
+            キャンセル
+          </button>
+        )}
       </div>
 
       {/* Progress Bar */}
-      {progress.status !== 'failed' && (
+      {progress.status !== 'failed' && progress.status !== 'cancelled' && (
         <div className="mt-4">
           <div className="flex justify-between text-sm text-gray-600 mb-2">
             <span>進捗状況</span>
@@ -1,17 +1,29 @@
 import { useState, useEffect } from 'react'
 import { Link } from 'react-router-dom'
-import { sitesApi } from '../services/api'
+import { sitesApi, dashboardApi } from '../services/api'
 import { Globe, TrendingUp, AlertCircle } from 'lucide-react'
 
 export default function Dashboard() {
   const [sites, setSites] = useState([])
+  const [summary, setSummary] = useState(null)
   const [loading, setLoading] = useState(true)
   const [error, setError] = useState(null)
 
   useEffect(() => {
     fetchSites()
+    fetchSummary()
   }, [])
 
+  const fetchSummary = async () => {
+    try {
+      const response = await dashboardApi.getSummary()
+      setSummary(response.data)
+    } catch (err) {
+      // The site list is still usable without the summary
+      console.error(err)
+    }
+  }
+
   const fetchSites = async () => {
     try {
       const response = await sitesApi.getAll()
@@ -55,6 +67,29 @@ export default function Dashboard() {
         </div>
       )}
 
+      {summary && summary.site_count > 0 && (
+        <div className="grid gap-4 grid-cols-2 md:grid-cols-4 mb-8">
+          <div className="bg-white rounded-lg shadow p-4">
+            <p className="text-sm text-gray-500">登録サイト数</p>
+            <p className="mt-1 text-2xl font-bold text-gray-900">{summary.site_count}</p>
+          </div>
+          <div className="bg-white rounded-lg shadow p-4">
+            <p className="text-sm text-gray-500">平均スコア</p>
+            <p className="mt-1 text-2xl font-bold text-gray-900">
+              {summary.average_score !== null ? Math.round(summary.average_score) : '-'}
+            </p>
+          </div>
+          <div className="bg-white rounded-lg shadow p-4">
+            <p className="text-sm text-gray-500">要再分析（30日以上）</p>
+            <p className="mt-1 text-2xl font-bold text-yellow-600">{summary.stale_count}</p>
+          </div>
+          <div className="bg-white rounded-lg shadow p-4">
+            <p className="text-sm text-gray-500">分析失敗</p>
+            <p className="mt-1 text-2xl font-bold text-red-600">{summary.failing_jobs.length}</p>
+          </div>
+        </div>
+      )}
+
       {sites.length === 0 ? (
         <div className="text-center py-12 bg-white rounded-lg shadow">
           <Globe className="mx-auto h-12 w-12 text-gray-400" />
@@ -23,6 +23,12 @@ export const analysisApi = {
   getProgress: (siteId) => api.get(`/api/v1/analysis/${siteId}/progress`),
   getLatest: (siteId) => api.get(`/api/v1/analysis/${siteId}/latest`),
   getHistory: (siteId, limit = 10) => api.get(`/api/v1/analysis/${siteId}/history?limit=${limit}`),
+  cancelJob: (jobId) => api.delete(`/api/v1/analysis/jobs/${jobId}`),
+};
+
+// Dashboard API
+export const dashboardApi = {
+  getSummary: () => api.get('/api/v1/dashboard/summary'),
 };
 
 export default api;